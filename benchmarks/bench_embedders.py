@@ -0,0 +1,84 @@
+"""
+Latency and throughput of the embedder backends across batch sizes, and the
+cosine similarity of the ONNX embeddings to the PyTorch ones.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_embedders [--batch-sizes 1 8 32 128]
+        [--threads 0] [--repeats 5] [--backends torch onnx onnx-fp32]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from newsfeed.embedding import OnnxEmbedder, SentenceTransformerEmbedder
+
+WORDS = (
+    "government market election team season model data security research "
+    "company growth report players storm court energy launch policy league "
+    "network patients climate shares championship vulnerability release"
+).split()
+
+
+def make_texts(count: int, rng: np.random.Generator) -> list:
+    """Article-like texts of 20 to 200 words."""
+    return [
+        " ".join(rng.choice(WORDS, size=rng.integers(20, 200))) for _ in range(count)
+    ]
+
+
+def run(name: str, embedder, texts: list, batch_sizes: list, repeats: int):
+    embedder.embed_batch(texts[:8])  # warm up
+    for batch_size in batch_sizes:
+        embedder.batch_size = batch_size
+        batch = texts[:batch_size]
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            embedder.embed_batch(batch)
+            latencies.append(time.perf_counter() - start)
+        median = statistics.median(latencies)
+        print(
+            f"{name:>9} batch {batch_size:>4}: {median * 1000:8.1f}ms, "
+            f"{batch_size / median:7.1f} texts/s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["torch", "onnx", "onnx-fp32"],
+        choices=["torch", "onnx", "onnx-fp32"],
+    )
+    args = parser.parse_args()
+
+    texts = make_texts(max(args.batch_sizes), np.random.default_rng(0))
+    reference = SentenceTransformerEmbedder().embed_batch(texts)
+    with tempfile.TemporaryDirectory() as model_dir:
+        for name in args.backends:
+            if name == "torch":
+                embedder = SentenceTransformerEmbedder()
+            else:
+                embedder = OnnxEmbedder(
+                    model_dir=model_dir,
+                    threads=args.threads,
+                    quantize=name == "onnx",
+                )
+                vectors = embedder.embed_batch(texts)
+                cosine = (vectors * reference).sum(axis=1) / (
+                    np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+                )
+                print(f"{name:>9} min cosine to PyTorch: {cosine.min():.4f}")
+            run(name, embedder, texts, args.batch_sizes, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
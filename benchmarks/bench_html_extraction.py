@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the HTML to text extractors used by the fetchers.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_html_extraction [--entries 2000] [--repeat 5]
+"""
+
+import argparse
+import random
+import timeit
+
+from newsfeed.text_extraction import TEXT_EXTRACTORS
+
+WORDS = "the quick brown fox jumps over lazy dog news feed article python".split()
+
+
+def make_entry(rng: random.Random) -> str:
+    """Builds an HTML body shaped like a typical feed entry."""
+    paragraphs = []
+    for _ in range(rng.randint(2, 8)):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))
+        paragraphs.append(
+            f'<p>{words} <a href="https://example.com/{rng.randint(0, 999)}">'
+            f"link</a> &amp; <em>more</em>&nbsp;text</p>"
+        )
+    return (
+        '<div class="entry"><img src="https://example.com/a.png"/>'
+        + "".join(paragraphs)
+        + "<!-- tracking --><script>var t = 1;</script></div>"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    entries = [make_entry(rng) for _ in range(args.entries)]
+    extractors = {name: cls() for name, cls in TEXT_EXTRACTORS.items()}
+
+    reference = [extractors["bs4"].extract(entry) for entry in entries]
+    for name, extractor in extractors.items():
+        if [extractor.extract(entry) for entry in entries] != reference:
+            raise SystemExit(f"{name} output differs from bs4")
+
+    baseline = None
+    for name, extractor in extractors.items():
+        best = min(
+            timeit.repeat(
+                lambda: [extractor.extract(entry) for entry in entries],
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        baseline = baseline or best
+        print(
+            f"{name:>10}: {best * 1000:8.1f} ms for {len(entries)} entries "
+            f"({best / len(entries) * 1e6:6.1f} us/entry, "
+            f"{baseline / best:4.1f}x vs bs4)"
+        )
+
+
+if __name__ == "__main__":
+    main()
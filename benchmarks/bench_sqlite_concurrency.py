@@ -0,0 +1,103 @@
+"""
+Concurrent read/write throughput of SQLArticleRepository on an SQLite file,
+with the default engine and with the tuned profile plus a read-only pool.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sqlite_concurrency [--seconds 5] [--readers 4]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import itertools
+from pathlib import Path
+import tempfile
+import time
+
+from newsfeed.models import NewsCategory, ProcessedArticle
+from newsfeed.storage import SQLArticleRepository, SQLiteProfile
+
+CATEGORIES = list(NewsCategory)
+counter = itertools.count()
+
+
+def make_batch(size: int) -> list:
+    now = datetime.now()
+    batch = []
+    for _ in range(size):
+        i = next(counter)
+        batch.append(
+            ProcessedArticle(
+                url=f"https://example.com/bench/{i}",
+                title=f"Benchmark article {i}",
+                content="Lorem ipsum dolor sit amet. " * 40,
+                category=CATEGORIES[i % len(CATEGORIES)],
+                source="benchmark",
+                published_at=now - timedelta(minutes=i),
+                embedding=[0.1] * 384,
+            )
+        )
+    return batch
+
+
+async def writer(repo: SQLArticleRepository, deadline: float, batch_size: int) -> int:
+    written = 0
+    while time.perf_counter() < deadline:
+        await repo.save_many(make_batch(batch_size))
+        written += batch_size
+    return written
+
+
+async def reader(repo: SQLArticleRepository, deadline: float, offset: int) -> int:
+    reads = 0
+    while time.perf_counter() < deadline:
+        category = CATEGORIES[(reads + offset) % len(CATEGORIES)].value
+        await repo.list_articles(category=category, limit=20)
+        reads += 1
+    return reads
+
+
+async def run(name: str, repo: SQLArticleRepository, args) -> None:
+    await repo.init_db()
+    await repo.save_many(make_batch(args.seed_rows))
+
+    deadline = time.perf_counter() + args.seconds
+    written, *reads = await asyncio.gather(
+        writer(repo, deadline, args.batch_size),
+        *(reader(repo, deadline, i) for i in range(args.readers)),
+    )
+    await repo.close()
+
+    print(
+        f"{name:>8}: {written / args.seconds:8.0f} rows written/s, "
+        f"{sum(reads) / args.seconds:8.0f} list queries/s "
+        f"({args.readers} readers)"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--seed-rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f"sqlite+aiosqlite:///{Path(tmp) / 'default.db'}"
+        tuned_url = f"sqlite+aiosqlite:///{Path(tmp) / 'tuned.db'}"
+
+        await run("default", SQLArticleRepository(default_url), args)
+        await run(
+            "tuned",
+            SQLArticleRepository(
+                tuned_url,
+                sqlite_profile=SQLiteProfile(),
+                read_pool_size=args.readers,
+            ),
+            args,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Index build time and query latency of NumpyVectorIndex and ChromaVectorIndex
+on random normalized vectors.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_vector_index [--sizes 10000 100000 1000000]
+        [--dim 384] [--queries 100] [--backends numpy chroma]
+"""
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from newsfeed.models import NewsCategory, ProcessedArticle
+from newsfeed.storage import ChromaVectorIndex, NumpyVectorIndex
+
+BACKENDS = {"numpy": NumpyVectorIndex, "chroma": ChromaVectorIndex}
+# Articles handed to index_many at once, as ingestion batches would be
+INDEX_BATCH_SIZE = 5000
+
+
+def make_articles(vectors: np.ndarray, start: int) -> list:
+    now = datetime.now()
+    return [
+        ProcessedArticle(
+            url=f"https://example.com/bench/{start + i}",
+            title=f"Benchmark article {start + i}",
+            content="",
+            category=NewsCategory.OTHER,
+            source="benchmark",
+            published_at=now,
+            embedding=vector.tolist(),
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def run(name: str, path: str, vectors: np.ndarray, queries: np.ndarray) -> None:
+    index = BACKENDS[name](path)
+    batches = [
+        make_articles(vectors[offset : offset + INDEX_BATCH_SIZE], offset)
+        for offset in range(0, len(vectors), INDEX_BATCH_SIZE)
+    ]
+
+    start = time.perf_counter()
+    for batch in batches:
+        index.index_many(batch)
+    build = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search_many([query], limit=10)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    start = time.perf_counter()
+    index.search_many(queries, limit=10)
+    batched = (time.perf_counter() - start) * 1000 / len(queries)
+
+    print(
+        f"{name:>7} {len(vectors):>8}: build {build:7.1f}s, "
+        f"p50 {statistics.median(latencies):7.2f}ms, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.2f}ms, "
+        f"batched {batched:6.2f}ms/query"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument(
+        "--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS)
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        for name in args.backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                run(name, str(Path(tmp) / name), vectors, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
 from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 
 from newsfeed.config import get_settings
-from newsfeed.dependencies import get_repository, get_news_service
+from newsfeed.dependencies import (
+    get_feed_http_client,
+    get_parser_executor,
+    get_repository,
+    get_news_service,
+    get_warmup,
+)
 from newsfeed.logger import configure_logging
-from newsfeed.models import NewsCategory, ArticleResponse
+from newsfeed.models import (
+    Collapse,
+    NewsCategory,
+    ArticleResponse,
+    ArticleSearchResult,
+    PartialArticleResponse,
+    SearchMode,
+)
+from newsfeed.pagination import decode_cursor, encode_cursor
 from newsfeed.scheduler import start_scheduler
 from newsfeed.services.news_service import NewsService
-from newsfeed.storage import ArticleRepository
+from newsfeed.storage import ArticleRepository, SearchFilters
 
 
 @asynccontextmanager
@@ -20,33 +35,88 @@ async def lifespan(app: FastAPI):
 
     repo = get_repository()
     await repo.init_db()
+    await repo.warm_url_cache()
 
+    # Models and indexes load in the background, /ready reports progress
+    warmup = get_warmup()
+    warmup.start()
     scheduler = start_scheduler()
 
     yield
 
     # Shutdown: clean up resources
     scheduler.shutdown()
+    await warmup.stop()
+    await get_feed_http_client().aclose()
+    get_parser_executor().shutdown(wait=False, cancel_futures=True)
+    await repo.close()
 
 
 app = FastAPI(title="Newsfeed API", lifespan=lifespan)
 
+# Sort key of the article listing, loaded even when not requested in `fields`
+CURSOR_FIELDS = ("id", "published_at")
+
+
+async def wait_for_warmup():
+    await get_warmup().wait()
+
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 
-@app.get("/api/v1/articles/search", response_model=List[ArticleResponse])
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Whether the embedding model, vector index and classifier have finished
+    loading. Responds 503 until they have, so traffic can be held back.
+    """
+    report = get_warmup().report()
+    if not report["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
+
+# Route dependencies are resolved before the service, which is only built once
+# warm-up has loaded everything it needs
+@app.get(
+    "/api/v1/articles/search",
+    response_model=List[ArticleSearchResult],
+    dependencies=[Depends(wait_for_warmup)],
+)
 async def search_articles(
     query: str,
     limit: int = 20,
+    max_distance: Optional[float] = None,
+    category: Optional[NewsCategory] = None,
+    source: Optional[str] = None,
+    published_after: Optional[datetime] = None,
+    published_before: Optional[datetime] = None,
+    mode: SearchMode = SearchMode.VECTOR,
+    collapse: Optional[Collapse] = None,
     service: NewsService = Depends(get_news_service),
 ):
     """
-    Semantic search for articles.
+    Search for articles: semantic (`vector`, default), BM25 full-text
+    (`keyword`), or both merged by reciprocal rank fusion (`hybrid`), which
+    ranks exact names, CVE IDs and model numbers well.
+    `max_distance` drops vector matches further than that from the query.
+    `category`, `source` and the inclusive `published_after`/`published_before`
+    bounds are applied inside the vector index, so up to `limit` matching
+    articles are returned. `collapse=story` returns only the best match among
+    copies of the same story from different sources.
     """
-    return await service.search_articles(query, limit)
+    filters = SearchFilters(
+        category=category.value if category else None,
+        source=source,
+        published_after=published_after,
+        published_before=published_before,
+    )
+    return await service.search_articles(
+        query, limit, max_distance, filters, mode, collapse == Collapse.STORY
+    )
 
 
 @app.get("/api/v1/articles/{article_id}", response_model=ArticleResponse)
@@ -59,15 +129,76 @@ async def get_article(
     return article
 
 
-@app.get("/api/v1/articles", response_model=List[ArticleResponse])
+# Fields are never null, so dropping None leaves exactly the requested ones
+@app.get(
+    "/api/v1/articles",
+    response_model=List[PartialArticleResponse],
+    response_model_exclude_none=True,
+)
 async def list_articles(
+    response: Response,
     category: Optional[NewsCategory] = None,
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    collapse: Optional[Collapse] = None,
     repo: ArticleRepository = Depends(get_repository),
 ):
     """
-    List articles with optional category filtering.
+    List articles newest first with optional category filtering.
+    `collapse=story` lists only the newest article of each story.
+    When more articles follow, the `X-Next-Cursor` response header holds an
+    opaque cursor; pass it back as `cursor` to get the next page.
+    `fields` is a comma-separated list of article fields to return (e.g.
+    `fields=title,url`); only those columns are loaded. `id` is always included.
     """
     cat_str = category.value if category else None
-    return await repo.list_articles(category=cat_str, limit=limit, offset=offset)
+    collapse_stories = collapse == Collapse.STORY
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # One extra row tells whether another page follows
+    if fields:
+        selected = _parse_fields(fields)
+        rows = await repo.list_article_fields(
+            selected + [name for name in CURSOR_FIELDS if name not in selected],
+            category=cat_str,
+            limit=limit + 1,
+            offset=offset,
+            after=after,
+            collapse_stories=collapse_stories,
+        )
+        keys = [(row["published_at"], row["id"]) for row in rows]
+        for row in rows:
+            for name in CURSOR_FIELDS:
+                if name not in selected:
+                    del row[name]
+    else:
+        rows = await repo.list_articles(
+            category=cat_str,
+            limit=limit + 1,
+            offset=offset,
+            after=after,
+            collapse_stories=collapse_stories,
+        )
+        keys = [(article.published_at, article.id) for article in rows]
+
+    if 0 < limit < len(rows):
+        response.headers["X-Next-Cursor"] = encode_cursor(*keys[limit - 1])
+    return rows[:limit]
+
+
+def _parse_fields(fields: str) -> List[str]:
+    selected = ["id"]
+    for name in (f.strip() for f in fields.split(",")):
+        if not name or name in selected:
+            continue
+        if name not in ArticleResponse.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        selected.append(name)
+    return selected
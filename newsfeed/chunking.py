@@ -0,0 +1,36 @@
+from typing import List
+
+
+class PassageSplitter:
+    """
+    Splits article text into overlapping windows of whole words, so long
+    articles are embedded in full instead of being cut off at the embedding
+    model's input limit (256 word pieces for all-MiniLM-L6-v2, roughly 180
+    English words).
+    """
+
+    def __init__(
+        self, max_words: int = 160, overlap_words: int = 32, max_passages: int = 32
+    ):
+        if max_words <= 0:
+            raise ValueError("max_words must be positive")
+        if not 0 <= overlap_words < max_words:
+            raise ValueError("overlap_words must be between 0 and max_words")
+        self.max_words = max_words
+        self.overlap_words = overlap_words
+        # Bounds the encoding cost of very long articles, the tail is dropped
+        self.max_passages = max_passages
+
+    def split(self, text: str) -> List[str]:
+        words = text.split()
+        if len(words) <= self.max_words:
+            return [" ".join(words)]
+
+        stride = self.max_words - self.overlap_words
+        passages = []
+        for start in range(0, len(words), stride):
+            passages.append(" ".join(words[start : start + self.max_words]))
+            end_reached = start + self.max_words >= len(words)
+            if end_reached or len(passages) == self.max_passages:
+                break
+        return passages
@@ -1,32 +1,108 @@
+import asyncio
+import hashlib
+import json
 import logging
 import os
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-import google.generativeai as genai
-from newsfeed.models import NewsCategory
+import numpy as np
+
+from newsfeed.embedding import NewsEmbedder
+from newsfeed.models import LOCAL_CATEGORY_SOURCE, NewsCategory
+from newsfeed.storage.classification.base import ClassificationCache
 
 logger = logging.getLogger(__name__)
 
+# Rough characters-per-token ratio used to turn token budgets into text lengths
+CHARS_PER_TOKEN = 4
+
 
 class NewsClassifier(ABC):
     """Abstract base class for news classifiers."""
 
+    # Classifiers working from article embeddings set this so that callers
+    # pass the vectors they already computed to classify_batch
+    uses_embeddings: bool = False
+    # Recorded with every category this classifier assigns, so that labels of
+    # the local classifier are never used to train it again
+    label_source: str = "model"
+
     @abstractmethod
     async def classify(self, text: str) -> NewsCategory:
         """Classifies the given text into a NewsCategory."""
         pass
 
+    async def classify_batch(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[NewsCategory]:
+        """
+        Classifies several texts, returning one category per text in order.
+        Subclasses that can classify several texts in one request should override this.
+        """
+        return list(await asyncio.gather(*(self.classify(text) for text in texts)))
+
+    async def classify_batch_with_sources(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[Tuple[NewsCategory, str]]:
+        """Like classify_batch, pairing each category with its label source."""
+        if embeddings is None:
+            categories = await self.classify_batch(texts)
+        else:
+            categories = await self.classify_batch(texts, embeddings=embeddings)
+        return [(category, self.label_source) for category in categories]
+
+    def fit(self, samples: Sequence[Tuple[NewsCategory, Sequence[float]]]) -> None:
+        """Trains the classifier from labeled embeddings, if it learns from them."""
+
 
 class GeminiNewsClassifier(NewsClassifier):
     """
     Classifier implementation using Google's Gemini Flash model.
     Requires GOOGLE_API_KEY environment variable.
+    A pre-built `model` (anything exposing `generate_content_async`) can be
+    injected instead, e.g. a local fake for tests.
     """
 
+    # Bump whenever the prompts change so cached classifications are not reused
+    prompt_version = "1"
+    label_source = "gemini"
+
     def __init__(
-        self, api_key: Optional[str] = None, model_name: str = "gemini-2.0-flash"
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = "gemini-2.0-flash",
+        batch_size: int = 10,
+        token_budget: int = 8000,
+        model: Optional[Any] = None,
     ):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.token_budget = token_budget
+
+        if model is not None:
+            self.model = model
+        else:
+            self.model = self._create_model(api_key, model_name)
+
+        # Construct the prompt with valid categories
+        self.valid_categories = [c.value for c in NewsCategory]
+        self.prompt_template = (
+            "You are a tech news classifier. Classify the following news article text "
+            "into exactly one of these categories: {categories}.\n"
+            "Return ONLY the category name, nothing else.\n\n"
+            "Article Text:\n{text}"
+        )
+        self.batch_prompt_template = (
+            "You are a tech news classifier. Classify each of the following {count} "
+            "news articles into exactly one of these categories: {categories}.\n"
+            "Return ONLY a JSON array of {count} category names, one per article, "
+            "in the same order as the articles, nothing else.\n\n"
+            "{articles}"
+        )
+
+    @staticmethod
+    def _create_model(api_key: Optional[str], model_name: str):
         key = api_key
 
         # Try to get from settings if not provided
@@ -44,17 +120,20 @@ class GeminiNewsClassifier(NewsClassifier):
         if not key:
             raise ValueError("GEMINI_API_KEY is required for GeminiNewsClassifier")
 
+        import google.generativeai as genai
+
         genai.configure(api_key=key)
-        self.model = genai.GenerativeModel(model_name)
+        return genai.GenerativeModel(model_name)
 
-        # Construct the prompt with valid categories
-        self.valid_categories = [c.value for c in NewsCategory]
-        self.prompt_template = (
-            "You are a tech news classifier. Classify the following news article text "
-            "into exactly one of these categories: {categories}.\n"
-            "Return ONLY the category name, nothing else.\n\n"
-            "Article Text:\n{text}"
-        )
+    @staticmethod
+    def _match_category(result: Any) -> Optional[NewsCategory]:
+        # We iterate to match case-insensitively or exact match
+        if not isinstance(result, str):
+            return None
+        for category in NewsCategory:
+            if category.value.lower() == result.strip().lower():
+                return category
+        return None
 
     async def classify(self, text: str) -> NewsCategory:
         # Truncate text if too long to save tokens/avoid limits
@@ -70,11 +149,10 @@ class GeminiNewsClassifier(NewsClassifier):
             result = response.text.strip()
 
             # Map string back to Enum
-            # We iterate to match case-insensitively or exact match
-            for category in NewsCategory:
-                if category.value.lower() == result.lower():
-                    logger.debug(f"Classified article as: {category.value}")
-                    return category
+            category = self._match_category(result)
+            if category:
+                logger.debug(f"Classified article as: {category.value}")
+                return category
 
             # Fallback for unexpected LLM output
             logger.warning(
@@ -85,3 +163,319 @@ class GeminiNewsClassifier(NewsClassifier):
         except Exception as e:
             logger.error(f"Classification error: {e}")
             return NewsCategory.OTHER
+
+    async def classify_batch(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[NewsCategory]:
+        chunks = [
+            texts[start : start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        results = await asyncio.gather(*(self._classify_chunk(c) for c in chunks))
+        return [category for chunk in results for category in chunk]
+
+    def _build_batch_prompt(self, texts: List[str]) -> str:
+        # Split the token budget evenly, never exceeding the single-article limit
+        per_article = min(10000, self.token_budget * CHARS_PER_TOKEN // len(texts))
+        articles = "\n\n".join(
+            f"Article {i}:\n{text[:per_article]}" for i, text in enumerate(texts, 1)
+        )
+        return self.batch_prompt_template.format(
+            count=len(texts),
+            categories=", ".join(self.valid_categories),
+            articles=articles,
+        )
+
+    @staticmethod
+    def _parse_batch_response(text: str, count: int) -> List[Any]:
+        # Tolerate markdown code fences or text around the JSON array
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end < start:
+            raise ValueError("no JSON array in response")
+        parsed = json.loads(text[start : end + 1])
+        if not isinstance(parsed, list):
+            raise ValueError("response is not a JSON array")
+        # With an entry dropped or added, the positions no longer say which
+        # article each category belongs to
+        if len(parsed) != count:
+            raise ValueError(f"expected {count} categories, got {len(parsed)}")
+        return parsed
+
+    async def _classify_chunk(self, texts: List[str]) -> List[NewsCategory]:
+        if len(texts) == 1:
+            return [await self.classify(texts[0])]
+
+        try:
+            response = await self.model.generate_content_async(
+                self._build_batch_prompt(texts)
+            )
+            parsed = self._parse_batch_response(response.text, len(texts))
+        except Exception as e:
+            logger.warning(
+                f"Batch classification of {len(texts)} articles failed: {e}. "
+                "Falling back to per-article requests."
+            )
+            parsed = [None] * len(texts)
+
+        categories: List[Optional[NewsCategory]] = [
+            self._match_category(entry) if entry is not None else None
+            for entry in parsed
+        ]
+
+        # Only entries that could not be parsed are classified individually
+        retry = [i for i, category in enumerate(categories) if category is None]
+        if retry:
+            logger.debug(f"Re-classifying {len(retry)} articles individually")
+            fallback = await asyncio.gather(*(self.classify(texts[i]) for i in retry))
+            for i, category in zip(retry, fallback):
+                categories[i] = category
+
+        logger.debug(f"Classified batch of {len(texts)} articles")
+        return categories
+
+
+class CachedNewsClassifier(NewsClassifier):
+    """
+    Wraps another classifier with a persistent cache keyed by a hash of the
+    normalized article text, the model name and the prompt version, so
+    syndicated or cross-posted content is only sent to the model once.
+    """
+
+    def __init__(self, classifier: NewsClassifier, cache: ClassificationCache):
+        self.classifier = classifier
+        self.cache = cache
+        model_name = getattr(classifier, "model_name", type(classifier).__name__)
+        prompt_version = getattr(classifier, "prompt_version", "")
+        self.namespace = f"{model_name}:{prompt_version}"
+        # Cached categories were all assigned by the wrapped classifier
+        self.label_source = classifier.label_source
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def cache_key(self, text: str) -> str:
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha256(f"{self.namespace}\n{normalized}".encode()).hexdigest()
+
+    async def classify(self, text: str) -> NewsCategory:
+        return (await self.classify_batch([text]))[0]
+
+    async def classify_batch(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[NewsCategory]:
+        keys = [self.cache_key(text) for text in texts]
+        try:
+            cached = await self.cache.get_many(list(set(keys)))
+        except Exception as e:
+            logger.warning(f"Classification cache lookup failed: {e}")
+            cached = {}
+
+        # Classify each distinct uncached text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        logger.debug(
+            f"Classification cache: {len(texts) - len(missing)} hits, "
+            f"{len(missing)} misses"
+        )
+
+        if missing:
+            fresh = await self.classifier.classify_batch(list(missing.values()))
+            results = dict(zip(missing.keys(), fresh))
+            cached.update(results)
+            # OTHER doubles as the fallback on classifier errors, so it is not
+            # cached to avoid pinning transient failures
+            to_store = {
+                key: category
+                for key, category in results.items()
+                if category != NewsCategory.OTHER
+            }
+            try:
+                await self.cache.put_many(to_store)
+            except Exception as e:
+                logger.warning(f"Failed to store classifications in cache: {e}")
+
+        return [cached[key] for key in keys]
+
+
+class CentroidNewsClassifier(NewsClassifier):
+    """
+    Local classifier that assigns the category whose centroid (the mean of
+    the normalized embeddings of already labeled articles) is most similar to
+    the article embedding. Confidence is the softmax probability of that
+    category over the centroid similarities.
+
+    Until every category has `min_samples` labeled articles the confidence
+    is 0: the best of a few centroids would otherwise look certain (its
+    probability is at least 1 / fitted categories) while the true category
+    is not among them.
+    """
+
+    uses_embeddings = True
+    model_name = "centroid"
+    label_source = LOCAL_CATEGORY_SOURCE
+
+    def __init__(
+        self,
+        embedder: NewsEmbedder,
+        min_samples: int = 5,
+        temperature: float = 0.05,
+    ):
+        self.embedder = embedder
+        self.min_samples = min_samples
+        self.temperature = temperature
+        self.categories: List[NewsCategory] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether every category has a centroid."""
+        return len(self.categories) == len(NewsCategory)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def fit(self, samples: Sequence[Tuple[NewsCategory, Sequence[float]]]) -> None:
+        by_category: Dict[NewsCategory, List[Sequence[float]]] = {}
+        for category, embedding in samples:
+            by_category.setdefault(NewsCategory(category), []).append(embedding)
+
+        categories, centroids = [], []
+        for category, vectors in by_category.items():
+            if len(vectors) < self.min_samples:
+                continue
+            matrix = self._normalize(np.asarray(vectors, dtype=np.float32))
+            categories.append(category)
+            centroids.append(matrix.mean(axis=0))
+
+        if not categories:
+            logger.info("Not enough labeled articles to fit the local classifier")
+            self.categories, self.centroids = [], None
+            return
+
+        self.categories = categories
+        self.centroids = self._normalize(np.stack(centroids))
+        logger.info(
+            f"Fitted local classifier on {len(samples)} articles "
+            f"({len(categories)} of {len(NewsCategory)} categories)"
+        )
+        if not self.is_complete:
+            logger.info("Local predictions have no confidence until all are fitted")
+
+    def predict(self, embeddings: Sequence[Any]) -> List[Tuple[NewsCategory, float]]:
+        """Returns (category, confidence) for each embedding."""
+        if self.centroids is None:
+            return [(NewsCategory.OTHER, 0.0)] * len(embeddings)
+        if len(embeddings) == 0:
+            return []
+
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        similarities = vectors @ self.centroids.T
+        logits = similarities / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        best = probabilities.argmax(axis=1)
+        if not self.is_complete:
+            return [(self.categories[b], 0.0) for b in best]
+        return [
+            (self.categories[b], float(probabilities[i, b])) for i, b in enumerate(best)
+        ]
+
+    async def embeddings_for(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]]
+    ) -> Sequence[Any]:
+        """Returns the given embeddings, computing them when not provided."""
+        if embeddings is not None:
+            return embeddings
+        return await asyncio.to_thread(self.embedder.embed_batch, texts)
+
+    async def classify(self, text: str) -> NewsCategory:
+        return (await self.classify_batch([text]))[0]
+
+    async def classify_batch(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[NewsCategory]:
+        vectors = await self.embeddings_for(texts, embeddings)
+        return [category for category, _ in self.predict(vectors)]
+
+
+class HybridNewsClassifier(NewsClassifier):
+    """
+    Classifies locally from embeddings and only asks the fallback classifier
+    (typically Gemini) about articles where the local confidence is low.
+    """
+
+    uses_embeddings = True
+
+    def __init__(
+        self,
+        local: CentroidNewsClassifier,
+        fallback: NewsClassifier,
+        confidence_threshold: float = 0.5,
+    ):
+        self.local = local
+        self.fallback = fallback
+        self.confidence_threshold = confidence_threshold
+        self.local_count = 0
+        self.fallback_count = 0
+
+    def fit(self, samples: Sequence[Tuple[NewsCategory, Sequence[float]]]) -> None:
+        self.local.fit(samples)
+
+    async def classify(self, text: str) -> NewsCategory:
+        return (await self.classify_batch([text]))[0]
+
+    async def classify_batch(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[NewsCategory]:
+        labeled = await self.classify_batch_with_sources(texts, embeddings)
+        return [category for category, _ in labeled]
+
+    async def classify_batch_with_sources(
+        self, texts: List[str], embeddings: Optional[Sequence[Any]] = None
+    ) -> List[Tuple[NewsCategory, str]]:
+        vectors = await self.local.embeddings_for(texts, embeddings)
+        predictions = self.local.predict(vectors)
+
+        labeled = [(category, self.local.label_source) for category, _ in predictions]
+        uncertain = [
+            i
+            for i, (_, confidence) in enumerate(predictions)
+            if confidence < self.confidence_threshold
+        ]
+
+        self.local_count += len(texts) - len(uncertain)
+        self.fallback_count += len(uncertain)
+        logger.debug(
+            f"Hybrid classification: {len(texts) - len(uncertain)} local, "
+            f"{len(uncertain)} sent to fallback"
+        )
+
+        if uncertain:
+            fallback = await self.fallback.classify_batch_with_sources(
+                [texts[i] for i in uncertain]
+            )
+            for i, label in zip(uncertain, fallback):
+                labeled[i] = label
+
+        return labeled
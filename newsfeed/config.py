@@ -7,11 +7,96 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///newsfeed.db"
+    # SQLite connection tuning (ignored for other databases)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Read-only connections for API queries, separate from the single writer
+    # (0 shares one pool for reads and writes)
+    SQLITE_READ_POOL_SIZE: int = 4
+    # Vector search backend: "chroma", or "numpy" for an in-process
+    # brute-force index over a memory-mapped matrix stored in NUMPY_INDEX_PATH
+    VECTOR_INDEX_BACKEND: str = "chroma"
     CHROMADB_PATH: str = "./chroma_data"
+    NUMPY_INDEX_PATH: str = "./numpy_index"
     FETCH_INTERVAL_MINUTES: int = 15
+    # Maximum number of sources fetched at the same time
+    INGESTION_CONCURRENCY: int = 4
+    # Per-source fetch timeout, a slow feed is skipped for the current cycle
+    FETCH_TIMEOUT_SECONDS: float = 60.0
+    # Shared HTTP client used by all fetchers (HTTP/2 needs the 'h2' package)
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP2_ENABLED: bool = False
+    # Minimum delay between two requests to the same host
+    HTTP_MIN_HOST_INTERVAL_SECONDS: float = 1.0
+    # Feed parsing and HTML cleanup run off the event loop in a "thread" or
+    # "process" pool with PARSER_WORKERS workers
+    PARSER_EXECUTOR: str = "thread"
+    PARSER_WORKERS: int = 2
+    # HTML to text conversion for article content: "streaming" tokenizer based
+    # fast path, or "bs4" to build a full BeautifulSoup tree
+    HTML_EXTRACTOR: str = "streaming"
+    # Links remembered per source to skip already ingested feed entries
+    WATERMARK_RECENT_LINKS: int = 1000
     LOG_LEVEL: str = "INFO"
 
+    # Number of stored article URLs kept in memory for dedup (0 disables)
+    KNOWN_URL_CACHE_SIZE: int = 10000
+
+    # Embedding micro-batching: requests are gathered for up to
+    # EMBEDDING_BATCH_WAIT_MS or until EMBEDDING_BATCH_SIZE texts are pending
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0
+    # Embedding runtime: "sentence-transformers" (PyTorch), or "onnx" to run
+    # the model exported to ONNX_MODEL_DIR with ONNX Runtime, int8 quantized
+    # with ONNX_QUANTIZE (needs the 'onnxruntime' and 'onnx' packages).
+    # ONNX_THREADS of 0 uses one thread per physical core
+    EMBEDDER_BACKEND: str = "sentence-transformers"
+    ONNX_MODEL_DIR: str = "./onnx_models"
+    ONNX_THREADS: int = 0
+    ONNX_QUANTIZE: bool = True
+    # Articles are split into passages of CHUNK_MAX_WORDS words overlapping
+    # by CHUNK_OVERLAP_WORDS, each indexed as its own vector (0 embeds and
+    # indexes whole articles, which the model truncates)
+    CHUNK_MAX_WORDS: int = 160
+    CHUNK_OVERLAP_WORDS: int = 32
+    CHUNK_MAX_PASSAGES: int = 32
+
+    # New articles join the story of the closest article published within
+    # STORY_WINDOW_HOURS whose embedding is at most STORY_MAX_DISTANCE away
+    # (2 - 2 * cosine, 0.3 is a cosine similarity of 0.85), and with
+    # STORY_REUSE_CATEGORY take its category instead of being classified.
+    # `collapse=story` returns one article per story. 0 disables clustering
+    STORY_MAX_DISTANCE: float = 0.3
+    STORY_WINDOW_HOURS: float = 48
+    STORY_REUSE_CATEGORY: bool = True
+
+    # In-memory LRU caches for search: query embeddings, and complete search
+    # results (cleared whenever articles are indexed). A size of 0 disables
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = 3600
+    SEARCH_RESULT_CACHE_SIZE: int = 0
+    SEARCH_RESULT_CACHE_TTL_SECONDS: float = 60
+
     GEMINI_API_KEY: Optional[SecretStr] = None
+    # Articles packed into one classification request, and the approximate
+    # token budget for all article text in that request
+    CLASSIFICATION_BATCH_SIZE: int = 10
+    CLASSIFICATION_TOKEN_BUDGET: int = 8000
+    # "gemini", "local" (nearest-centroid on embeddings) or "hybrid" (local,
+    # falling back to Gemini below LOCAL_CLASSIFIER_CONFIDENCE_THRESHOLD)
+    CLASSIFIER_MODE: str = "gemini"
+    LOCAL_CLASSIFIER_CONFIDENCE_THRESHOLD: float = 0.5
+    # Minimum labeled articles per category and how many recent ones to train on
+    LOCAL_CLASSIFIER_MIN_SAMPLES: int = 5
+    LOCAL_CLASSIFIER_TRAINING_LIMIT: int = 5000
+    # Persistent cache of classifications keyed by normalized content hash
+    CLASSIFICATION_CACHE_ENABLED: bool = True
+    CLASSIFICATION_CACHE_TTL_HOURS: float = 720
+    CLASSIFICATION_CACHE_MAX_ENTRIES: int = 50000
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -1,39 +1,230 @@
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from functools import lru_cache
 
-from newsfeed.classification import GeminiNewsClassifier
+from newsfeed.cache import TTLCache
+from newsfeed.chunking import PassageSplitter
+from newsfeed.classification import (
+    CachedNewsClassifier,
+    CentroidNewsClassifier,
+    GeminiNewsClassifier,
+    HybridNewsClassifier,
+    NewsClassifier,
+)
 from newsfeed.config import get_settings
-from newsfeed.embedding import SentenceTransformerEmbedder
+from newsfeed.http_client import FeedHttpClient
+from newsfeed.embedding import (
+    EmbeddingBatcher,
+    NewsEmbedder,
+    OnnxEmbedder,
+    SentenceTransformerEmbedder,
+)
 from newsfeed.services.news_service import NewsService
-from newsfeed.storage import SQLArticleRepository, ChromaVectorIndex
+from newsfeed.stories import StoryClustering
+from newsfeed.storage import (
+    SQLArticleRepository,
+    ChromaVectorIndex,
+    NumpyVectorIndex,
+    SQLClassificationCache,
+    SQLiteProfile,
+    VectorIndex,
+)
+from newsfeed.warmup import Warmup
+from newsfeed.watermarks import WatermarkStore
+
+logger = logging.getLogger(__name__)
 
 
 @lru_cache
 def get_repository() -> SQLArticleRepository:
     settings = get_settings()
-    return SQLArticleRepository(settings.DATABASE_URL)
+    return SQLArticleRepository(
+        settings.DATABASE_URL,
+        known_url_cache_size=settings.KNOWN_URL_CACHE_SIZE,
+        sqlite_profile=SQLiteProfile(
+            journal_mode=settings.SQLITE_JOURNAL_MODE,
+            synchronous=settings.SQLITE_SYNCHRONOUS,
+            cache_size_kb=settings.SQLITE_CACHE_SIZE_KB,
+            mmap_size_mb=settings.SQLITE_MMAP_SIZE_MB,
+            busy_timeout_ms=settings.SQLITE_BUSY_TIMEOUT_MS,
+        ),
+        read_pool_size=settings.SQLITE_READ_POOL_SIZE,
+    )
+
+
+@lru_cache
+def get_feed_http_client() -> FeedHttpClient:
+    settings = get_settings()
+    return FeedHttpClient(
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        http2=settings.HTTP2_ENABLED,
+        min_host_interval=settings.HTTP_MIN_HOST_INTERVAL_SECONDS,
+    )
+
+
+@lru_cache
+def get_parser_executor() -> Executor:
+    settings = get_settings()
+    kind = settings.PARSER_EXECUTOR.lower()
+    if kind == "process":
+        # Spawn keeps workers free of the parent's threads (model, event loop)
+        return ProcessPoolExecutor(
+            max_workers=settings.PARSER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    if kind == "thread":
+        return ThreadPoolExecutor(
+            max_workers=settings.PARSER_WORKERS, thread_name_prefix="feed-parser"
+        )
+    raise ValueError(f"Unknown PARSER_EXECUTOR: {settings.PARSER_EXECUTOR}")
+
+
+@lru_cache
+def get_watermark_store() -> WatermarkStore:
+    settings = get_settings()
+    return WatermarkStore(max_links=settings.WATERMARK_RECENT_LINKS)
+
+
+@lru_cache
+def get_vector_index() -> VectorIndex:
+    settings = get_settings()
+    backend = settings.VECTOR_INDEX_BACKEND.lower()
+    if backend == "chroma":
+        return ChromaVectorIndex(settings.CHROMADB_PATH)
+    if backend == "numpy":
+        return NumpyVectorIndex(settings.NUMPY_INDEX_PATH)
+    raise ValueError(f"Unknown VECTOR_INDEX_BACKEND: {settings.VECTOR_INDEX_BACKEND}")
+
+
+@lru_cache
+def get_embedder() -> NewsEmbedder:
+    settings = get_settings()
+    backend = settings.EMBEDDER_BACKEND.lower()
+    if backend == "onnx":
+        try:
+            return OnnxEmbedder(
+                model_dir=settings.ONNX_MODEL_DIR,
+                threads=settings.ONNX_THREADS,
+                quantize=settings.ONNX_QUANTIZE,
+                batch_size=settings.EMBEDDING_BATCH_SIZE,
+            )
+        except ImportError as e:
+            # Same model and vector space, only slower
+            logger.warning(
+                f"ONNX embedder unavailable ({e}), using sentence-transformers"
+            )
+    elif backend != "sentence-transformers":
+        raise ValueError(f"Unknown EMBEDDER_BACKEND: {settings.EMBEDDER_BACKEND}")
+    return SentenceTransformerEmbedder(batch_size=settings.EMBEDDING_BATCH_SIZE)
 
 
 @lru_cache
-def get_vector_index() -> ChromaVectorIndex:
+def get_embedding_batcher() -> EmbeddingBatcher:
     settings = get_settings()
-    return ChromaVectorIndex(settings.CHROMADB_PATH)
+    return EmbeddingBatcher(
+        get_embedder(),
+        max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+    )
 
 
 @lru_cache
-def get_embedder() -> SentenceTransformerEmbedder:
-    return SentenceTransformerEmbedder()
+def get_classification_cache() -> SQLClassificationCache:
+    settings = get_settings()
+    return SQLClassificationCache(
+        get_repository().engine,
+        ttl_hours=settings.CLASSIFICATION_CACHE_TTL_HOURS,
+        max_entries=settings.CLASSIFICATION_CACHE_MAX_ENTRIES,
+    )
+
+
+def _get_gemini_classifier() -> NewsClassifier:
+    settings = get_settings()
+    classifier: NewsClassifier = GeminiNewsClassifier(
+        batch_size=settings.CLASSIFICATION_BATCH_SIZE,
+        token_budget=settings.CLASSIFICATION_TOKEN_BUDGET,
+    )
+    if settings.CLASSIFICATION_CACHE_ENABLED:
+        classifier = CachedNewsClassifier(classifier, get_classification_cache())
+    return classifier
 
 
 @lru_cache
-def get_classifier() -> GeminiNewsClassifier:
-    return GeminiNewsClassifier()
+def get_classifier() -> NewsClassifier:
+    settings = get_settings()
+    mode = settings.CLASSIFIER_MODE.lower()
+    if mode == "gemini":
+        return _get_gemini_classifier()
+
+    local = CentroidNewsClassifier(
+        get_embedder(), min_samples=settings.LOCAL_CLASSIFIER_MIN_SAMPLES
+    )
+    if mode == "local":
+        return local
+    if mode == "hybrid":
+        return HybridNewsClassifier(
+            local,
+            _get_gemini_classifier(),
+            confidence_threshold=settings.LOCAL_CLASSIFIER_CONFIDENCE_THRESHOLD,
+        )
+    raise ValueError(f"Unknown CLASSIFIER_MODE: {settings.CLASSIFIER_MODE}")
 
 
 @lru_cache
 def get_news_service() -> NewsService:
+    settings = get_settings()
+    splitter = None
+    if settings.CHUNK_MAX_WORDS > 0:
+        splitter = PassageSplitter(
+            max_words=settings.CHUNK_MAX_WORDS,
+            overlap_words=settings.CHUNK_OVERLAP_WORDS,
+            max_passages=settings.CHUNK_MAX_PASSAGES,
+        )
+    stories = None
+    if settings.STORY_MAX_DISTANCE > 0:
+        stories = StoryClustering(
+            max_distance=settings.STORY_MAX_DISTANCE,
+            window_hours=settings.STORY_WINDOW_HOURS,
+            reuse_category=settings.STORY_REUSE_CATEGORY,
+        )
+    query_cache = result_cache = None
+    if settings.QUERY_EMBEDDING_CACHE_SIZE > 0:
+        query_cache = TTLCache(
+            max_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+            ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        )
+    if settings.SEARCH_RESULT_CACHE_SIZE > 0:
+        result_cache = TTLCache(
+            max_size=settings.SEARCH_RESULT_CACHE_SIZE,
+            ttl_seconds=settings.SEARCH_RESULT_CACHE_TTL_SECONDS,
+        )
     return NewsService(
         repository=get_repository(),
         index=get_vector_index(),
         classifier=get_classifier(),
         embedder=get_embedder(),
+        batcher=get_embedding_batcher(),
+        query_cache=query_cache,
+        result_cache=result_cache,
+        splitter=splitter,
+        stories=stories,
+    )
+
+
+def _warm_embedder() -> None:
+    # A first forward pass also pays the one-off allocations of inference
+    get_embedder().embed_batch(["warm up"])
+
+
+@lru_cache
+def get_warmup() -> Warmup:
+    return Warmup(
+        {
+            "embedder": _warm_embedder,
+            "vector_index": get_vector_index,
+            "classifier": get_classifier,
+            "news_service": get_news_service,
+        }
     )
@@ -1,7 +1,14 @@
+import asyncio
 from abc import ABC, abstractmethod
+import json
 import logging
-from typing import List
-from sentence_transformers import SentenceTransformer
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
@@ -16,15 +23,28 @@ class NewsEmbedder(ABC):
         """Generates a vector embedding for the given text."""
         pass
 
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Generates embeddings for several texts at once.
+        Returns a float32 array of shape (len(texts), dim).
+        Subclasses backed by a model with native batching should override this.
+        """
+        return np.asarray([self.embed(text) for text in texts], dtype=np.float32)
+
 
 class SentenceTransformerEmbedder(NewsEmbedder):
     """
     Concrete implementation using local SentenceTransformer models.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 32):
+        # Imported here, PyTorch alone takes seconds to import
+        from sentence_transformers import SentenceTransformer
+
         # This will download the model on first use (approx 80MB)
         logger.info(f"Loading SentenceTransformer model: {model_name}")
+        self.model_name = model_name
+        self.batch_size = batch_size
         try:
             self.model = SentenceTransformer(model_name)
             logger.debug("SentenceTransformer model loaded successfully.")
@@ -40,3 +60,295 @@ class SentenceTransformerEmbedder(NewsEmbedder):
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        try:
+            return self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {e}")
+            raise
+
+
+CONFIG_FILE = "embedder.json"
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_int8.onnx"
+# Sentences the quantized model is checked against at export time
+REFERENCE_TEXTS = [
+    "The central bank raised interest rates by a quarter point on Tuesday.",
+    "A new open-source language model tops the coding benchmarks.",
+    "Researchers patched a critical vulnerability in the VPN appliance.",
+    "The striker scored twice as the home side won the cup final.",
+    "Heavy rain is expected across the north of the country this weekend.",
+]
+# Below this cosine similarity to the PyTorch embeddings, the int8 model is
+# discarded in favour of the float32 export
+MIN_QUANTIZED_COSINE = 0.99
+
+
+def mean_pool(
+    hidden_states: np.ndarray, attention_mask: np.ndarray, normalize: bool = True
+) -> np.ndarray:
+    """
+    Averages token embeddings over the non-padding positions, as the
+    SentenceTransformer pooling layer does, optionally L2-normalizing.
+    """
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (hidden_states * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        pooled = pooled / np.clip(norms, 1e-12, None)
+    return pooled.astype(np.float32)
+
+
+class OnnxEmbedder(NewsEmbedder):
+    """
+    Runs a SentenceTransformer model with ONNX Runtime on the CPU.
+
+    On first use the transformer is exported to `model_dir` from the
+    SentenceTransformer checkpoint, along with a copy whose weights are
+    dynamically quantized to int8. With `quantize` the int8 model is used if
+    its embeddings of REFERENCE_TEXTS stay within MIN_QUANTIZED_COSINE of the
+    PyTorch ones. Later starts load the exported files without PyTorch.
+
+    Requires the 'onnxruntime' package, and 'onnx' for the export.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        model_dir: str = "./onnx_models",
+        threads: int = 0,
+        quantize: bool = True,
+        batch_size: int = 32,
+    ):
+        # Fail before a slow export when the runtime is missing
+        import onnxruntime  # noqa: F401
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.path = Path(model_dir) / model_name.replace("/", "__")
+        config_path = self.path / CONFIG_FILE
+        if not config_path.exists():
+            self._export()
+        config = json.loads(config_path.read_text())
+        self.max_length = config["max_length"]
+        self.normalize = config["normalize"]
+        model_file = config["model_file"] if quantize else FP32_MODEL_FILE
+
+        logger.info(f"Loading ONNX model: {self.path / model_file}")
+        self.session = self._session(self.path / model_file, threads)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.path)
+
+    @staticmethod
+    def _session(model_path: Path, threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        # 0 lets ONNX Runtime use one thread per physical core
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+
+    def _export(self) -> None:
+        import torch
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.models import Normalize, Pooling
+
+        logger.info(f"Exporting {self.model_name} to ONNX in {self.path}")
+        model = SentenceTransformer(self.model_name, device="cpu")
+        pooling = next(m for m in model if isinstance(m, Pooling))
+        # sentence-transformers 6 stores the mode, 5 derives it from flags
+        mode = getattr(pooling, "pooling_mode", None) or pooling.get_pooling_mode_str()
+        if mode != "mean":
+            raise ValueError(
+                f"Only mean pooling is supported, {self.model_name} uses {mode}"
+            )
+
+        class HiddenStates(torch.nn.Module):
+            """Plain positional signature and a single output for the export."""
+
+            def __init__(self, auto_model):
+                super().__init__()
+                self.auto_model = auto_model
+
+            def forward(self, *inputs):
+                kwargs = dict(zip(input_names, inputs))
+                return self.auto_model(**kwargs, return_dict=True).last_hidden_state
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        model.tokenizer.save_pretrained(self.path)
+        sample = model.tokenizer(REFERENCE_TEXTS[:2], padding=True, return_tensors="pt")
+        input_names = [
+            name
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in sample
+        ]
+        transformer = HiddenStates(model[0].auto_model.eval())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                str(self.path / FP32_MODEL_FILE),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                dynamo=False,
+            )
+
+        self.max_length = model.max_seq_length
+        self.normalize = any(isinstance(m, Normalize) for m in model)
+        model_file = self._quantize(model)
+        config = {
+            "max_length": self.max_length,
+            "normalize": self.normalize,
+            "model_file": model_file,
+        }
+        (self.path / CONFIG_FILE).write_text(json.dumps(config))
+
+    def _quantize(self, model: "SentenceTransformer") -> str:
+        """Writes the int8 model, returns the model file to use when quantizing."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            str(self.path / FP32_MODEL_FILE),
+            str(self.path / INT8_MODEL_FILE),
+            weight_type=QuantType.QInt8,
+        )
+        self.tokenizer = model.tokenizer
+        self.session = self._session(self.path / INT8_MODEL_FILE, threads=0)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        expected = model.encode(REFERENCE_TEXTS, convert_to_numpy=True)
+        cosine = self._min_cosine(self.embed_batch(REFERENCE_TEXTS), expected)
+        if cosine < MIN_QUANTIZED_COSINE:
+            logger.warning(
+                f"Quantized {self.model_name} drifts from PyTorch (cosine "
+                f"{cosine:.4f}), using the float32 ONNX model"
+            )
+            return FP32_MODEL_FILE
+        logger.info(f"Quantized {self.model_name}, cosine to PyTorch {cosine:.4f}")
+        return INT8_MODEL_FILE
+
+    @staticmethod
+    def _min_cosine(a: np.ndarray, b: np.ndarray) -> float:
+        a = a / np.linalg.norm(a, axis=1, keepdims=True)
+        b = b / np.linalg.norm(b, axis=1, keepdims=True)
+        return float((a * b).sum(axis=1).min())
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0].tolist()
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # Batching texts of similar length keeps padding, and wasted work, low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[np.ndarray] = []
+        try:
+            for start in range(0, len(order), self.batch_size):
+                batch = [texts[i] for i in order[start : start + self.batch_size]]
+                encoded = self.tokenizer(
+                    batch,
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="np",
+                )
+                feed = {
+                    name: encoded[name].astype(np.int64) for name in self.input_names
+                }
+                (hidden_states,) = self.session.run(["last_hidden_state"], feed)
+                vectors.append(
+                    mean_pool(hidden_states, encoded["attention_mask"], self.normalize)
+                )
+        except Exception as e:
+            logger.error(f"Error generating ONNX embeddings: {e}")
+            raise
+
+        sorted_vectors = np.concatenate(vectors)
+        result = np.empty_like(sorted_vectors)
+        result[order] = sorted_vectors
+        return result
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into batched `embed_batch` calls.
+    Requests are collected for up to `max_wait_ms`, or until `max_batch_size`
+    texts are pending, and then encoded together in a worker thread.
+    A single consumer encodes one batch at a time, so concurrent batches never
+    compete for the model; requests arriving meanwhile form the next batch.
+    """
+
+    def __init__(
+        self,
+        embedder: NewsEmbedder,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        # Resolved when a full batch is pending, ending the consumer's wait
+        self._batch_full: Optional[asyncio.Future] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embeds a single text as part of the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            if self._batch_full is not None and not self._batch_full.done():
+                self._batch_full.set_result(None)
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.ensure_future(self._consume())
+
+        return await future
+
+    async def _consume(self) -> None:
+        # Only the first batch waits, later ones were collected during the
+        # previous encode
+        if len(self._pending) < self.max_batch_size:
+            self._batch_full = asyncio.get_running_loop().create_future()
+            await asyncio.wait([self._batch_full], timeout=self.max_wait)
+            self._batch_full = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        logger.debug(f"Embedding batch of {len(texts)} texts")
+        try:
+            vectors = await asyncio.to_thread(self.embedder.embed_batch, texts)
+            if len(vectors) != len(texts):
+                raise ValueError(
+                    f"Embedder returned {len(vectors)} vectors for {len(texts)} texts"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            # The caller may have been cancelled while the batch was running
+            if not future.done():
+                future.set_result(vector)
@@ -1,21 +1,107 @@
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import List, Any
+from typing import Callable, Dict, List, Any, Optional, TypeVar
 import logging
 
-from bs4 import BeautifulSoup
 import feedparser
 import httpx
 
+from newsfeed.config import get_settings
+from newsfeed.http_client import FeedHttpClient, FeedValidators
 from newsfeed.models import RawArticle
+from newsfeed.text_extraction import get_text_extractor
+from newsfeed.watermarks import SourceWatermark, WatermarkStore
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class NewsFetcher(ABC):
+    # Shared pooled client; when unset each fetch uses a one-off client
+    http: Optional[FeedHttpClient] = None
+    # Executor for feed parsing and HTML cleanup so they never block the event
+    # loop; when unset the loop's default thread pool is used
+    executor: Optional[Executor] = None
+    # Per-source high-water marks; entries already ingested are dropped before
+    # their content is extracted. When unset every entry is returned
+    watermarks: Optional[WatermarkStore] = None
+    # Whether the feed lists entries by publish date, so anything older than
+    # the newest ingested entry can be skipped. Otherwise only known links are
+    chronological: bool = True
+    # Validators of the last download, saved by `save_validators` once its
+    # articles are processed
+    validators: Optional[FeedValidators] = None
+    feed_url: str
+
     @abstractmethod
     async def fetch(self) -> List[RawArticle]:
-        """Fetches raw articles from the source."""
+        """
+        Fetches the source's articles that were not ingested before.
+        Returned as one list, which the scheduler processes as one batch.
+        """
+
+    def _watermark(self) -> Optional[SourceWatermark]:
+        if self.watermarks is None:
+            return None
+        return self.watermarks.get(self.feed_url)
+
+    def save_validators(self) -> None:
+        """
+        Makes the next fetch conditional on the last download.
+        Called once its articles are processed, so a crash in between does not
+        leave them behind a 304.
+        """
+        if self.http is not None:
+            self.http.save_validators(self.feed_url, self.validators)
+
+    async def _download(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        watermark: Optional[SourceWatermark] = None,
+    ) -> Optional[str]:
+        """
+        Downloads the feed body.
+        Returns None when the feed has not changed since the last fetch.
+        """
+        if self.http is not None:
+            # Articles awaiting a retry are only offered again by a full fetch
+            conditional = watermark is None or not watermark.pending_retry
+            response = await self.http.get_feed(
+                url, headers=headers, conditional=conditional
+            )
+            if response is None:
+                return None
+            self.validators = response.validators
+            return response.text
+
+        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+            return response.text
+
+    async def _run_parser(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Runs a parsing function in the executor.
+        With a process pool, `func` and its arguments must be picklable, so the
+        parsers are classmethods taking plain values rather than the fetcher.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    @classmethod
+    def _is_seen(
+        cls, watermark: Optional[SourceWatermark], entry: Any, time_struct: Any
+    ) -> bool:
+        if watermark is None:
+            return False
+        published = None
+        if cls.chronological and time_struct:
+            published = cls._parse_date(time_struct)
+        return watermark.is_seen(entry.link, published)
 
     @staticmethod
     def _parse_date(time_struct: Any) -> datetime:
@@ -45,8 +131,9 @@ class NewsFetcher(ABC):
 
     @staticmethod
     def _clean_html(html_content: str) -> str:
-        soup = BeautifulSoup(html_content, "html.parser")
-        return soup.get_text(separator="\n", strip=True)
+        # Resolved on each call, so parser worker processes honour the setting
+        extractor = get_text_extractor(get_settings().HTML_EXTRACTOR)
+        return extractor.extract(html_content)
 
     @staticmethod
     def _extract_tags(entry: Any) -> List[str]:
@@ -67,79 +154,137 @@ class NewsFetcher(ABC):
 
 
 class RSSFetcher(NewsFetcher):
-    def __init__(self, feed_url: str, source_name: str):
+    def __init__(
+        self,
+        feed_url: str,
+        source_name: str,
+        http: Optional[FeedHttpClient] = None,
+        executor: Optional[Executor] = None,
+        watermarks: Optional[WatermarkStore] = None,
+    ):
         self.feed_url = feed_url
         self.source_name = source_name
+        self.http = http
+        self.executor = executor
+        self.watermarks = watermarks
 
     async def fetch(self) -> List[RawArticle]:
         logger.debug(f"Fetching RSS feed for {self.source_name}: {self.feed_url}")
+        watermark = self._watermark()
         try:
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(self.feed_url)
-                response.raise_for_status()
-                feed = feedparser.parse(response.text)
+            text = await self._download(self.feed_url, watermark=watermark)
         except Exception as e:
             logger.error(f"Failed to fetch RSS feed {self.feed_url}: {e}")
             raise
 
+        if text is None:
+            logger.info(f"Feed unchanged since last fetch: {self.source_name}")
+            return []
+
+        articles = await self._run_parser(
+            self._parse_feed, text, self.source_name, watermark
+        )
+        logger.info(f"Fetched {len(articles)} new articles from {self.source_name}")
+        return articles
+
+    @classmethod
+    def _parse_feed(
+        cls,
+        text: str,
+        source_name: str,
+        watermark: Optional[SourceWatermark] = None,
+    ) -> List[RawArticle]:
+        feed = feedparser.parse(text)
+
         articles = []
         for entry in feed.entries:
             time_struct = entry.get("published_parsed") or entry.get("updated_parsed")
+            if cls._is_seen(watermark, entry, time_struct):
+                continue
             author = entry.get("author") or entry.get("dc:creator")
 
             articles.append(
                 RawArticle(
                     url=entry.link,
                     title=entry.title,
-                    content=self._extract_content(entry),
-                    source=self.source_name,
-                    published_at=self._parse_date(time_struct),
+                    content=cls._extract_content(entry),
+                    source=source_name,
+                    published_at=cls._parse_date(time_struct),
                     author=author,
-                    tags=self._extract_tags(entry),
-                    image_url=self._extract_image(entry),
+                    tags=cls._extract_tags(entry),
+                    image_url=cls._extract_image(entry),
                 )
             )
-
-        logger.info(f"Fetched {len(articles)} articles from {self.source_name}")
         return articles
 
 
 class RedditFetcher(NewsFetcher):
-    def __init__(self, subreddit: str):
+    # Listings are ranked by votes, older posts can appear at any time
+    chronological = False
+
+    def __init__(
+        self,
+        subreddit: str,
+        http: Optional[FeedHttpClient] = None,
+        executor: Optional[Executor] = None,
+        watermarks: Optional[WatermarkStore] = None,
+    ):
         self.subreddit = subreddit
         self.feed_url = f"https://www.reddit.com/r/{subreddit}/.rss"
+        self.http = http
+        self.executor = executor
+        self.watermarks = watermarks
 
     async def fetch(self) -> List[RawArticle]:
         logger.debug(f"Fetching Reddit feed for r/{self.subreddit}: {self.feed_url}")
+        watermark = self._watermark()
         try:
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                headers = {"User-Agent": "newsfeed-bot/1.0"}
-                response = await client.get(self.feed_url, headers=headers)
-                response.raise_for_status()
-                feed = feedparser.parse(response.text)
+            headers = {"User-Agent": "newsfeed-bot/1.0"}
+            text = await self._download(
+                self.feed_url, headers=headers, watermark=watermark
+            )
         except Exception as e:
             logger.error(f"Failed to fetch Reddit feed {self.feed_url}: {e}")
             raise
 
+        if text is None:
+            logger.info(f"Feed unchanged since last fetch: r/{self.subreddit}")
+            return []
+
+        articles = await self._run_parser(
+            self._parse_feed, text, self.subreddit, watermark
+        )
+        logger.info(f"Fetched {len(articles)} new articles from r/{self.subreddit}")
+        return articles
+
+    @classmethod
+    def _parse_feed(
+        cls,
+        text: str,
+        subreddit: str,
+        watermark: Optional[SourceWatermark] = None,
+    ) -> List[RawArticle]:
+        feed = feedparser.parse(text)
+
         articles = []
         for entry in feed.entries:
             time_struct = entry.get("published_parsed") or entry.get("updated_parsed")
-            author = entry.get("author") or self._extract_reddit_author(entry)
+            if cls._is_seen(watermark, entry, time_struct):
+                continue
+            author = entry.get("author") or cls._extract_reddit_author(entry)
 
             articles.append(
                 RawArticle(
                     url=entry.link,
                     title=entry.title,
-                    content=self._extract_content(entry),
-                    source=f"reddit/r/{self.subreddit}",
-                    published_at=self._parse_date(time_struct),
+                    content=cls._extract_content(entry),
+                    source=f"reddit/r/{subreddit}",
+                    published_at=cls._parse_date(time_struct),
                     author=author,
-                    tags=self._extract_tags(entry),
-                    image_url=self._extract_image(entry),
+                    tags=cls._extract_tags(entry),
+                    image_url=cls._extract_image(entry),
                 )
             )
-
-        logger.info(f"Fetched {len(articles)} articles from r/{self.subreddit}")
         return articles
 
     @staticmethod
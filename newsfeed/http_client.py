@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedValidators:
+    """HTTP cache validators returned by the last successful fetch of a feed."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class FeedResponse:
+    """Body of a changed feed and the validators to send on the next fetch."""
+
+    text: str
+    # None when the server sent neither an ETag nor a Last-Modified header
+    validators: Optional[FeedValidators] = None
+
+
+class HostRateLimiter:
+    """Enforces a minimum interval between consecutive requests to the same host."""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if self.min_interval <= 0:
+            return
+
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            last = self._last_request.get(host)
+            if last is not None:
+                delay = last + self.min_interval - time.monotonic()
+                if delay > 0:
+                    logger.debug(f"Rate limiting {host}: waiting {delay:.2f}s")
+                    await asyncio.sleep(delay)
+            self._last_request[host] = time.monotonic()
+
+
+class FeedHttpClient:
+    """
+    Shared, pooled HTTP client for feed fetching.
+    Keeps connections alive between fetches, sends conditional requests using
+    the ETag/Last-Modified validators saved for each feed and spaces out
+    requests to the same host.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        http2: bool = False,
+        min_host_interval: float = 1.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requires the 'h2' package, using HTTP/1.1")
+                http2 = False
+
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+        self.validators: Dict[str, FeedValidators] = {}
+        self.rate_limiter = HostRateLimiter(min_host_interval)
+
+    async def get_feed(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        conditional: bool = True,
+    ) -> Optional[FeedResponse]:
+        """
+        Returns the feed body, or None when the server reports that the feed
+        has not changed since the saved validators (304 Not Modified).
+        The validators of the response are returned rather than saved, callers
+        pass them to `save_validators` once the feed's articles are processed.
+        """
+        request_headers = dict(headers or {})
+        validators = self.validators.get(url) if conditional else None
+        if validators:
+            if validators.etag:
+                request_headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                request_headers["If-Modified-Since"] = validators.last_modified
+
+        await self.rate_limiter.wait(httpx.URL(url).host)
+        response = await self.client.get(url, headers=request_headers)
+
+        if response.status_code == 304:
+            logger.debug(f"Feed not modified: {url}")
+            return None
+        response.raise_for_status()
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            return FeedResponse(response.text, FeedValidators(etag, last_modified))
+        return FeedResponse(response.text)
+
+    def save_validators(self, url: str, validators: Optional[FeedValidators]) -> None:
+        """Sends `validators` with the next requests for `url`, None stops it."""
+        if validators is not None:
+            self.validators[url] = validators
+        else:
+            self.validators.pop(url, None)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -1,9 +1,13 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List
+import json
+from typing import Any, Optional, List
 from uuid import UUID, uuid4
 
+import numpy as np
+from sqlalchemy import Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlmodel import Field, SQLModel, JSON, Column
 
 
@@ -28,7 +32,65 @@ class NewsCategory(str, Enum):
     OTHER = "Other"
 
 
+# ProcessedArticle.category_source of categories assigned by the local
+# centroid classifier, which is only trained on the other articles
+LOCAL_CATEGORY_SOURCE = "local"
+
+
+class SearchMode(str, Enum):
+    VECTOR = "vector"
+    KEYWORD = "keyword"
+    HYBRID = "hybrid"
+
+
+class Collapse(str, Enum):
+    # One article per story, see ProcessedArticle.story_id
+    STORY = "story"
+
+
+class Float32Vector(TypeDecorator):
+    """
+    Stores a vector as a packed float32 BLOB (1.5 KB for 384 dimensions).
+    Rows written before this type was introduced hold JSON text and are still
+    decoded.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return np.asarray(value, dtype=np.float32).tobytes()
+
+    def process_result_value(self, value: Any, dialect) -> Optional[List[float]]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        return np.frombuffer(value, dtype=np.float32).tolist()
+
+
 class ProcessedArticle(SQLModel, table=True):
+    # Listing pages are read newest first by (published_at, id), optionally
+    # within a category, so both orders are served straight from an index
+    __table_args__ = (
+        Index("ix_processedarticle_published_at_id", "published_at", "id"),
+        Index(
+            "ix_processedarticle_category_published_at_id",
+            "category",
+            "published_at",
+            "id",
+        ),
+        # Newest article of a story, for listings collapsed by story
+        Index(
+            "ix_processedarticle_story_id_published_at_id",
+            "story_id",
+            "published_at",
+            "id",
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     url: str = Field(index=True, unique=True)
     title: str
@@ -37,13 +99,29 @@ class ProcessedArticle(SQLModel, table=True):
     source: str
     published_at: datetime
     created_at: datetime = Field(default_factory=datetime.now)
+    # Copies of the same story from different sources share the id of the
+    # story's first article, which holds its own id
+    story_id: Optional[UUID] = None
+    # What assigned the category, e.g. "gemini" or LOCAL_CATEGORY_SOURCE.
+    # None for articles stored before it was recorded
+    category_source: Optional[str] = None
 
     # Storing tags and other metadata as JSON
     # SQLite doesn't have a native array type, so we use JSON
     metadata_fields: dict = Field(default_factory=dict, sa_column=Column(JSON))
 
-    # Add this field (stored as JSON in SQL for backup, used by Chroma)
-    embedding: Optional[List[float]] = Field(default=None, sa_column=Column(JSON))
+    # Backup of the vector indexed in Chroma. Never needed to build API
+    # responses, so the repository defers loading it
+    embedding: Optional[List[float]] = Field(
+        default=None, sa_column=Column(Float32Vector)
+    )
+
+
+class ClassificationCacheEntry(SQLModel, table=True):
+    # Hash of the normalized article text, model name and prompt version
+    key: str = Field(primary_key=True)
+    category: NewsCategory
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
 
 
 class ArticleResponse(SQLModel):
@@ -55,4 +133,42 @@ class ArticleResponse(SQLModel):
     source: str
     published_at: datetime
     created_at: datetime
+    story_id: Optional[UUID] = None
     metadata_fields: dict
+
+
+class ArticleSearchResult(ArticleResponse):
+    # Passage of the article closest to the query, for articles indexed as
+    # passages and found by vector search
+    matched_passage: Optional[str] = None
+
+
+class PartialArticleResponse(SQLModel):
+    """Article with only the fields requested through `fields=`."""
+
+    id: UUID
+    url: Optional[str] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    category: Optional[NewsCategory] = None
+    source: Optional[str] = None
+    published_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    story_id: Optional[UUID] = None
+    metadata_fields: Optional[dict] = None
+
+
+class ProcessingStatus(str, Enum):
+    SAVED = "saved"
+    DUPLICATE = "duplicate"
+    FAILED = "failed"
+
+
+@dataclass
+class ProcessingResult:
+    """Outcome of processing a single RawArticle in a batch."""
+
+    url: str
+    status: ProcessingStatus
+    article: Optional[ProcessedArticle] = None
+    error: Optional[str] = None
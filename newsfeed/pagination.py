@@ -0,0 +1,24 @@
+import base64
+from datetime import datetime
+import json
+from typing import Tuple
+from uuid import UUID
+
+# Position of the last article on a page: (published_at, id)
+ArticleKey = Tuple[datetime, UUID]
+
+
+def encode_cursor(published_at: datetime, article_id: UUID) -> str:
+    """Encodes a page position as an opaque, URL-safe cursor."""
+    payload = json.dumps([published_at.isoformat(), str(article_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ArticleKey:
+    """Decodes a cursor from encode_cursor, raising ValueError if it is invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published_at, article_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(published_at), UUID(article_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,12 +1,22 @@
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from newsfeed.config import get_settings
-from newsfeed.dependencies import get_news_service
+from newsfeed.dependencies import (
+    get_feed_http_client,
+    get_news_service,
+    get_parser_executor,
+    get_warmup,
+    get_watermark_store,
+)
 from newsfeed.fetchers import RSSFetcher, RedditFetcher, NewsFetcher
+from newsfeed.models import ProcessingStatus
+from newsfeed.services.news_service import NewsService
 
 logger = logging.getLogger(__name__)
 
@@ -31,48 +41,109 @@ SOURCES = [
 ]
 
 
+def _build_fetcher(source_config: dict) -> Optional[NewsFetcher]:
+    """Creates the fetcher matching a source configuration entry."""
+    http = get_feed_http_client()
+    executor = get_parser_executor()
+    watermarks = get_watermark_store()
+    if source_config["type"] == "reddit":
+        return RedditFetcher(
+            subreddit=source_config["name"],
+            http=http,
+            executor=executor,
+            watermarks=watermarks,
+        )
+    if source_config["type"] == "rss":
+        return RSSFetcher(
+            feed_url=source_config["url"],
+            source_name=source_config["name"],
+            http=http,
+            executor=executor,
+            watermarks=watermarks,
+        )
+    logger.warning(f"Unknown source type: {source_config['type']}")
+    return None
+
+
+async def _ingest_source(
+    service: NewsService,
+    source_config: dict,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+) -> int:
+    """
+    Fetches and processes a single source.
+    Failures and timeouts are logged and isolated so they never affect other sources.
+    Returns the number of newly saved articles.
+    """
+    source_name = source_config["name"]
+    try:
+        fetcher = _build_fetcher(source_config)
+        if fetcher is None:
+            return 0
+
+        fetched_at = datetime.now()
+        async with semaphore:
+            logger.info(f"Fetching from {source_name}...")
+            articles = await asyncio.wait_for(fetcher.fetch(), timeout=timeout)
+        logger.info(f"Found {len(articles)} new articles from {source_name}")
+
+        # Process articles as one batch (Dedup -> Classify + Embed -> Save)
+        results = await service.process_batch(articles)
+        new_count = sum(1 for r in results if r.status == ProcessingStatus.SAVED)
+
+        # Move the source's watermark past everything except failed articles
+        failed = {r.url for r in results if r.status == ProcessingStatus.FAILED}
+        get_watermark_store().advance(
+            fetcher.feed_url,
+            [a for a in articles if a.url not in failed],
+            retry=[a for a in articles if a.url in failed],
+            fetched_at=fetched_at,
+        )
+        # Only now may the next fetch be skipped when the feed is unchanged
+        fetcher.save_validators()
+
+        logger.info(f"Saved {new_count} new articles from {source_name}")
+        return new_count
+
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out fetching {source_name} after {timeout:.0f}s")
+    except Exception as e:
+        logger.error(f"Error processing source {source_name}: {e}", exc_info=True)
+    return 0
+
+
 async def run_ingestion():
     """
     Main scheduled task.
-    Iterates over all sources, fetches articles, and processes them through the service.
+    Fetches all sources concurrently (bounded by INGESTION_CONCURRENCY, each fetch
+    limited by FETCH_TIMEOUT_SECONDS) and processes them through the service.
     """
     logger.info("Starting scheduled ingestion job...")
+    settings = get_settings()
+    # The startup run would otherwise load the model on the event loop
+    await get_warmup().wait()
     service = get_news_service()
 
-    for source_config in SOURCES:
-        source_name = source_config["name"]
-        try:
-            fetcher: NewsFetcher
-            if source_config["type"] == "reddit":
-                fetcher = RedditFetcher(subreddit=source_name)
-            elif source_config["type"] == "rss":
-                fetcher = RSSFetcher(
-                    feed_url=source_config["url"], source_name=source_name
-                )
-            else:
-                logger.warning(f"Unknown source type: {source_config['type']}")
-                continue
-
-            logger.info(f"Fetching from {source_name}...")
-            articles = await fetcher.fetch()
-            logger.info(f"Found {len(articles)} articles from {source_name}")
-
-            new_count = 0
-            for article in articles:
-                # Process article (Dedup -> Classify -> Embed -> Save)
-                result = await service.process_article(article)
-                if result:
-                    new_count += 1
-
-            logger.info(f"Saved {new_count} new articles from {source_name}")
-
-        except Exception as e:
-            logger.error(f"Error processing source {source_name}: {e}", exc_info=True)
+    try:
+        await service.refresh_classifier(settings.LOCAL_CLASSIFIER_TRAINING_LIMIT)
+    except Exception as e:
+        logger.error(f"Failed to refresh classifier: {e}", exc_info=True)
+
+    semaphore = asyncio.Semaphore(max(1, settings.INGESTION_CONCURRENCY))
+    results = await asyncio.gather(
+        *(
+            _ingest_source(
+                service, source_config, semaphore, settings.FETCH_TIMEOUT_SECONDS
+            )
+            for source_config in SOURCES
+        )
+    )
 
-    settings = get_settings()
     next_run = datetime.now() + timedelta(minutes=settings.FETCH_INTERVAL_MINUTES)
     logger.info(
-        f"Ingestion job completed. Next run scheduled at: {next_run.strftime('%H:%M:%S')}"
+        f"Ingestion job completed ({sum(results)} new articles). "
+        f"Next run scheduled at: {next_run.strftime('%H:%M:%S')}"
     )
 
 
@@ -1,15 +1,60 @@
 import asyncio
+from datetime import datetime, timedelta
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
 
-from newsfeed.models import ProcessedArticle, RawArticle
-from newsfeed.storage import ArticleRepository, VectorIndex
+from newsfeed.cache import TTLCache, normalize_query
+from newsfeed.chunking import PassageSplitter
+from newsfeed.models import (
+    ArticleSearchResult,
+    NewsCategory,
+    ProcessedArticle,
+    ProcessingResult,
+    ProcessingStatus,
+    RawArticle,
+    SearchMode,
+)
+from newsfeed.storage import (
+    ArticleRepository,
+    Passage,
+    SearchFilters,
+    SearchHit,
+    VectorIndex,
+)
 from newsfeed.classification import NewsClassifier
-from newsfeed.embedding import NewsEmbedder
+from newsfeed.embedding import EmbeddingBatcher, NewsEmbedder
+from newsfeed.stories import StoryClustering, StoryMatch, batch_story_leaders
 
 logger = logging.getLogger(__name__)
 
 
+# Rank offset of reciprocal rank fusion, 60 as in the original RRF paper
+RRF_K = 60
+# Candidates fetched from each ranking per hybrid search result
+HYBRID_CANDIDATES_PER_RESULT = 2
+# Vector hits fetched per result when articles are indexed as passages
+PASSAGE_HITS_PER_RESULT = 4
+# Candidates fetched per result when search results are collapsed by story
+STORY_CANDIDATES_PER_RESULT = 3
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = RRF_K
+) -> List[str]:
+    """
+    Merges ranked URL lists by the sum of 1 / (k + rank) over the lists each
+    URL appears in. Only ranks matter, so BM25 and vector distances need no
+    common scale.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, url in enumerate(ranking, start=1):
+            scores[url] = scores.get(url, 0.0) + 1.0 / (k + rank)
+    # sorted() is stable, ties keep their first-seen order
+    return sorted(scores, key=lambda url: scores[url], reverse=True)
+
+
 class NewsService:
     def __init__(
         self,
@@ -17,11 +62,29 @@ class NewsService:
         index: VectorIndex,
         classifier: NewsClassifier,
         embedder: NewsEmbedder,
+        batcher: Optional[EmbeddingBatcher] = None,
+        query_cache: Optional[TTLCache] = None,
+        result_cache: Optional[TTLCache] = None,
+        splitter: Optional[PassageSplitter] = None,
+        stories: Optional[StoryClustering] = None,
     ):
         self.repo = repository
         self.index = index
         self.classifier = classifier
         self.embedder = embedder
+        # All embedding requests go through the batcher so that concurrent
+        # ingestion and search calls share a single model.encode call
+        self.batcher = batcher or EmbeddingBatcher(embedder)
+        # Query embeddings keyed by model and normalized query text, and full
+        # search results, cleared whenever articles are indexed
+        self.query_cache = query_cache
+        self.result_cache = result_cache
+        self.model_name = getattr(embedder, "model_name", type(embedder).__name__)
+        self._index_version = 0
+        # Long articles are indexed as overlapping passages, see _embed_articles
+        self.splitter = splitter
+        # New articles join the story of near-duplicates, see _match_stories
+        self.stories = stories
 
     async def process_article(self, raw: RawArticle) -> Optional[ProcessedArticle]:
         """
@@ -38,18 +101,33 @@ class NewsService:
         logger.debug(f"Processing new article: {raw.title}")
         full_text = f"{raw.title}\n\n{raw.content}"
 
+        article_id = uuid4()
         try:
-            category = await self.classifier.classify(full_text)
-            embedding = await asyncio.to_thread(self.embedder.embed, full_text)
+            embeddings, passages = await self._embed_articles([full_text])
+            if isinstance(embeddings[0], BaseException):
+                raise embeddings[0]
+            embedding = embeddings[0].tolist()
+            (match,) = await self._match_stories(
+                [article_id], [raw.published_at], embeddings
+            )
+            label = self._reused_label(match)
+            if label is None:
+                (label,) = await self.classifier.classify_batch_with_sources(
+                    [full_text]
+                )
+            category, category_source = label
         except Exception as e:
             logger.error(f"Error processing article '{raw.title}': {e}")
             return None
 
         processed = ProcessedArticle(
+            id=article_id,
+            story_id=match.story_id if match else article_id,
             url=raw.url,
             title=raw.title,
             content=raw.content,
             category=category,
+            category_source=category_source,
             source=raw.source,
             published_at=raw.published_at,
             embedding=embedding,
@@ -60,53 +138,452 @@ class NewsService:
             },
         )
 
-        return await self.add_article(processed)
+        return await self.add_article(processed, passages[0])
+
+    async def process_batch(self, raws: List[RawArticle]) -> List[ProcessingResult]:
+        """
+        Batched version of `process_article`.
+        Flow:
+        1. One bulk existence query for the whole batch (dedup)
+        2. Classify and embed all new articles concurrently
+        3. One vector index upsert and one SQL transaction for all new articles
+        Returns one result per input article, in input order.
+        """
+        results: List[Optional[ProcessingResult]] = [None] * len(raws)
+
+        # Dedup against the database and within the batch itself
+        existing = set(await self.repo.existing_urls([r.url for r in raws]))
+        pending: List[int] = []
+        for i, raw in enumerate(raws):
+            if raw.url in existing:
+                results[i] = ProcessingResult(raw.url, ProcessingStatus.DUPLICATE)
+            else:
+                existing.add(raw.url)
+                pending.append(i)
+
+        logger.debug(
+            f"Batch of {len(raws)} articles: {len(pending)} new, "
+            f"{len(raws) - len(pending)} duplicates"
+        )
+
+        texts = [f"{raws[i].title}\n\n{raws[i].content}" for i in pending]
+        ids = [uuid4() for _ in pending]
+        published = [raws[i].published_at for i in pending]
+        reuse_categories = self.stories is not None and self.stories.reuse_category
+        if self.classifier.uses_embeddings or reuse_categories:
+            # Embed first, so the classifier can work from the vectors and
+            # copies of stored stories can skip classification
+            embeddings, passages = await self._embed_articles(texts)
+            matches = await self._match_stories(ids, published, embeddings)
+            labels = list(embeddings)
+            to_classify = []
+            for j, embedding in enumerate(embeddings):
+                if isinstance(embedding, BaseException):
+                    continue
+                reused = self._reused_label(matches[j])
+                if reused is not None:
+                    labels[j] = reused
+                else:
+                    to_classify.append(j)
+            if len(to_classify) < len(texts):
+                logger.debug(
+                    f"Reused story categories for "
+                    f"{len(texts) - len(to_classify)} articles"
+                )
+            vectors = None
+            if self.classifier.uses_embeddings:
+                vectors = [embeddings[j] for j in to_classify]
+            classified = await self._classify_batch(
+                [texts[j] for j in to_classify], vectors
+            )
+            for j, label in zip(to_classify, classified):
+                labels[j] = label
+        else:
+            labels, (embeddings, passages) = await asyncio.gather(
+                self._classify_batch(texts), self._embed_articles(texts)
+            )
+            matches = await self._match_stories(ids, published, embeddings)
+
+        to_save: List[ProcessedArticle] = []
+        passages_by_url: Dict[str, List[Passage]] = {}
+        for j, (i, label, embedding, article_passages) in enumerate(
+            zip(pending, labels, embeddings, passages)
+        ):
+            raw = raws[i]
+            error = next(
+                (e for e in (label, embedding) if isinstance(e, BaseException)),
+                None,
+            )
+            if error is not None:
+                logger.error(f"Error processing article '{raw.title}': {error}")
+                results[i] = ProcessingResult(
+                    raw.url, ProcessingStatus.FAILED, error=str(error)
+                )
+                continue
+
+            category, category_source = label
+            processed = ProcessedArticle(
+                id=ids[j],
+                story_id=matches[j].story_id if matches[j] else ids[j],
+                url=raw.url,
+                title=raw.title,
+                content=raw.content,
+                category=category,
+                category_source=category_source,
+                source=raw.source,
+                published_at=raw.published_at,
+                embedding=embedding.tolist(),
+                metadata_fields={
+                    "author": raw.author,
+                    "tags": raw.tags,
+                    "image_url": raw.image_url,
+                },
+            )
+            to_save.append(processed)
+            if article_passages is not None:
+                passages_by_url[raw.url] = article_passages
+            results[i] = ProcessingResult(
+                raw.url, ProcessingStatus.SAVED, article=processed
+            )
+
+        if to_save:
+            try:
+                await asyncio.to_thread(
+                    self.index.index_many, to_save, passages_by_url or None
+                )
+                saved = await self.repo.save_many(to_save)
+                logger.debug(f"Saved and indexed {len(saved)} articles")
+                # Articles stored meanwhile by a concurrent ingestion worker
+                saved_urls = {article.url for article in saved}
+                for i, result in enumerate(results):
+                    if (
+                        result.status == ProcessingStatus.SAVED
+                        and result.url not in saved_urls
+                    ):
+                        results[i] = ProcessingResult(
+                            result.url, ProcessingStatus.DUPLICATE
+                        )
+            except Exception as e:
+                logger.error(f"Failed to save/index batch of {len(to_save)}: {e}")
+                for i, result in enumerate(results):
+                    if result.status == ProcessingStatus.SAVED:
+                        results[i] = ProcessingResult(
+                            result.url, ProcessingStatus.FAILED, error=str(e)
+                        )
+            self._invalidate_search_results()
+
+        return results
+
+    def _invalidate_search_results(self) -> None:
+        self._index_version += 1
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    async def _embed_batch(self, texts: List[str]) -> List[Any]:
+        """Embeds texts, reporting a failure as the exception for that text."""
+        return await asyncio.gather(
+            *(self.batcher.embed(text) for text in texts), return_exceptions=True
+        )
+
+    async def _embed_articles(
+        self, texts: List[str]
+    ) -> Tuple[List[Any], List[Optional[List[Passage]]]]:
+        """
+        Embeds article texts like _embed_batch. With a splitter, every passage
+        is embedded (all in the same batches) and the article embedding is
+        that of its first passage, the part a truncating model used to see.
+        Returns the article embeddings and, per article, its passages or None.
+        """
+        if self.splitter is None:
+            return await self._embed_batch(texts), [None] * len(texts)
+
+        split = [self.splitter.split(text) for text in texts]
+        vectors = await self._embed_batch([p for passages in split for p in passages])
+        embeddings: List[Any] = []
+        article_passages: List[Optional[List[Passage]]] = []
+        offset = 0
+        for passages in split:
+            own = vectors[offset : offset + len(passages)]
+            offset += len(passages)
+            error = next((v for v in own if isinstance(v, BaseException)), None)
+            if error is not None:
+                embeddings.append(error)
+                article_passages.append(None)
+            else:
+                embeddings.append(own[0])
+                article_passages.append(
+                    [Passage(text, v.tolist()) for text, v in zip(passages, own)]
+                )
+        return embeddings, article_passages
+
+    async def _match_stories(
+        self,
+        ids: List[UUID],
+        published: List[Optional[datetime]],
+        embeddings: List[Any],
+    ) -> List[Optional[StoryMatch]]:
+        """
+        Finds the story each new article belongs to: that of the closest
+        stored article within the story window and distance, else that of an
+        earlier copy in the same batch. None for articles starting a story,
+        or whose embedding failed, and for all articles without clustering.
+        """
+        matches: List[Optional[StoryMatch]] = [None] * len(ids)
+        if self.stories is None:
+            return matches
+        ok = [j for j, e in enumerate(embeddings) if not isinstance(e, BaseException)]
+        if not ok:
+            return matches
+
+        # One index query for the batch, over the window around all its dates
+        window = timedelta(hours=self.stories.window_hours)
+        dates = [published[j] for j in ok if published[j] is not None]
+        try:
+            filters = None
+            if len(dates) == len(ok):
+                filters = SearchFilters(
+                    published_after=min(dates) - window,
+                    published_before=max(dates) + window,
+                )
+            hits = await asyncio.to_thread(
+                self.index.search_many,
+                [embeddings[j] for j in ok],
+                self.stories.candidates,
+                filters,
+            )
+            close = {
+                j: [h for h in row if h.distance <= self.stories.max_distance]
+                for j, row in zip(ok, hits)
+            }
+            neighbours = {
+                article.url: article
+                for article in await self.repo.get_by_urls(
+                    list({hit.url for row in close.values() for hit in row})
+                )
+            }
+        except Exception as e:
+            logger.error(f"Story matching failed, articles start new stories: {e}")
+            close, neighbours = {}, {}
+
+        for j in ok:
+            # Hits are closest first, and an article's own window is narrower
+            # than the batch's
+            for hit in close.get(j, []):
+                stored = neighbours.get(hit.url)
+                if stored is not None and self.stories.within_window(
+                    published[j], stored.published_at
+                ):
+                    matches[j] = StoryMatch(
+                        stored.story_id or stored.id,
+                        stored.category,
+                        stored.category_source,
+                    )
+                    break
+
+        # Copies within the batch join the story of the first one. Their
+        # category is not reused, the first copy is being classified with them
+        leaders = batch_story_leaders(
+            [embeddings[j] for j in ok], [published[j] for j in ok], self.stories
+        )
+        for position, leader in enumerate(leaders):
+            j = ok[position]
+            if matches[j] is None and leader is not None:
+                first = ok[leader]
+                story_id = matches[first].story_id if matches[first] else ids[first]
+                matches[j] = StoryMatch(story_id)
+        return matches
+
+    def _reused_label(
+        self, match: Optional[StoryMatch]
+    ) -> Optional[Tuple[NewsCategory, Optional[str]]]:
+        """
+        Category and category source of the stored story an article joins,
+        if they are reused.
+        """
+        if match is None or self.stories is None or not self.stories.reuse_category:
+            return None
+        if match.category is None:
+            return None
+        return match.category, match.category_source
+
+    async def _classify_batch(
+        self, texts: List[str], embeddings: Optional[List[Any]] = None
+    ) -> List[Any]:
+        """
+        Classifies texts into (category, category source) pairs, reporting a
+        failure as the exception for every text.
+        """
+        if not texts:
+            return []
+        try:
+            if embeddings is None:
+                return await self.classifier.classify_batch_with_sources(texts)
+            return await self.classifier.classify_batch_with_sources(
+                texts, embeddings=embeddings
+            )
+        except Exception as e:
+            return [e] * len(texts)
+
+    async def refresh_classifier(self, limit: int = 5000) -> None:
+        """
+        Re-trains classifiers that learn from stored articles (e.g. the local
+        centroid classifier) on the most recent labeled embeddings.
+        """
+        if not self.classifier.uses_embeddings:
+            return
+        samples = await self.repo.get_labeled_embeddings(limit)
+        await asyncio.to_thread(self.classifier.fit, samples)
 
     async def add_article(
-        self, article: ProcessedArticle
+        self, article: ProcessedArticle, passages: Optional[List[Passage]] = None
     ) -> Optional[ProcessedArticle]:
         if not article.embedding:
             logger.warning(f"Article {article.url} has no embedding, skipping index")
             return None
 
         try:
-            await asyncio.to_thread(self.index.index, article)
+            if passages:
+                await asyncio.to_thread(
+                    self.index.index_many, [article], {article.url: passages}
+                )
+            else:
+                await asyncio.to_thread(self.index.index, article)
             saved_article = await self.repo.save(article)
             logger.debug(f"Successfully saved and indexed article: {article.title}")
             return saved_article
         except Exception as e:
             logger.error(f"Failed to save/index article '{article.title}': {e}")
             return None
+        finally:
+            self._invalidate_search_results()
+
+    async def _embed_query(self, query: str) -> Any:
+        if self.query_cache is None:
+            return await self.batcher.embed(query)
+
+        # The normalized text is embedded so the cached vector does not depend
+        # on which spelling of the query came first
+        normalized = normalize_query(query)
+        key = (self.model_name, normalized)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = await self.batcher.embed(normalized)
+            self.query_cache.set(key, embedding)
+        return embedding
+
+    async def _vector_search(
+        self,
+        query: str,
+        limit: int,
+        max_distance: Optional[float],
+        filters: Optional[SearchFilters],
+    ) -> List[SearchHit]:
+        """Closest vector hits, one per article (its best passage)."""
+        # Several passages of one article can occupy the top hits
+        fetch = limit * PASSAGE_HITS_PER_RESULT if self.splitter else limit
+        query_embedding = await self._embed_query(query)
+        results = await asyncio.to_thread(
+            self.index.search_many, [query_embedding], fetch, filters
+        )
+        best: Dict[str, SearchHit] = {}
+        for hit in results[0] if results else []:
+            if max_distance is not None and hit.distance > max_distance:
+                continue
+            best.setdefault(hit.url, hit)
+        return list(best.values())[:limit]
 
     async def search_articles(
-        self, query: str, limit: int = 20
-    ) -> List[ProcessedArticle]:
+        self,
+        query: str,
+        limit: int = 20,
+        max_distance: Optional[float] = None,
+        filters: Optional[SearchFilters] = None,
+        mode: SearchMode = SearchMode.VECTOR,
+        collapse_stories: bool = False,
+    ) -> List[ArticleSearchResult]:
         """
-        Semantic search using vector embeddings.
+        Searches articles matching `filters`:
+        - VECTOR: semantic search using vector embeddings.
+        - KEYWORD: BM25 full-text search over titles and content.
+        - HYBRID: both run concurrently, merged with reciprocal rank fusion.
+        Vector matches further than `max_distance` from the query are dropped.
+        Articles found through a passage vector carry that passage.
+        With `collapse_stories` only the best ranked article of each story is
+        returned.
         """
-        logger.info(f"Searching articles for query: '{query}'")
-        try:
-            query_embedding = await asyncio.to_thread(self.embedder.embed, query)
+        logger.info(f"Searching articles for query: '{query}' ({mode.value})")
+        cache_key = (
+            normalize_query(query),
+            limit,
+            max_distance,
+            filters,
+            mode,
+            collapse_stories,
+        )
+        if self.result_cache is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"Search results for '{query}' served from cache")
+                return cached
+        index_version = self._index_version
+        # Copies of one story take several ranks, fetch enough to fill `limit`
+        wanted = limit
+        if collapse_stories:
+            limit = limit * STORY_CANDIDATES_PER_RESULT
 
-            relevant_urls = await asyncio.to_thread(
-                self.index.search, query_embedding, limit
-            )
+        vector_hits: List[SearchHit] = []
+        try:
+            if mode == SearchMode.KEYWORD:
+                relevant_urls = await self.repo.keyword_search(query, limit, filters)
+            elif mode == SearchMode.HYBRID:
+                # Each ranking contributes more candidates than are returned so
+                # articles ranked well by both can rise above either top list
+                candidates = limit * HYBRID_CANDIDATES_PER_RESULT
+                vector_hits, keyword_urls = await asyncio.gather(
+                    self._vector_search(query, candidates, max_distance, filters),
+                    self.repo.keyword_search(query, candidates, filters),
+                )
+                relevant_urls = reciprocal_rank_fusion(
+                    [[hit.url for hit in vector_hits], keyword_urls]
+                )[:limit]
+            else:
+                vector_hits = await self._vector_search(
+                    query, limit, max_distance, filters
+                )
+                relevant_urls = [hit.url for hit in vector_hits]
         except Exception as e:
             logger.error(f"Error during search for '{query}': {e}")
             return []
 
-        if not relevant_urls:
+        if relevant_urls:
+            articles = await self.repo.get_by_urls(relevant_urls)
+        else:
             logger.debug(f"No relevant articles found for query: '{query}'")
-            return []
-
-        articles = await self.repo.get_by_urls(relevant_urls)
+            articles = []
 
         url_to_article = {a.url: a for a in articles}
-        sorted_articles = [
-            url_to_article[url] for url in relevant_urls if url in url_to_article
+        passages = {hit.url: hit.passage for hit in vector_hits}
+        search_results = [
+            ArticleSearchResult.model_validate(
+                url_to_article[url], update={"matched_passage": passages.get(url)}
+            )
+            for url in relevant_urls
+            if url in url_to_article
         ]
+        if collapse_stories:
+            seen_stories = set()
+            collapsed = []
+            for result in search_results:
+                story = result.story_id or result.id
+                if story not in seen_stories:
+                    seen_stories.add(story)
+                    collapsed.append(result)
+            search_results = collapsed[:wanted]
 
         logger.info(
-            f"Found {len(sorted_articles)} relevant articles for query: '{query}'"
+            f"Found {len(search_results)} relevant articles for query: '{query}'"
         )
-        return sorted_articles
+        # Results computed while articles were being indexed may be stale
+        if self.result_cache is not None and index_version == self._index_version:
+            self.result_cache.set(cache_key, search_results)
+        return search_results
@@ -1,11 +1,27 @@
 from newsfeed.storage.article.base import ArticleRepository
 from newsfeed.storage.article.sql import SQLArticleRepository
-from newsfeed.storage.semantic.base import VectorIndex
+from newsfeed.storage.classification.base import ClassificationCache
+from newsfeed.storage.classification.sql import SQLClassificationCache
+from newsfeed.storage.semantic.base import (
+    Passage,
+    SearchFilters,
+    SearchHit,
+    VectorIndex,
+)
 from newsfeed.storage.semantic.chroma import ChromaVectorIndex
+from newsfeed.storage.semantic.numpy_index import NumpyVectorIndex
+from newsfeed.storage.sqlite import SQLiteProfile
 
 __all__ = [
     "ArticleRepository",
     "SQLArticleRepository",
+    "ClassificationCache",
+    "SQLClassificationCache",
+    "Passage",
+    "SearchFilters",
+    "SearchHit",
     "VectorIndex",
     "ChromaVectorIndex",
+    "NumpyVectorIndex",
+    "SQLiteProfile",
 ]
@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from abc import ABC, abstractmethod
 from uuid import UUID
-from newsfeed.models import ProcessedArticle
+from newsfeed.models import NewsCategory, ProcessedArticle
+from newsfeed.pagination import ArticleKey
+from newsfeed.storage.semantic.base import SearchFilters
 
 
 class ArticleRepository(ABC):
@@ -10,11 +12,28 @@ class ArticleRepository(ABC):
         """Saves an article to persistence."""
         pass
 
+    @abstractmethod
+    async def save_many(
+        self, articles: List[ProcessedArticle]
+    ) -> List[ProcessedArticle]:
+        """
+        Saves several articles in a single transaction.
+        Articles whose URL is already stored are skipped without error, so
+        concurrent writers can save overlapping batches. Returns the articles
+        that were actually inserted.
+        """
+        pass
+
     @abstractmethod
     async def exists(self, url: str) -> bool:
         """Checks if an article with the given URL already exists."""
         pass
 
+    @abstractmethod
+    async def existing_urls(self, urls: Iterable[str]) -> Set[str]:
+        """Returns the subset of the given URLs that are already stored."""
+        pass
+
     @abstractmethod
     async def get(self, article_id: UUID) -> Optional[ProcessedArticle]:
         """Retrieves an article by ID."""
@@ -22,12 +41,65 @@ class ArticleRepository(ABC):
 
     @abstractmethod
     async def list_articles(
-        self, category: Optional[str] = None, limit: int = 20, offset: int = 0
+        self,
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        after: Optional[ArticleKey] = None,
+        collapse_stories: bool = False,
     ) -> List[ProcessedArticle]:
-        """Lists articles with optional filtering."""
+        """
+        Lists articles newest first with optional filtering.
+        `after` continues from the (published_at, id) of a previous page's last
+        article. `collapse_stories` lists only the newest article of each story.
+        """
+        pass
+
+    @abstractmethod
+    async def list_article_fields(
+        self,
+        fields: Sequence[str],
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        after: Optional[ArticleKey] = None,
+        collapse_stories: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Lists articles like list_articles, loading only the given columns."""
         pass
 
     @abstractmethod
     async def get_by_urls(self, urls: List[str]) -> List[ProcessedArticle]:
         """Retrieves multiple articles by their URLs."""
         pass
+
+    @abstractmethod
+    async def keyword_search(
+        self,
+        query: str,
+        limit: int = 20,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[str]:
+        """
+        Returns URLs of articles whose title or content match the query terms,
+        best BM25 match first. Backends without full-text search return [].
+        """
+        pass
+
+    @abstractmethod
+    async def get_embeddings(self, urls: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Loads stored embeddings by article URL.
+        Articles returned by the other methods do not carry their embedding.
+        """
+        pass
+
+    @abstractmethod
+    async def get_labeled_embeddings(
+        self, limit: int = 5000
+    ) -> List[Tuple[NewsCategory, List[float]]]:
+        """
+        Returns (category, embedding) pairs of the most recent articles,
+        leaving out those categorized by the local classifier itself.
+        """
+        pass
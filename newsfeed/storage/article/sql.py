@@ -1,22 +1,93 @@
 import logging
-from typing import List, Optional
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 from sqlmodel import select
+from sqlalchemy import column, func, inspect, or_, table, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import aliased, defer, sessionmaker
 
-from newsfeed.models import ProcessedArticle
+from newsfeed.models import LOCAL_CATEGORY_SOURCE, NewsCategory, ProcessedArticle
+from newsfeed.pagination import ArticleKey
 from newsfeed.storage.article.base import ArticleRepository
+from newsfeed.storage.article.url_cache import KnownURLCache
+from newsfeed.storage.semantic.base import SearchFilters
+from newsfeed.storage.sqlite import SQLiteProfile, apply_sqlite_profile, is_sqlite_file
 
 logger = logging.getLogger(__name__)
 
+# Stay well below SQLite's limit on bound parameters per statement
+URL_QUERY_CHUNK_SIZE = 500
+# Rows converted per statement when compacting legacy JSON embeddings
+EMBEDDING_MIGRATION_CHUNK_SIZE = 500
+
+# Dialects supporting INSERT ... ON CONFLICT DO NOTHING
+INSERT_IGNORING_CONFLICTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+# Article queries never load the embedding, use get_embeddings() for that
+WITHOUT_EMBEDDING = defer(ProcessedArticle.embedding)
+
+# SQLite full-text index over article titles and content. Articles are never
+# updated or deleted, so an insert trigger keeps it in sync with every save
+FTS_TABLE = table("article_fts", column("url"))
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS article_fts "
+    "USING fts5(url UNINDEXED, title, content)",
+    "CREATE TRIGGER IF NOT EXISTS processedarticle_fts_insert "
+    "AFTER INSERT ON processedarticle BEGIN "
+    "INSERT INTO article_fts (url, title, content) "
+    "VALUES (new.url, new.title, new.content); END",
+]
+# BM25 column weights (url, title, content): title matches count double
+FTS_RANK = text("bm25(article_fts, 0.0, 2.0, 1.0)")
+FTS_TOKEN = re.compile(r"\w+(?:[-.]\w+)*")
+
 
 class SQLArticleRepository(ArticleRepository):
-    def __init__(self, database_url: str):
-        self.engine = create_async_engine(database_url, echo=False)
+    def __init__(
+        self,
+        database_url: str,
+        known_url_cache_size: int = 0,
+        sqlite_profile: Optional[SQLiteProfile] = None,
+        read_pool_size: int = 0,
+    ):
+        # With a read pool, an on-disk SQLite database gets a single writer
+        # connection (SQLite serializes writes anyway, queueing them in the pool
+        # avoids lock retries) and separate read-only connections that, in WAL
+        # mode, are never blocked by ingestion
+        separate_reader = read_pool_size > 0 and is_sqlite_file(database_url)
+        if separate_reader:
+            self.engine = create_async_engine(
+                database_url, echo=False, pool_size=1, max_overflow=0
+            )
+            self.read_engine = create_async_engine(
+                database_url, echo=False, pool_size=read_pool_size, max_overflow=0
+            )
+        else:
+            self.engine = create_async_engine(database_url, echo=False)
+            self.read_engine = self.engine
+
+        if sqlite_profile is not None and self.engine.dialect.name == "sqlite":
+            apply_sqlite_profile(self.engine, sqlite_profile)
+            if separate_reader:
+                apply_sqlite_profile(self.read_engine, sqlite_profile, read_only=True)
+
         self.async_session = sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
+        # Read-only queries, the same sessions as async_session without a reader
+        self.read_session = sessionmaker(
+            self.read_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        # Optional in-process cache of stored URLs, see warm_url_cache()
+        self.known_urls: Optional[KnownURLCache] = (
+            KnownURLCache(known_url_cache_size) if known_url_cache_size > 0 else None
+        )
 
     async def init_db(self):
         """Initializes the database tables."""
@@ -26,49 +97,426 @@ class SQLArticleRepository(ArticleRepository):
         try:
             async with self.engine.begin() as conn:
                 await conn.run_sync(SQLModel.metadata.create_all)
+                # create_all skips columns and indexes added to tables that
+                # already exist
+                added = await conn.run_sync(self._add_missing_columns)
+                if "story_id" in added:
+                    # Every stored article starts as a story of its own
+                    await conn.execute(
+                        update(ProcessedArticle)
+                        .where(ProcessedArticle.story_id.is_(None))
+                        .values(story_id=ProcessedArticle.id)
+                    )
+                await conn.run_sync(self._create_missing_indexes)
+                if self.engine.dialect.name == "sqlite":
+                    await self._create_fts_index(conn)
+            await self._compact_legacy_embeddings()
             logger.info("SQL database initialized.")
         except Exception as e:
             logger.critical(f"Failed to initialize SQL database: {e}")
             raise
 
+    async def close(self) -> None:
+        """Closes all pooled connections."""
+        await self.engine.dispose()
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
+
+    @staticmethod
+    def _add_missing_columns(connection) -> List[str]:
+        """
+        Adds model columns missing from an existing articles table. New
+        columns are nullable, so ALTER TABLE can add them to stored rows.
+        """
+        table = ProcessedArticle.__table__
+        existing = {c["name"] for c in inspect(connection).get_columns(table.name)}
+        added = []
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            column_type = col.type.compile(dialect=connection.dialect)
+            connection.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {column_type}")
+            )
+            added.append(col.name)
+        if added:
+            logger.info(f"Added columns to {table.name}: {', '.join(added)}")
+        return added
+
+    @staticmethod
+    def _create_missing_indexes(connection) -> None:
+        for index in ProcessedArticle.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+    @staticmethod
+    async def _create_fts_index(conn) -> None:
+        exists = await conn.scalar(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'article_fts'")
+        )
+        for statement in FTS_DDL:
+            await conn.execute(text(statement))
+        if not exists:
+            # Index the articles stored before the table existed
+            await conn.execute(
+                text(
+                    "INSERT INTO article_fts (url, title, content) "
+                    "SELECT url, title, content FROM processedarticle"
+                )
+            )
+            logger.info("Created full-text index of articles")
+
+    async def _compact_legacy_embeddings(self) -> int:
+        """
+        Rewrites embeddings stored as JSON text by older versions as float32
+        BLOBs. Only SQLite databases predate the BLOB column.
+        """
+        if self.engine.dialect.name != "sqlite":
+            return 0
+
+        converted = 0
+        async with self.async_session() as session:
+            while True:
+                statement = (
+                    select(ProcessedArticle.id, ProcessedArticle.embedding)
+                    .where(func.typeof(ProcessedArticle.embedding) == "text")
+                    .limit(EMBEDDING_MIGRATION_CHUNK_SIZE)
+                )
+                rows = (await session.execute(statement)).all()
+                if not rows:
+                    break
+                await session.execute(
+                    update(ProcessedArticle),
+                    [{"id": id, "embedding": embedding} for id, embedding in rows],
+                )
+                await session.commit()
+                converted += len(rows)
+
+        if converted:
+            logger.info(f"Converted {converted} JSON embeddings to float32 BLOBs")
+        return converted
+
+    async def warm_url_cache(self) -> int:
+        """Loads the most recently stored URLs into the known-URL cache."""
+        if self.known_urls is None:
+            return 0
+
+        async with self.read_session() as session:
+            statement = (
+                select(ProcessedArticle.url)
+                .order_by(ProcessedArticle.created_at.desc())
+                .limit(self.known_urls.max_size)
+            )
+            result = await session.execute(statement)
+            urls = list(result.scalars().all())
+
+        # Insert oldest first so the newest URLs are the last to be evicted
+        self.known_urls.update(reversed(urls))
+        logger.info(f"Warmed known-URL cache with {len(urls)} URLs")
+        return len(urls)
+
+    def _remember(self, urls: Iterable[str]) -> None:
+        if self.known_urls is not None:
+            self.known_urls.update(urls)
+
     async def save(self, article: ProcessedArticle) -> ProcessedArticle:
         try:
             async with self.async_session() as session:
                 session.add(article)
                 await session.commit()
-                await session.refresh(article)
-                return article
+            self._remember([article.url])
+            return article
         except Exception as e:
             logger.error(f"Failed to save article to SQL: {e}")
             raise
 
+    async def save_many(
+        self, articles: List[ProcessedArticle]
+    ) -> List[ProcessedArticle]:
+        if not articles:
+            return []
+
+        insert = INSERT_IGNORING_CONFLICTS.get(self.engine.dialect.name)
+        if insert is None:
+            return await self._add_all(articles)
+
+        # Keep the first article per URL, later ones are duplicates anyway
+        by_url = {}
+        for article in articles:
+            by_url.setdefault(article.url, article)
+
+        table = ProcessedArticle.__table__
+        rows = [
+            {column.name: getattr(article, column.name) for column in table.columns}
+            for article in by_url.values()
+        ]
+        # One executemany INSERT, rows whose URL is already stored (including by
+        # a concurrent writer) are skipped and left out of RETURNING
+        statement = (
+            insert(table)
+            .on_conflict_do_nothing(index_elements=[table.c.url])
+            .returning(table.c.url)
+        )
+        try:
+            async with self.engine.begin() as conn:
+                result = await conn.execute(statement, rows)
+                inserted = set(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to save {len(articles)} articles to SQL: {e}")
+            raise
+
+        self._remember(by_url)
+        if len(inserted) < len(by_url):
+            logger.debug(
+                f"Skipped {len(by_url) - len(inserted)} articles already stored"
+            )
+        return [article for url, article in by_url.items() if url in inserted]
+
+    async def _add_all(
+        self, articles: List[ProcessedArticle]
+    ) -> List[ProcessedArticle]:
+        """ORM insert for dialects without ON CONFLICT, fails on duplicates."""
+        try:
+            async with self.async_session() as session:
+                session.add_all(articles)
+                await session.commit()
+            self._remember(a.url for a in articles)
+            return articles
+        except Exception as e:
+            logger.error(f"Failed to save {len(articles)} articles to SQL: {e}")
+            raise
+
     async def exists(self, url: str) -> bool:
-        async with self.async_session() as session:
-            statement = select(ProcessedArticle).where(ProcessedArticle.url == url)
-            result = await session.execute(statement)
-            return result.scalars().first() is not None
+        return url in await self.existing_urls([url])
+
+    async def existing_urls(self, urls: Iterable[str]) -> Set[str]:
+        found: Set[str] = set()
+        remaining = []
+        for url in set(urls):
+            if self.known_urls is not None and url in self.known_urls:
+                found.add(url)
+            else:
+                remaining.append(url)
+
+        if not remaining:
+            return found
+
+        # Only the indexed url column is selected, never the full rows
+        stored: Set[str] = set()
+        async with self.read_session() as session:
+            for start in range(0, len(remaining), URL_QUERY_CHUNK_SIZE):
+                chunk = remaining[start : start + URL_QUERY_CHUNK_SIZE]
+                statement = select(ProcessedArticle.url).where(
+                    ProcessedArticle.url.in_(chunk)
+                )
+                result = await session.execute(statement)
+                stored.update(result.scalars().all())
+
+        self._remember(stored)
+        return found | stored
 
     async def get(self, article_id: UUID) -> Optional[ProcessedArticle]:
-        async with self.async_session() as session:
-            return await session.get(ProcessedArticle, article_id)
+        async with self.read_session() as session:
+            return await session.get(
+                ProcessedArticle, article_id, options=[WITHOUT_EMBEDDING]
+            )
 
-    async def list_articles(
-        self, category: Optional[str] = None, limit: int = 20, offset: int = 0
-    ) -> List[ProcessedArticle]:
-        async with self.async_session() as session:
-            statement = select(ProcessedArticle)
+    @staticmethod
+    def _paginate(
+        statement,
+        category: Optional[str],
+        limit: int,
+        offset: int,
+        after: Optional[ArticleKey],
+        collapse_stories: bool = False,
+    ):
+        """
+        Newest first, with the id breaking ties so keyset pages are stable.
+        With `after` the page starts right below that (published_at, id)
+        position, an index range scan whatever the depth.
+        `collapse_stories` keeps only the newest article of each story.
+        """
+        if category:
+            statement = statement.where(ProcessedArticle.category == category)
+        if collapse_stories:
+            newer = aliased(ProcessedArticle)
+            newer_copy = (
+                select(newer.id)
+                .where(
+                    newer.story_id == ProcessedArticle.story_id,
+                    tuple_(newer.published_at, newer.id)
+                    > tuple_(ProcessedArticle.published_at, ProcessedArticle.id),
+                )
+                .exists()
+            )
+            # Within a category the newest copy in that category is shown
             if category:
-                statement = statement.where(ProcessedArticle.category == category)
-            statement = statement.offset(offset).limit(limit)
-            statement = statement.order_by(ProcessedArticle.published_at.desc())
+                newer_copy = newer_copy.where(newer.category == category)
+            statement = statement.where(~newer_copy)
+        if after is not None:
+            statement = statement.where(
+                tuple_(ProcessedArticle.published_at, ProcessedArticle.id)
+                < tuple_(*after)
+            )
+        statement = statement.order_by(
+            ProcessedArticle.published_at.desc(), ProcessedArticle.id.desc()
+        )
+        return statement.offset(offset).limit(limit)
 
+    async def list_articles(
+        self,
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        after: Optional[ArticleKey] = None,
+        collapse_stories: bool = False,
+    ) -> List[ProcessedArticle]:
+        async with self.read_session() as session:
+            statement = self._paginate(
+                select(ProcessedArticle).options(WITHOUT_EMBEDDING),
+                category,
+                limit,
+                offset,
+                after,
+                collapse_stories,
+            )
             result = await session.execute(statement)
             return list(result.scalars().all())
 
+    async def list_article_fields(
+        self,
+        fields: Sequence[str],
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        after: Optional[ArticleKey] = None,
+        collapse_stories: bool = False,
+    ) -> List[Dict[str, Any]]:
+        columns = ProcessedArticle.__table__.columns
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown article fields: {', '.join(unknown)}")
+
+        async with self.read_session() as session:
+            # Plain column select: no ORM objects, only the requested columns
+            statement = self._paginate(
+                select(*(getattr(ProcessedArticle, name) for name in fields)),
+                category,
+                limit,
+                offset,
+                after,
+                collapse_stories,
+            )
+            result = await session.execute(statement)
+            return [dict(row) for row in result.mappings().all()]
+
     async def get_by_urls(self, urls: List[str]) -> List[ProcessedArticle]:
         if not urls:
             return []
-        async with self.async_session() as session:
-            statement = select(ProcessedArticle).where(ProcessedArticle.url.in_(urls))
+        async with self.read_session() as session:
+            statement = (
+                select(ProcessedArticle)
+                .options(WITHOUT_EMBEDDING)
+                .where(ProcessedArticle.url.in_(urls))
+            )
+            result = await session.execute(statement)
+            return list(result.scalars().all())
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """
+        Quotes every term so user input cannot be parsed as FTS5 syntax, and
+        ORs them so documents matching more terms rank higher. Hyphenated and
+        dotted terms like CVE IDs or model numbers are matched as phrases.
+        """
+        return " OR ".join(f'"{term}"' for term in FTS_TOKEN.findall(query))
+
+    @staticmethod
+    def _naive_utc(value: datetime) -> datetime:
+        # Published dates are stored as naive UTC
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    async def keyword_search(
+        self,
+        query: str,
+        limit: int = 20,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[str]:
+        if self.engine.dialect.name != "sqlite":
+            logger.debug("Keyword search is only available on SQLite")
+            return []
+        match = self._fts_query(query)
+        if not match:
+            return []
+
+        statement = (
+            select(ProcessedArticle.url)
+            .join(FTS_TABLE, FTS_TABLE.c.url == ProcessedArticle.url)
+            .where(text("article_fts MATCH :match").bindparams(match=match))
+        )
+        if filters:
+            if filters.category is not None:
+                statement = statement.where(
+                    ProcessedArticle.category == filters.category
+                )
+            if filters.source is not None:
+                statement = statement.where(ProcessedArticle.source == filters.source)
+            if filters.published_after is not None:
+                statement = statement.where(
+                    ProcessedArticle.published_at
+                    >= self._naive_utc(filters.published_after)
+                )
+            if filters.published_before is not None:
+                statement = statement.where(
+                    ProcessedArticle.published_at
+                    <= self._naive_utc(filters.published_before)
+                )
+        statement = statement.order_by(FTS_RANK).limit(limit)
+
+        async with self.read_session() as session:
             result = await session.execute(statement)
             return list(result.scalars().all())
+
+    async def get_embeddings(self, urls: Iterable[str]) -> Dict[str, List[float]]:
+        urls = list(set(urls))
+        embeddings: Dict[str, List[float]] = {}
+        async with self.read_session() as session:
+            for start in range(0, len(urls), URL_QUERY_CHUNK_SIZE):
+                chunk = urls[start : start + URL_QUERY_CHUNK_SIZE]
+                statement = select(
+                    ProcessedArticle.url, ProcessedArticle.embedding
+                ).where(
+                    ProcessedArticle.url.in_(chunk),
+                    ProcessedArticle.embedding.is_not(None),
+                )
+                result = await session.execute(statement)
+                embeddings.update(
+                    (url, embedding) for url, embedding in result.all() if embedding
+                )
+        return embeddings
+
+    async def get_labeled_embeddings(
+        self, limit: int = 5000
+    ) -> List[Tuple[NewsCategory, List[float]]]:
+        async with self.read_session() as session:
+            statement = (
+                select(ProcessedArticle.category, ProcessedArticle.embedding)
+                .where(
+                    ProcessedArticle.embedding.is_not(None),
+                    # Training on its own guesses would lock in its mistakes
+                    or_(
+                        ProcessedArticle.category_source.is_(None),
+                        ProcessedArticle.category_source != LOCAL_CATEGORY_SOURCE,
+                    ),
+                )
+                .order_by(ProcessedArticle.created_at.desc())
+                .limit(limit)
+            )
+            result = await session.execute(statement)
+            # JSON columns may hold a JSON null rather than SQL NULL
+            return [
+                (category, embedding)
+                for category, embedding in result.all()
+                if embedding
+            ]
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+from typing import Iterable
+
+
+class KnownURLCache:
+    """
+    Bounded LRU set of article URLs known to be stored.
+    Articles are never deleted, so a cache hit is authoritative and only
+    URLs missing from the cache have to be checked against the database.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._urls: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, url: str) -> bool:
+        if url in self._urls:
+            self._urls.move_to_end(url)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def add(self, url: str) -> None:
+        self._urls[url] = None
+        self._urls.move_to_end(url)
+        while len(self._urls) > self.max_size:
+            self._urls.popitem(last=False)
+
+    def update(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self.add(url)
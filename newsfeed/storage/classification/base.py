@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from newsfeed.models import NewsCategory
+
+
+class ClassificationCache(ABC):
+    """Interface for persisting classification results by content key."""
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> Dict[str, NewsCategory]:
+        """Returns cached categories for the keys that have a live entry."""
+        pass
+
+    @abstractmethod
+    async def put_many(self, entries: Dict[str, NewsCategory]) -> None:
+        """Stores (or refreshes) categories for the given keys."""
+        pass
+
+    @abstractmethod
+    async def evict(self) -> int:
+        """Removes expired and excess entries, returning how many were removed."""
+        pass
@@ -0,0 +1,99 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import select
+
+from newsfeed.models import ClassificationCacheEntry, NewsCategory
+from newsfeed.storage.classification.base import ClassificationCache
+
+logger = logging.getLogger(__name__)
+
+KEY_QUERY_CHUNK_SIZE = 500
+
+
+class SQLClassificationCache(ClassificationCache):
+    """
+    Classification cache stored in the same SQL database as the articles.
+    Entries expire after `ttl_hours` and the table is capped at `max_entries`,
+    dropping the oldest entries first.
+    """
+
+    def __init__(
+        self, engine: AsyncEngine, ttl_hours: float = 720, max_entries: int = 50000
+    ):
+        self.engine = engine
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max_entries
+        self.async_session = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    async def get_many(self, keys: List[str]) -> Dict[str, NewsCategory]:
+        if not keys:
+            return {}
+
+        cutoff = datetime.now() - self.ttl
+        found: Dict[str, NewsCategory] = {}
+        async with self.async_session() as session:
+            for start in range(0, len(keys), KEY_QUERY_CHUNK_SIZE):
+                chunk = keys[start : start + KEY_QUERY_CHUNK_SIZE]
+                statement = select(
+                    ClassificationCacheEntry.key, ClassificationCacheEntry.category
+                ).where(
+                    ClassificationCacheEntry.key.in_(chunk),
+                    ClassificationCacheEntry.created_at >= cutoff,
+                )
+                result = await session.execute(statement)
+                found.update({key: category for key, category in result.all()})
+        return found
+
+    async def put_many(self, entries: Dict[str, NewsCategory]) -> None:
+        if not entries:
+            return
+
+        now = datetime.now()
+        async with self.async_session() as session:
+            for key, category in entries.items():
+                await session.merge(
+                    ClassificationCacheEntry(key=key, category=category, created_at=now)
+                )
+            await session.commit()
+
+        await self.evict()
+
+    async def evict(self) -> int:
+        cutoff = datetime.now() - self.ttl
+        async with self.async_session() as session:
+            result = await session.execute(
+                delete(ClassificationCacheEntry).where(
+                    ClassificationCacheEntry.created_at < cutoff
+                )
+            )
+            removed = result.rowcount or 0
+
+            count = await session.scalar(
+                select(func.count()).select_from(ClassificationCacheEntry)
+            )
+            excess = (count or 0) - self.max_entries
+            if excess > 0:
+                oldest = (
+                    select(ClassificationCacheEntry.key)
+                    .order_by(ClassificationCacheEntry.created_at)
+                    .limit(excess)
+                )
+                result = await session.execute(
+                    delete(ClassificationCacheEntry).where(
+                        ClassificationCacheEntry.key.in_(oldest)
+                    )
+                )
+                removed += result.rowcount or 0
+
+            await session.commit()
+
+        if removed:
+            logger.debug(f"Evicted {removed} classification cache entries")
+        return removed
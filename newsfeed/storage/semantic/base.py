@@ -1,9 +1,119 @@
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from newsfeed.models import ProcessedArticle
 
 
+class SearchHit(NamedTuple):
+    # URL of the article, also for hits on one of its passages
+    url: str
+    # Smaller is closer. For normalized embeddings in an L2 space this is
+    # 2 - 2 * cosine similarity
+    distance: float
+    # Text of the matching passage, None for whole-article vectors
+    passage: Optional[str] = None
+
+
+class Passage(NamedTuple):
+    text: str
+    embedding: Sequence[float]
+
+
+# Vector id, embedding and metadata of one stored vector
+IndexRecord = Tuple[str, Sequence[float], Dict[str, Any]]
+
+
+def epoch_seconds(value: datetime) -> float:
+    """
+    Timestamps are stored as numbers so they can be range-filtered.
+    Naive datetimes are UTC, as published dates parsed from feeds are.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def index_metadata(article: ProcessedArticle) -> Dict[str, Any]:
+    """Metadata stored next to each vector, filterable with SearchFilters."""
+    return {
+        "category": article.category.value if article.category else "Other",
+        "title": article.title,
+        "uuid": str(article.id),
+        "source": article.source,
+        "published_at": epoch_seconds(article.published_at),
+    }
+
+
+def index_records(
+    articles: Sequence[ProcessedArticle],
+    passages: Optional[Mapping[str, Sequence[Passage]]] = None,
+) -> List[IndexRecord]:
+    """
+    One vector per passage when the article has passages, with ids
+    "<url>#<n>" and the article URL and passage text in the metadata.
+    Otherwise one vector per article holding its own embedding, keyed by URL.
+    """
+    records: List[IndexRecord] = []
+    for article in articles:
+        article_passages = passages.get(article.url) if passages else None
+        if article_passages:
+            metadata = index_metadata(article)
+            for n, passage in enumerate(article_passages):
+                records.append(
+                    (
+                        f"{article.url}#{n}",
+                        passage.embedding,
+                        {**metadata, "parent_url": article.url, "text": passage.text},
+                    )
+                )
+        elif article.embedding:
+            records.append((article.url, article.embedding, index_metadata(article)))
+    return records
+
+
+def search_hit(vector_id: str, distance: float, metadata: Optional[dict]) -> SearchHit:
+    metadata = metadata or {}
+    return SearchHit(
+        metadata.get("parent_url", vector_id), float(distance), metadata.get("text")
+    )
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """
+    Restricts a search to matching articles, applied by the index itself so
+    `limit` results are returned whenever that many articles match.
+    """
+
+    category: Optional[str] = None
+    source: Optional[str] = None
+    published_after: Optional[datetime] = None
+    published_before: Optional[datetime] = None
+
+    def __bool__(self) -> bool:
+        return any(
+            value is not None
+            for value in (
+                self.category,
+                self.source,
+                self.published_after,
+                self.published_before,
+            )
+        )
+
+
 class VectorIndex(ABC):
     """Interface for Vector Storage operations."""
 
@@ -13,6 +123,46 @@ class VectorIndex(ABC):
         pass
 
     @abstractmethod
-    def search(self, query_embedding: List[float], limit: int = 10) -> List[str]:
-        """Returns list of article URLs matching the query embedding."""
+    def index_many(
+        self,
+        articles: List[ProcessedArticle],
+        passages: Optional[Mapping[str, Sequence[Passage]]] = None,
+    ) -> None:
+        """
+        Upserts several articles' embeddings in as few calls as possible.
+        Articles with an entry in `passages` (keyed by URL) are stored as one
+        vector per passage instead, see index_records().
+        """
         pass
+
+    @abstractmethod
+    def delete(self, urls: Iterable[str]) -> None:
+        """
+        Removes the given articles and their passages from the index, unknown
+        URLs are ignored.
+        """
+        pass
+
+    @abstractmethod
+    def search_many(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchHit]]:
+        """
+        Returns the nearest vectors matching `filters` for each query
+        embedding, closest first. One list of hits per query, in query order.
+        Passages of the same article are separate hits.
+        """
+        pass
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[str]:
+        """Returns list of article URLs matching the query embedding."""
+        hits = self.search_many([query_embedding], limit, filters)[0]
+        return [hit.url for hit in hits]
@@ -1,17 +1,25 @@
 import logging
-from typing import List
-
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+from typing import Iterable, List, Mapping, Optional, Sequence
 
 from newsfeed.models import ProcessedArticle
-from newsfeed.storage.semantic.base import VectorIndex
+from newsfeed.storage.semantic.base import (
+    Passage,
+    SearchFilters,
+    SearchHit,
+    VectorIndex,
+    epoch_seconds,
+    index_records,
+    search_hit,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class ChromaVectorIndex(VectorIndex):
-    def __init__(self, path: str):
+    def __init__(self, path: str, max_batch_size: Optional[int] = None):
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+
         logger.info(f"Initializing ChromaDB at path: {path}")
         try:
             self.client = chromadb.PersistentClient(
@@ -23,6 +31,33 @@ class ChromaVectorIndex(VectorIndex):
             logger.critical(f"Failed to initialize ChromaDB: {e}")
             raise
 
+        # Chroma rejects upserts and queries larger than this, so bigger
+        # requests are split into chunks of at most this many items
+        server_limit = self.client.get_max_batch_size()
+        self.max_batch_size = min(max_batch_size or server_limit, server_limit)
+
+    def _chunks(self, items: Sequence) -> List[Sequence]:
+        size = self.max_batch_size
+        return [items[start : start + size] for start in range(0, len(items), size)]
+
+    @staticmethod
+    def _where(filters: Optional[SearchFilters]) -> Optional[dict]:
+        if not filters:
+            return None
+        clauses = []
+        if filters.category is not None:
+            clauses.append({"category": filters.category})
+        if filters.source is not None:
+            clauses.append({"source": filters.source})
+        if filters.published_after is not None:
+            after = epoch_seconds(filters.published_after)
+            clauses.append({"published_at": {"$gte": after}})
+        if filters.published_before is not None:
+            before = epoch_seconds(filters.published_before)
+            clauses.append({"published_at": {"$lte": before}})
+        # Chroma rejects an $and with a single clause
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
     def index(self, article: ProcessedArticle) -> None:
         if not article.embedding:
             logger.warning(
@@ -30,34 +65,74 @@ class ChromaVectorIndex(VectorIndex):
             )
             return
 
+        self.index_many([article])
+
+    def index_many(
+        self,
+        articles: List[ProcessedArticle],
+        passages: Optional[Mapping[str, Sequence[Passage]]] = None,
+    ) -> None:
+        records = index_records(articles, passages)
+        if not records:
+            return
+
         try:
-            self.collection.upsert(
-                ids=[article.url],
-                embeddings=[article.embedding],
-                metadatas=[
-                    {
-                        "category": article.category.value
-                        if article.category
-                        else "Other",
-                        "title": article.title,
-                        "uuid": str(article.id),
-                    }
-                ],
+            for chunk in self._chunks(records):
+                ids, embeddings, metadatas = zip(*chunk)
+                self.collection.upsert(
+                    ids=list(ids),
+                    embeddings=list(embeddings),
+                    metadatas=list(metadatas),
+                )
+            logger.debug(
+                f"Indexed {len(articles)} articles ({len(records)} vectors) in ChromaDB"
             )
-            logger.debug(f"Indexed article in ChromaDB: {article.title}")
         except Exception as e:
-            logger.error(f"Failed to index article '{article.title}' in ChromaDB: {e}")
+            logger.error(f"Failed to index {len(articles)} articles in ChromaDB: {e}")
             raise
 
-    def search(self, query_embedding: List[float], limit: int = 10) -> List[str]:
+    def delete(self, urls: Iterable[str]) -> None:
+        urls = list(urls)
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding], n_results=limit
-            )
-            # Flatten results
-            ids = results["ids"][0] if results["ids"] else []
-            logger.debug(f"ChromaDB search returned {len(ids)} results.")
-            return ids
+            for chunk in self._chunks(urls):
+                self.collection.delete(ids=list(chunk))
+                self.collection.delete(where={"parent_url": {"$in": list(chunk)}})
         except Exception as e:
-            logger.error(f"Error searching ChromaDB: {e}")
+            logger.error(f"Failed to delete {len(urls)} articles from ChromaDB: {e}")
+            raise
+
+    def search_many(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchHit]]:
+        if len(query_embeddings) == 0:
             return []
+
+        hits: List[List[SearchHit]] = []
+        where = self._where(filters)
+        try:
+            for chunk in self._chunks(query_embeddings):
+                results = self.collection.query(
+                    query_embeddings=list(chunk),
+                    n_results=limit,
+                    where=where,
+                    include=["distances", "metadatas"],
+                )
+                for ids, distances, metadatas in zip(
+                    results["ids"], results["distances"], results["metadatas"]
+                ):
+                    hits.append(
+                        [
+                            search_hit(vector_id, distance, metadata)
+                            for vector_id, distance, metadata in zip(
+                                ids, distances, metadatas
+                            )
+                        ]
+                    )
+            logger.debug(f"ChromaDB searched {len(query_embeddings)} queries.")
+            return hits
+        except Exception as e:
+            logger.error(f"Error searching ChromaDB: {e}")
+            return [[] for _ in query_embeddings]
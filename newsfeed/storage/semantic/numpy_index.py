@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from newsfeed.models import ProcessedArticle
+from newsfeed.storage.semantic.base import (
+    Passage,
+    SearchFilters,
+    SearchHit,
+    VectorIndex,
+    epoch_seconds,
+    index_records,
+    search_hit,
+)
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+
+# Queries scored per matrix multiplication, bounds the (queries x rows) buffer
+QUERY_CHUNK_SIZE = 16
+
+
+class NumpyVectorIndex(VectorIndex):
+    """
+    Brute-force index over a memory-mapped float32 matrix.
+
+    Files are append-only: vectors are L2-normalized and appended to the
+    vectors file, the id (the article URL, or "<url>#<n>" for passages) and
+    metadata of each row to a JSON lines sidecar, and the numbers of rows
+    replaced by an upsert or deleted to a tombstone file. compact() writes a
+    new generation of the files without the dead rows and switches to it by
+    rewriting meta.json.
+
+    Distances match Chroma's L2 space on normalized vectors: 2 - 2 * cosine.
+    """
+
+    def __init__(self, path: str):
+        logger.info(f"Initializing NumPy vector index at path: {path}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.dim: Optional[int] = None
+        self.generation = 0
+        meta_path = self.path / META_FILE
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            self.dim = meta["dim"]
+            self.generation = meta["generation"]
+        self._load()
+        logger.info(f"NumPy vector index ready with {len(self)} vectors.")
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.path / f"vectors.{self.generation}.f32"
+
+    @property
+    def rows_path(self) -> Path:
+        return self.path / f"rows.{self.generation}.jsonl"
+
+    @property
+    def tombstones_path(self) -> Path:
+        return self.path / f"tombstones.{self.generation}.i64"
+
+    def _load(self) -> None:
+        self._ids: List[str] = []
+        self._metadata: List[dict] = []
+        row_ends: List[int] = []
+        if self.rows_path.exists():
+            with self.rows_path.open("rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn write, the row was never completed
+                    row = json.loads(line)
+                    self._ids.append(row.pop("url"))
+                    self._metadata.append(row)
+                    row_ends.append(f.tell())
+
+        stored_vectors = 0
+        if self.dim is not None and self.vectors_path.exists():
+            stored_vectors = self.vectors_path.stat().st_size // (self.dim * 4)
+
+        # A crash between the two appends leaves a partial tail in one of the
+        # files, cut both back to the rows they have in common
+        self._size = min(len(self._ids), stored_vectors)
+        del self._ids[self._size :]
+        del self._metadata[self._size :]
+        if self.rows_path.exists():
+            os.truncate(self.rows_path, row_ends[self._size - 1] if self._size else 0)
+        if self.vectors_path.exists():
+            os.truncate(self.vectors_path, self._size * (self.dim or 0) * 4)
+
+        self._alive = np.ones(self._size, dtype=bool)
+        if self.tombstones_path.exists():
+            dead = np.fromfile(self.tombstones_path, dtype=np.int64)
+            self._alive[dead[dead < self._size]] = False
+
+        self._row_by_id: Dict[str, int] = {
+            vector_id: row
+            for row, vector_id in enumerate(self._ids)
+            if self._alive[row]
+        }
+        self._matrix: Optional[np.ndarray] = None
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def _write_meta(self) -> None:
+        meta_tmp = self.path / (META_FILE + ".tmp")
+        meta_tmp.write_text(
+            json.dumps({"dim": self.dim, "generation": self.generation})
+        )
+        os.replace(meta_tmp, self.path / META_FILE)
+
+    def _vectors(self) -> np.ndarray:
+        """Memory map of all stored rows, re-opened after appends."""
+        if self._matrix is None or len(self._matrix) != self._size:
+            if self._size == 0:
+                self._matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(
+                    self.vectors_path,
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(self._size, self.dim),
+                )
+        return self._matrix
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _column(self, name: str) -> np.ndarray:
+        """Metadata field of every row as an array, rebuilt after appends."""
+        column = self._columns.get(name)
+        if column is None or len(column) != self._size:
+            values = [row.get(name) for row in self._metadata]
+            # Rows indexed before a field existed hold NaN, matching no range
+            dtype = float if name == "published_at" else object
+            column = self._columns[name] = np.array(values, dtype=dtype)
+        return column
+
+    def _filter_mask(self, filters: SearchFilters) -> np.ndarray:
+        mask = np.ones(self._size, dtype=bool)
+        if filters.category is not None:
+            mask &= self._column("category") == filters.category
+        if filters.source is not None:
+            mask &= self._column("source") == filters.source
+        if filters.published_after is not None:
+            after = epoch_seconds(filters.published_after)
+            mask &= self._column("published_at") >= after
+        if filters.published_before is not None:
+            before = epoch_seconds(filters.published_before)
+            mask &= self._column("published_at") <= before
+        return mask
+
+    def _tombstone(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        self._alive[rows] = False
+        with self.tombstones_path.open("ab") as f:
+            f.write(np.asarray(rows, dtype=np.int64).tobytes())
+
+    def index(self, article: ProcessedArticle) -> None:
+        if not article.embedding:
+            logger.warning(
+                f"Skipping index for article with no embedding: {article.title}"
+            )
+            return
+
+        self.index_many([article])
+
+    def index_many(
+        self,
+        articles: List[ProcessedArticle],
+        passages: Optional[Mapping[str, Sequence[Passage]]] = None,
+    ) -> None:
+        # Later records win when an id is repeated, as with sequential upserts
+        by_id = {
+            vector_id: (embedding, metadata)
+            for vector_id, embedding, metadata in index_records(articles, passages)
+        }
+        if not by_id:
+            return
+
+        vectors = np.asarray([e for e, _ in by_id.values()], dtype=np.float32)
+        metadata = [m for _, m in by_id.values()]
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match "
+                    f"index dimension {self.dim}"
+                )
+
+            with self.vectors_path.open("ab") as f:
+                f.write(self._normalize(vectors).tobytes())
+            with self.rows_path.open("a", encoding="utf-8") as f:
+                for vector_id, row in zip(by_id, metadata):
+                    f.write(json.dumps({"url": vector_id, **row}) + "\n")
+
+            self._tombstone([self._row_by_id[i] for i in by_id if i in self._row_by_id])
+            start = self._size
+            self._size += len(by_id)
+            self._alive = np.concatenate([self._alive, np.ones(len(by_id), dtype=bool)])
+            self._ids.extend(by_id)
+            self._metadata.extend(metadata)
+            for offset, vector_id in enumerate(by_id):
+                self._row_by_id[vector_id] = start + offset
+        logger.debug(
+            f"Indexed {len(articles)} articles ({len(by_id)} vectors) in NumPy index"
+        )
+
+    def delete(self, urls: Iterable[str]) -> None:
+        urls = set(urls)
+        with self._lock:
+            rows = [self._row_by_id.pop(url) for url in urls if url in self._row_by_id]
+            # Passages of the articles, deletes are rare enough for a full scan
+            for row, metadata in enumerate(self._metadata):
+                if self._alive[row] and metadata.get("parent_url") in urls:
+                    del self._row_by_id[self._ids[row]]
+                    rows.append(row)
+            self._tombstone(rows)
+
+    def search_many(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchHit]]:
+        if len(query_embeddings) == 0:
+            return []
+
+        with self._lock:
+            matrix = self._vectors()
+            alive = self._alive.copy()
+            if filters:
+                alive &= self._filter_mask(filters)
+            ids = self._ids
+            metadata = self._metadata
+        matching = int(alive.sum())
+        k = min(limit, matching)
+        if k <= 0:
+            return [[] for _ in query_embeddings]
+
+        # A filter matching few rows only scores those, otherwise dead and
+        # filtered out rows are masked in the full product
+        candidates = None
+        if matching < len(alive) // 2:
+            candidates = np.flatnonzero(alive)
+            matrix = matrix[candidates]
+
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+        hits: List[List[SearchHit]] = []
+        for start in range(0, len(queries), QUERY_CHUNK_SIZE):
+            scores = queries[start : start + QUERY_CHUNK_SIZE] @ matrix.T
+            if candidates is None:
+                scores[:, ~alive] = -np.inf
+            # Unordered top k per query in linear time, then sort only those
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            if candidates is not None:
+                top = candidates[top]
+            for rows, row_scores in zip(top, top_scores):
+                hits.append(
+                    [
+                        search_hit(ids[row], 2.0 - 2.0 * score, metadata[row])
+                        for row, score in zip(rows, row_scores)
+                    ]
+                )
+        return hits
+
+    def compact(self) -> int:
+        """Rewrites the index without dead rows, returns how many were dropped."""
+        with self._lock:
+            dropped = self._size - len(self._row_by_id)
+            if dropped == 0:
+                return 0
+
+            keep = np.flatnonzero(self._alive)
+            vectors = np.asarray(self._vectors()[keep])
+            ids = [self._ids[row] for row in keep]
+            metadata = [self._metadata[row] for row in keep]
+            self._matrix = None
+
+            # The new generation only becomes visible once meta.json points at
+            # it, a crash before that leaves the current files untouched
+            old_files = [self.vectors_path, self.rows_path, self.tombstones_path]
+            self.generation += 1
+            vectors.tofile(self.vectors_path)
+            with self.rows_path.open("w", encoding="utf-8") as f:
+                for vector_id, row in zip(ids, metadata):
+                    f.write(json.dumps({"url": vector_id, **row}) + "\n")
+            self._write_meta()
+            for old in old_files:
+                old.unlink(missing_ok=True)
+
+            self._size = len(keep)
+            self._ids = ids
+            self._metadata = metadata
+            self._alive = np.ones(self._size, dtype=bool)
+            self._row_by_id = {vector_id: row for row, vector_id in enumerate(ids)}
+            self._columns = {}
+        logger.info(f"Compacted NumPy index, dropped {dropped} dead rows")
+        return dropped
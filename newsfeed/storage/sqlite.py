@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """
+    Connection pragmas for SQLite databases.
+    WAL lets readers run while the writer commits, and synchronous=NORMAL is
+    durable across application crashes in WAL mode (only a power loss can drop
+    the latest commits).
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kb: int = 65536
+    mmap_size_mb: int = 256
+    busy_timeout_ms: int = 5000
+
+    def __post_init__(self):
+        if self.journal_mode.upper() not in JOURNAL_MODES:
+            raise ValueError(f"Unknown SQLite journal mode: {self.journal_mode}")
+        if self.synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown SQLite synchronous mode: {self.synchronous}")
+
+    def pragmas(self, read_only: bool = False) -> List[str]:
+        statements = [
+            f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}",
+            f"PRAGMA synchronous = {self.synchronous.upper()}",
+            # Negative values are in KiB rather than pages
+            f"PRAGMA cache_size = {-int(self.cache_size_kb)}",
+            f"PRAGMA mmap_size = {int(self.mmap_size_mb) * 1024 * 1024}",
+        ]
+        if read_only:
+            statements.append("PRAGMA query_only = ON")
+        else:
+            # The journal mode is stored in the database file, set by the writer
+            statements.insert(0, f"PRAGMA journal_mode = {self.journal_mode.upper()}")
+        return statements
+
+
+def is_sqlite_file(database_url: str) -> bool:
+    """True for SQLite databases on disk, which can be opened more than once."""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return False
+    database = url.database or ""
+    return database not in ("", ":memory:") and url.query.get("mode") != "memory"
+
+
+def apply_sqlite_profile(
+    engine: AsyncEngine, profile: SQLiteProfile, read_only: bool = False
+) -> None:
+    """Runs the profile's pragmas on every new connection of `engine`."""
+    statements = profile.pragmas(read_only=read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
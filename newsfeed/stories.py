@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from newsfeed.models import NewsCategory
+from newsfeed.storage.semantic.base import epoch_seconds
+
+
+@dataclass(frozen=True)
+class StoryClustering:
+    """
+    Settings of the assignment of new articles to stories: an article joins
+    the story of the closest article published within `window_hours` of it
+    whose embedding is at most `max_distance` away (2 - 2 * cosine, as
+    returned by VectorIndex, so 0.3 is a cosine similarity of 0.85).
+    """
+
+    max_distance: float = 0.3
+    window_hours: float = 48
+    # Nearest stored vectors checked per new article
+    candidates: int = 5
+    # Articles joining a stored story take its category instead of being
+    # classified again
+    reuse_category: bool = True
+
+    def within_window(self, a: Optional[datetime], b: Optional[datetime]) -> bool:
+        # Undated articles are matched on their embedding alone
+        if a is None or b is None:
+            return True
+        return abs(epoch_seconds(a) - epoch_seconds(b)) <= self.window_hours * 3600
+
+
+class StoryMatch(NamedTuple):
+    story_id: UUID
+    # Category of the stored article matched and what assigned it, None for
+    # copies within a batch
+    category: Optional[NewsCategory] = None
+    category_source: Optional[str] = None
+
+
+def batch_story_leaders(
+    embeddings: Sequence[Sequence[float]],
+    published: Sequence[Optional[datetime]],
+    clustering: StoryClustering,
+) -> List[Optional[int]]:
+    """
+    Groups copies of a story that arrive in the same batch: for each
+    embedding, the position of the first earlier one close enough to it, or
+    None when it starts a group of its own.
+    """
+    if len(embeddings) == 0:
+        return []
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = vectors / norms
+    distances = 2.0 - 2.0 * (vectors @ vectors.T)
+
+    leaders: List[Optional[int]] = []
+    for j in range(len(vectors)):
+        leader = None
+        for earlier in range(j):
+            # Followers point at their group's first article
+            if leaders[earlier] is not None:
+                continue
+            if distances[j, earlier] <= clustering.max_distance and (
+                clustering.within_window(published[j], published[earlier])
+            ):
+                leader = earlier
+                break
+        leaders.append(leader)
+    return leaders
@@ -0,0 +1,200 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from html.parser import HTMLParser
+import re
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+
+class HTMLTextExtractor(ABC):
+    """
+    Abstract Base Class for turning an HTML fragment into plain text.
+    Implementations return the text nodes of the document, stripped, with
+    empty ones dropped and the rest joined by newlines.
+    """
+
+    @abstractmethod
+    def extract(self, html_content: str) -> str:
+        """Returns the visible text of `html_content`."""
+        pass
+
+
+class BeautifulSoupTextExtractor(HTMLTextExtractor):
+    """
+    Reference implementation that builds a full BeautifulSoup tree.
+    """
+
+    def extract(self, html_content: str) -> str:
+        soup = BeautifulSoup(html_content, "html.parser")
+        return soup.get_text(separator="\n", strip=True)
+
+
+# Elements that are closed as soon as they are opened and never hold text
+VOID_ELEMENTS = frozenset(
+    {
+        "area",
+        "base",
+        "basefont",
+        "bgsound",
+        "br",
+        "col",
+        "command",
+        "embed",
+        "frame",
+        "hr",
+        "image",
+        "img",
+        "input",
+        "isindex",
+        "keygen",
+        "link",
+        "menuitem",
+        "meta",
+        "nextid",
+        "param",
+        "source",
+        "spacer",
+        "track",
+        "wbr",
+    }
+)
+
+# Text anywhere inside these elements is not part of `get_text()`
+HIDDEN_TEXT_ELEMENTS = frozenset({"script", "style", "template"})
+
+_DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+
+class _TextCollector(HTMLParser):
+    """
+    Tokenizer callbacks that reproduce BeautifulSoup's text segmentation
+    without building a tree: consecutive character data forms one string,
+    every tag, comment or declaration ends it.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.parts: List[str] = []
+        self._buffer: List[str] = []
+        self._open_tags: List[str] = []
+        self._hidden_depth = 0
+        # Void elements written as `<br>`, a later `</br>` is silently dropped
+        self._closed_void_tags: List[str] = []
+
+    def _end_data(self, visible: bool = False) -> None:
+        if not self._buffer:
+            return
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        if text and (visible or not self._hidden_depth):
+            self.parts.append(text)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._end_data()
+        if tag in VOID_ELEMENTS:
+            self._closed_void_tags.append(tag)
+            return
+        self._open_tags.append(tag)
+        if tag in HIDDEN_TEXT_ELEMENTS:
+            self._hidden_depth += 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._end_data()
+
+    def handle_endtag(self, tag: str):
+        if tag in self._closed_void_tags:
+            self._closed_void_tags.remove(tag)
+            return
+
+        self._end_data()
+        # An end tag closes the most recent matching element and everything
+        # opened after it, unmatched end tags are ignored
+        for index in range(len(self._open_tags) - 1, -1, -1):
+            if self._open_tags[index] == tag:
+                closed = self._open_tags[index:]
+                del self._open_tags[index:]
+                self._hidden_depth -= sum(
+                    1 for name in closed if name in HIDDEN_TEXT_ELEMENTS
+                )
+                return
+
+    def handle_data(self, data: str):
+        self._buffer.append(data)
+
+    def handle_entityref(self, name: str):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self._buffer.append(character if character is not None else f"&{name}")
+
+    def handle_charref(self, name: str):
+        base, pattern = 10, _DECIMAL_REFERENCE
+        if name[:1] in ("x", "X"):
+            name, base, pattern = name[1:], 16, _HEX_REFERENCE
+
+        try:
+            number, extra = int(name, base), ""
+        except ValueError:
+            match = pattern.search(name)
+            if match is None:
+                self._buffer.append(name)
+                return
+            number, extra = int(match.group(1), base), match.group(2)
+
+        character, _ = UnicodeDammit.numeric_character_reference(number)
+        self._buffer.append(character + extra)
+
+    def handle_comment(self, data: str):
+        self._end_data()
+
+    def handle_decl(self, decl: str):
+        self._end_data()
+
+    def handle_pi(self, data: str):
+        self._end_data()
+
+    def unknown_decl(self, data: str):
+        self._end_data()
+        # CDATA sections are text, even inside hidden elements, other
+        # declarations are not
+        if data.upper().startswith("CDATA["):
+            self._buffer.append(data[len("CDATA[") :])
+            self._end_data(visible=True)
+
+    def close(self):
+        super().close()
+        self._end_data()
+
+
+class StreamingTextExtractor(HTMLTextExtractor):
+    """
+    Fast path that collects text straight from `html.parser` tokenizer events.
+    Produces the same output as BeautifulSoupTextExtractor, at a fraction of
+    the cost, because no element objects or tree are created.
+    """
+
+    def extract(self, html_content: str) -> str:
+        if "<" not in html_content and "&" not in html_content:
+            return html_content.strip()
+
+        collector = _TextCollector()
+        collector.feed(html_content)
+        collector.close()
+        return "\n".join(collector.parts)
+
+
+TEXT_EXTRACTORS = {
+    "bs4": BeautifulSoupTextExtractor,
+    "streaming": StreamingTextExtractor,
+}
+
+
+@lru_cache
+def get_text_extractor(name: str = "streaming") -> HTMLTextExtractor:
+    try:
+        return TEXT_EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown HTML extractor '{name}', expected one of {sorted(TEXT_EXTRACTORS)}"
+        ) from None
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Loads slow components (embedding model, vector index, ...) one after the
+    other in a worker thread once the app has started, and tracks which of
+    them are ready. Code needing them awaits `wait()` rather than loading
+    them itself, so no request or job pays the load or blocks the event loop.
+    """
+
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, components: Dict[str, Callable[[], Any]]):
+        # Loaded in order, so a component may build on the ones before it
+        self.components = components
+        self.status: Dict[str, str] = {name: self.PENDING for name in components}
+        self.errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return all(status == self.READY for status in self.status.values())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def wait(self) -> None:
+        """Returns once warm-up has finished, or at once if it never started."""
+        if self._task is not None:
+            # Shielded so a cancelled request does not cancel the warm-up
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {"ready": self.ready, "components": dict(self.status)}
+        if self.errors:
+            report["errors"] = dict(self.errors)
+        return report
+
+    async def _run(self) -> None:
+        for name, load in self.components.items():
+            self.status[name] = self.LOADING
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(load)
+            except Exception as e:
+                # Left to fail again, and be reported, where it is first used
+                self.status[name] = self.FAILED
+                self.errors[name] = str(e)
+                logger.error(f"Failed to warm up {name}: {e}")
+                continue
+            self.status[name] = self.READY
+            logger.info(f"Warmed up {name} in {time.perf_counter() - start:.1f}s")
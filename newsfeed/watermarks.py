@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+import threading
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from newsfeed.models import RawArticle
+
+
+@dataclass(frozen=True)
+class SourceWatermark:
+    """
+    Snapshot of what has already been ingested from one source.
+    Plain values only, so it can be sent to a parser worker process.
+    """
+
+    newest_published: Optional[datetime] = None
+    recent_links: FrozenSet[str] = field(default_factory=frozenset)
+    # Articles of the last batch are waiting to be retried, so the feed must
+    # be fetched in full even if the server reports it unchanged
+    pending_retry: bool = False
+
+    def is_seen(self, link: str, published: Optional[datetime] = None) -> bool:
+        """
+        True when an entry was already ingested.
+        `published` is only passed for feeds listing entries chronologically,
+        anything strictly older than the newest ingested entry is then skipped.
+        Entries sharing that timestamp are kept unless their link is known.
+        """
+        if link in self.recent_links:
+            return True
+        return (
+            published is not None
+            and self.newest_published is not None
+            and published < self.newest_published
+        )
+
+
+class _SourceState:
+    def __init__(self):
+        self.newest_published: Optional[datetime] = None
+        self.links: OrderedDict[str, None] = OrderedDict()
+        self.pending_retry = False
+
+
+class WatermarkStore:
+    """
+    In-memory high-water marks per source, keyed by feed URL.
+    After a restart every entry is offered again and deduplicated by the service.
+    """
+
+    def __init__(self, max_links: int = 1000):
+        self.max_links = max(0, max_links)
+        self._sources: Dict[str, _SourceState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str) -> Optional[SourceWatermark]:
+        with self._lock:
+            state = self._sources.get(source)
+            if state is None:
+                return None
+            return SourceWatermark(
+                state.newest_published, frozenset(state.links), state.pending_retry
+            )
+
+    def advance(
+        self,
+        source: str,
+        seen: Iterable[RawArticle],
+        retry: Iterable[RawArticle] = (),
+        fetched_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Records ingested articles of a source.
+        Articles in `retry` (e.g. failed to process) are not marked as seen and
+        keep the timestamp mark from moving past them, so they are fetched again.
+        Entries without a date are stamped with the parse time by the fetchers,
+        so publish times at or after `fetched_at` never move the mark.
+        """
+        seen, retry = list(seen), list(retry)
+        oldest_retry = min(
+            (a.published_at for a in retry if a.published_at is not None),
+            default=None,
+        )
+
+        with self._lock:
+            state = self._sources.setdefault(source, _SourceState())
+            # Failed articles are offered again by the next fetch, so each
+            # batch replaces the flag
+            state.pending_retry = bool(retry)
+
+            for article in seen:
+                state.links.pop(article.url, None)
+                state.links[article.url] = None
+            while len(state.links) > self.max_links:
+                state.links.popitem(last=False)
+
+            newest = max(
+                (
+                    a.published_at
+                    for a in seen
+                    if a.published_at is not None
+                    and (fetched_at is None or a.published_at < fetched_at)
+                ),
+                default=None,
+            )
+            if newest is None:
+                return
+            if oldest_retry is not None:
+                newest = min(newest, oldest_retry)
+            if state.newest_published is None or newest > state.newest_published:
+                state.newest_published = newest
@@ -6,10 +6,11 @@ from unittest.mock import MagicMock, AsyncMock, patch
 from fastapi.testclient import TestClient
 from newsfeed.app import app
 from newsfeed.config import get_settings
-from newsfeed.dependencies import get_news_service
+from newsfeed.dependencies import get_news_service, get_repository
 from newsfeed.services.news_service import NewsService
 from newsfeed.storage import SQLArticleRepository
-from newsfeed.models import NewsCategory, ProcessedArticle
+from newsfeed.models import NewsCategory, ProcessedArticle, SearchMode
+from newsfeed.warmup import Warmup
 
 # Constants for test paths
 TEST_DB_PATH = "./test_data/test_newsfeed.db"
@@ -86,6 +87,24 @@ def test_health_check():
     assert response.json() == {"status": "healthy"}
 
 
+def test_ready_reports_component_status():
+    warmup = Warmup({"embedder": MagicMock(), "vector_index": MagicMock()})
+    warmup.status["embedder"] = Warmup.READY
+
+    with patch("newsfeed.app.get_warmup", return_value=warmup):
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json() == {
+            "ready": False,
+            "components": {"embedder": "ready", "vector_index": "pending"},
+        }
+
+        warmup.status["vector_index"] = Warmup.READY
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+
 def test_get_articles_empty():
     response = client.get("/api/v1/articles")
     assert response.status_code == 200
@@ -141,3 +160,117 @@ def test_search_endpoint():
         assert len(data) == 1
         assert data[0]["title"] == "AI News"
         mock_search.assert_called_once()
+
+
+def test_search_endpoint_filters():
+    with patch(
+        "newsfeed.services.news_service.NewsService.search_articles",
+        new_callable=AsyncMock,
+    ) as mock_search:
+        mock_search.return_value = []
+
+        response = client.get(
+            "/api/v1/articles/search?query=AI&category=Cybersecurity&source=ars"
+            "&published_after=2024-01-01T00:00:00&mode=hybrid"
+        )
+
+        assert response.status_code == 200
+        assert mock_search.call_args[0][4] == SearchMode.HYBRID
+        filters = mock_search.call_args[0][3]
+        assert filters.category == NewsCategory.CYBERSECURITY.value
+        assert filters.source == "ars"
+        assert filters.published_after == datetime(2024, 1, 1)
+        assert filters.published_before is None
+
+
+def test_search_endpoint_collapse_story():
+    with patch(
+        "newsfeed.services.news_service.NewsService.search_articles",
+        new_callable=AsyncMock,
+    ) as mock_search:
+        mock_search.return_value = []
+
+        assert client.get("/api/v1/articles/search?query=AI").status_code == 200
+        assert mock_search.call_args[0][5] is False
+
+        response = client.get("/api/v1/articles/search?query=AI&collapse=story")
+        assert response.status_code == 200
+        assert mock_search.call_args[0][5] is True
+
+        response = client.get("/api/v1/articles/search?query=AI&collapse=nope")
+        assert response.status_code == 422
+
+
+@pytest.fixture
+async def seeded_repo():
+    repo = SQLArticleRepository(get_test_settings().DATABASE_URL)
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=f"http://example.com/{i}",
+                title=f"Article {i}",
+                content="Long article body",
+                category=NewsCategory.AI_EMERGING_TECH,
+                source="test",
+                published_at=datetime(2024, 1, i + 1),
+                metadata_fields={"tags": ["ai"]},
+            )
+            for i in range(2)
+        ]
+    )
+    app.dependency_overrides[get_repository] = lambda: repo
+    yield repo
+    app.dependency_overrides.pop(get_repository)
+    await repo.engine.dispose()
+
+
+def test_list_articles_full_rows(seeded_repo):
+    response = client.get("/api/v1/articles")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [a["title"] for a in data] == ["Article 1", "Article 0"]
+    assert data[0]["content"] == "Long article body"
+    assert data[0]["metadata_fields"] == {"tags": ["ai"]}
+
+
+def test_list_articles_field_projection(seeded_repo):
+    response = client.get("/api/v1/articles?fields=title,url&limit=1")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0].keys() == {"id", "title", "url"}
+    assert data[0]["title"] == "Article 1"
+
+
+def test_list_articles_collapse_story(seeded_repo):
+    response = client.get("/api/v1/articles?collapse=story")
+
+    # Articles saved without a story are each listed
+    assert response.status_code == 200
+    assert [a["title"] for a in response.json()] == ["Article 1", "Article 0"]
+
+
+def test_list_articles_rejects_unknown_field(seeded_repo):
+    response = client.get("/api/v1/articles?fields=title,embedding")
+
+    assert response.status_code == 400
+
+
+def test_list_articles_cursor_pagination(seeded_repo):
+    first = client.get("/api/v1/articles?limit=1&fields=title")
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/api/v1/articles?limit=1&fields=title&cursor={cursor}")
+
+    assert [a["title"] for a in first.json()] == ["Article 1"]
+    assert [a["title"] for a in second.json()] == ["Article 0"]
+    assert second.json()[0].keys() == {"id", "title"}
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_list_articles_rejects_invalid_cursor(seeded_repo):
+    response = client.get("/api/v1/articles?cursor=not-a-cursor")
+
+    assert response.status_code == 400
@@ -0,0 +1,300 @@
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from newsfeed.classification import (
+    CachedNewsClassifier,
+    CentroidNewsClassifier,
+    GeminiNewsClassifier,
+    HybridNewsClassifier,
+)
+from newsfeed.embedding import NewsEmbedder
+from newsfeed.models import NewsCategory
+from newsfeed.storage import SQLArticleRepository, SQLClassificationCache
+
+
+class FakeModel:
+    """Local stand-in for a Gemini model that replays canned responses."""
+
+    def __init__(self, batch_response: str, single_response: str = "Other"):
+        self.batch_response = batch_response
+        self.single_response = single_response
+        self.prompts: List[str] = []
+
+    async def generate_content_async(self, prompt: str):
+        self.prompts.append(prompt)
+        if "JSON array" in prompt:
+            return SimpleNamespace(text=self.batch_response)
+        return SimpleNamespace(text=self.single_response)
+
+    @property
+    def batch_prompts(self) -> List[str]:
+        return [p for p in self.prompts if "JSON array" in p]
+
+    @property
+    def single_prompts(self) -> List[str]:
+        return [p for p in self.prompts if "JSON array" not in p]
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_single_request():
+    model = FakeModel(
+        json.dumps(["Cybersecurity", "Hardware & Devices", "Software & Development"])
+    )
+    classifier = GeminiNewsClassifier(model=model, batch_size=10)
+
+    categories = await classifier.classify_batch(["zero-day", "new GPU", "Python 3.14"])
+
+    assert categories == [
+        NewsCategory.CYBERSECURITY,
+        NewsCategory.HARDWARE_DEVICES,
+        NewsCategory.SOFTWARE_DEVELOPMENT,
+    ]
+    assert len(model.prompts) == 1
+    assert "Article 3:\nPython 3.14" in model.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_falls_back_for_unparsed_entries():
+    # Second entry is not a valid category
+    model = FakeModel(
+        '```json\n["Cybersecurity", "Quantum Gardening", "Other"]\n```',
+        single_response="Tech Industry & Business",
+    )
+    classifier = GeminiNewsClassifier(model=model)
+
+    categories = await classifier.classify_batch(["a", "b", "c"])
+
+    assert categories == [
+        NewsCategory.CYBERSECURITY,
+        NewsCategory.TECH_INDUSTRY_BUSINESS,
+        NewsCategory.OTHER,
+    ]
+    assert len(model.batch_prompts) == 1
+    assert len(model.single_prompts) == 1
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_retries_all_on_length_mismatch():
+    # With one entry missing, the rest cannot be trusted to line up either
+    model = FakeModel(
+        '["Cybersecurity", "Other"]', single_response="Tech Industry & Business"
+    )
+    classifier = GeminiNewsClassifier(model=model)
+
+    categories = await classifier.classify_batch(["a", "b", "c"])
+
+    assert categories == [NewsCategory.TECH_INDUSTRY_BUSINESS] * 3
+    assert len(model.batch_prompts) == 1
+    assert len(model.single_prompts) == 3
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_unparseable_response():
+    model = FakeModel("I cannot help with that.", single_response="Cybersecurity")
+    classifier = GeminiNewsClassifier(model=model)
+
+    categories = await classifier.classify_batch(["a", "b"])
+
+    assert categories == [NewsCategory.CYBERSECURITY] * 2
+    assert len(model.single_prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_respects_batch_size_and_token_budget():
+    model = FakeModel(json.dumps(["Other", "Other"]))
+    classifier = GeminiNewsClassifier(model=model, batch_size=2, token_budget=100)
+
+    categories = await classifier.classify_batch(["x" * 5000] * 4)
+
+    assert categories == [NewsCategory.OTHER] * 4
+    assert len(model.batch_prompts) == 2
+    # 100 tokens * 4 chars shared by 2 articles
+    assert "x" * 200 in model.prompts[0]
+    assert "x" * 201 not in model.prompts[0]
+
+
+@pytest.fixture
+async def classification_cache():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+    return SQLClassificationCache(repo.engine)
+
+
+@pytest.mark.asyncio
+async def test_cached_classifier_reuses_normalized_content(classification_cache):
+    model = FakeModel(json.dumps(["Cybersecurity", "Hardware & Devices"]))
+    classifier = CachedNewsClassifier(
+        GeminiNewsClassifier(model=model), classification_cache
+    )
+
+    first = await classifier.classify_batch(["Zero-day  in Linux", "New GPU"])
+    # Same content syndicated under a different URL, with different whitespace/case
+    second = await classifier.classify_batch(["zero-day in linux\n", "NEW GPU"])
+
+    assert (
+        first
+        == second
+        == [
+            NewsCategory.CYBERSECURITY,
+            NewsCategory.HARDWARE_DEVICES,
+        ]
+    )
+    assert len(model.prompts) == 1
+    assert classifier.stats == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_cached_classifier_key_includes_model_and_prompt_version(
+    classification_cache,
+):
+    first = CachedNewsClassifier(
+        GeminiNewsClassifier(model=FakeModel("[]"), model_name="model-a"),
+        classification_cache,
+    )
+    second = CachedNewsClassifier(
+        GeminiNewsClassifier(model=FakeModel("[]"), model_name="model-b"),
+        classification_cache,
+    )
+
+    assert first.cache_key("text") != second.cache_key("text")
+    assert first.cache_key("Some  Text") == first.cache_key("some text")
+
+
+@pytest.mark.asyncio
+async def test_cached_classifier_does_not_cache_fallback_category(
+    classification_cache,
+):
+    model = FakeModel("[]", single_response="not a category")
+    classifier = CachedNewsClassifier(
+        GeminiNewsClassifier(model=model), classification_cache
+    )
+
+    assert await classifier.classify("text") == NewsCategory.OTHER
+    assert await classifier.classify("text") == NewsCategory.OTHER
+    assert len(model.prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_sql_classification_cache_eviction(classification_cache):
+    classification_cache.max_entries = 2
+    await classification_cache.put_many({"a": NewsCategory.CYBERSECURITY})
+    await classification_cache.put_many({"b": NewsCategory.OTHER})
+    await classification_cache.put_many({"c": NewsCategory.HARDWARE_DEVICES})
+
+    cached = await classification_cache.get_many(["a", "b", "c"])
+    assert set(cached) == {"b", "c"}
+
+    # Expired entries are neither returned nor kept
+    classification_cache.ttl = timedelta(seconds=-1)
+    assert await classification_cache.get_many(["b", "c"]) == {}
+    assert await classification_cache.evict() == 2
+
+
+def _axis(*categories: NewsCategory) -> List[float]:
+    return [1.0 if category in categories else 0.0 for category in NewsCategory]
+
+
+class AxisEmbedder(NewsEmbedder):
+    """Embeds texts onto fixed axes so centroid behaviour is predictable."""
+
+    AXES = {
+        "security": _axis(NewsCategory.CYBERSECURITY),
+        "chips": _axis(NewsCategory.HARDWARE_DEVICES),
+    }
+
+    def embed(self, text: str) -> List[float]:
+        # Anything else lies halfway between security and chips
+        return self.AXES.get(
+            text, _axis(NewsCategory.CYBERSECURITY, NewsCategory.HARDWARE_DEVICES)
+        )
+
+
+def _training_samples(categories=tuple(NewsCategory)):
+    return [(category, _axis(category)) for category in categories for _ in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_centroid_classifier():
+    classifier = CentroidNewsClassifier(AxisEmbedder(), min_samples=2)
+    assert await classifier.classify("security") == NewsCategory.OTHER  # unfitted
+
+    classifier.fit(_training_samples())
+    assert classifier.is_complete
+
+    assert await classifier.classify_batch(["security", "chips"]) == [
+        NewsCategory.CYBERSECURITY,
+        NewsCategory.HARDWARE_DEVICES,
+    ]
+    # Pre-computed vectors are used as-is
+    categories = await classifier.classify_batch(
+        ["ignored"], embeddings=[_axis(NewsCategory.HARDWARE_DEVICES)]
+    )
+    assert categories == [NewsCategory.HARDWARE_DEVICES]
+
+    (_, confident), (_, unsure) = classifier.predict(
+        [classifier.embedder.embed(t) for t in ("security", "python release")]
+    )
+    assert confident > 0.9
+    assert unsure == pytest.approx(0.5, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_centroid_classifier_has_no_confidence_until_complete():
+    classifier = CentroidNewsClassifier(AxisEmbedder(), min_samples=2)
+    classifier.fit(
+        _training_samples([NewsCategory.CYBERSECURITY, NewsCategory.HARDWARE_DEVICES])
+    )
+    assert classifier.is_fitted and not classifier.is_complete
+
+    # Still the nearest centroid, but with two categories even a guess
+    # would otherwise be at least 50% sure
+    [(category, confidence)] = classifier.predict([_axis(NewsCategory.CYBERSECURITY)])
+    assert category == NewsCategory.CYBERSECURITY
+    assert confidence == 0.0
+
+
+def test_centroid_classifier_skips_sparse_categories():
+    classifier = CentroidNewsClassifier(AxisEmbedder(), min_samples=4)
+    classifier.fit(_training_samples())
+    assert not classifier.is_fitted
+
+
+@pytest.mark.asyncio
+async def test_hybrid_classifier_falls_back_on_low_confidence():
+    local = CentroidNewsClassifier(AxisEmbedder(), min_samples=2)
+    local.fit(_training_samples())
+    model = FakeModel("[]", single_response="Software & Development")
+    hybrid = HybridNewsClassifier(
+        local, GeminiNewsClassifier(model=model), confidence_threshold=0.8
+    )
+
+    labels = await hybrid.classify_batch_with_sources(["security", "python release"])
+
+    assert labels == [
+        (NewsCategory.CYBERSECURITY, "local"),
+        (NewsCategory.SOFTWARE_DEVELOPMENT, "gemini"),
+    ]
+    assert (hybrid.local_count, hybrid.fallback_count) == (1, 1)
+    assert len(model.prompts) == 1
+    assert "python release" in model.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_classifier_falls_back_while_partly_fitted():
+    local = CentroidNewsClassifier(AxisEmbedder(), min_samples=2)
+    local.fit(
+        _training_samples([NewsCategory.CYBERSECURITY, NewsCategory.HARDWARE_DEVICES])
+    )
+    model = FakeModel('["Cybersecurity", "Hardware & Devices"]')
+    hybrid = HybridNewsClassifier(
+        local, GeminiNewsClassifier(model=model), confidence_threshold=0.8
+    )
+
+    categories = await hybrid.classify_batch(["security", "chips"])
+
+    assert categories == [NewsCategory.CYBERSECURITY, NewsCategory.HARDWARE_DEVICES]
+    assert (hybrid.local_count, hybrid.fallback_count) == (0, 2)
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from typing import List
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from newsfeed.chunking import PassageSplitter
+from newsfeed.embedding import EmbeddingBatcher, NewsEmbedder, OnnxEmbedder, mean_pool
+
+
+class CountingEmbedder(NewsEmbedder):
+    def __init__(self):
+        self.batches: List[List[str]] = []
+
+    def embed(self, text: str) -> List[float]:
+        return [float(len(text)), 1.0]
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        self.batches.append(list(texts))
+        return super().embed_batch(texts)
+
+
+def test_default_embed_batch_returns_float32_matrix():
+    embedder = CountingEmbedder()
+    vectors = NewsEmbedder.embed_batch(embedder, ["a", "bbb"])
+
+    assert isinstance(vectors, np.ndarray)
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (2, 2)
+    assert vectors[1][0] == 3.0
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_concurrent_requests():
+    embedder = CountingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=10, max_wait_ms=20)
+
+    results = await asyncio.gather(*(batcher.embed("x" * i) for i in range(1, 5)))
+
+    assert len(embedder.batches) == 1
+    assert embedder.batches[0] == ["x", "xx", "xxx", "xxxx"]
+    assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0]
+    assert all(isinstance(r, np.ndarray) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_when_batch_is_full():
+    embedder = CountingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=1000)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.embed(text) for text in "abcd")), timeout=0.5
+    )
+
+    assert len(results) == 4
+    assert [len(batch) for batch in embedder.batches] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_batcher_encodes_one_batch_at_a_time():
+    class SlowEmbedder(CountingEmbedder):
+        running = peak = 0
+
+        def embed_batch(self, texts: List[str]) -> np.ndarray:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            time.sleep(0.05)
+            self.running -= 1
+            return super().embed_batch(texts)
+
+    embedder = SlowEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=1)
+
+    first = asyncio.gather(*(batcher.embed(text) for text in "ab"))
+    await asyncio.sleep(0.01)
+    # Arrive while the first batch is being encoded
+    rest = asyncio.gather(*(batcher.embed(text) for text in "cde"))
+    await asyncio.gather(first, rest)
+
+    assert embedder.peak == 1
+    assert embedder.batches == [["a", "b"], ["c", "d"], ["e"]]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_errors():
+    class FailingEmbedder(CountingEmbedder):
+        def embed_batch(self, texts: List[str]) -> np.ndarray:
+            raise RuntimeError("model failure")
+
+    batcher = EmbeddingBatcher(FailingEmbedder(), max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="model failure"):
+        await batcher.embed("text")
+
+
+def test_passage_splitter_overlapping_windows():
+    splitter = PassageSplitter(max_words=4, overlap_words=1, max_passages=10)
+    text = "one two three four five six seven eight nine ten"
+
+    assert splitter.split(text) == [
+        "one two three four",
+        "four five six seven",
+        "seven eight nine ten",
+    ]
+    assert splitter.split("short  text") == ["short text"]
+    assert PassageSplitter(max_words=4, overlap_words=1, max_passages=2).split(
+        text
+    ) == ["one two three four", "four five six seven"]
+    with pytest.raises(ValueError):
+        PassageSplitter(max_words=4, overlap_words=4)
+
+
+def test_mean_pool_ignores_padding():
+    hidden = np.array(
+        [
+            [[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]],
+            [[0.0, 2.0], [0.0, 4.0], [0.0, 6.0]],
+        ],
+        dtype=np.float32,
+    )
+    mask = np.array([[1, 1, 0], [1, 1, 1]])
+
+    np.testing.assert_allclose(
+        mean_pool(hidden, mask, normalize=False), [[2.0, 0.0], [0.0, 4.0]]
+    )
+    np.testing.assert_allclose(mean_pool(hidden, mask), [[1.0, 0.0], [0.0, 1.0]])
+
+
+def test_onnx_embedder_batches_by_length_and_keeps_order():
+    embedder = OnnxEmbedder.__new__(OnnxEmbedder)
+    embedder.batch_size = 2
+    embedder.max_length = 16
+    embedder.normalize = False
+    embedder.input_names = {"input_ids", "attention_mask"}
+
+    def tokenize(batch, **kwargs):
+        width = max(len(text) for text in batch)
+        ids = np.array([[len(text)] * width for text in batch])
+        mask = np.array([[1] * len(text) + [0] * (width - len(text)) for text in batch])
+        return {"input_ids": ids, "attention_mask": mask}
+
+    def run(outputs, feed):
+        return [feed["input_ids"][..., None].astype(np.float32)]
+
+    embedder.tokenizer = MagicMock(side_effect=tokenize)
+    embedder.session = MagicMock()
+    embedder.session.run.side_effect = run
+
+    vectors = embedder.embed_batch(["ccc", "a", "dddd", "bb"])
+
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [3.0, 1.0, 4.0, 2.0]
+    batches = [call.args[0] for call in embedder.tokenizer.call_args_list]
+    assert batches == [["a", "bb"], ["ccc", "dddd"]]
+
+
+@pytest.mark.integration
+def test_onnx_embedder_matches_sentence_transformers(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from newsfeed.embedding import REFERENCE_TEXTS, SentenceTransformerEmbedder
+
+    onnx = OnnxEmbedder(model_dir=str(tmp_path), quantize=True)
+    torch = SentenceTransformerEmbedder()
+
+    expected = torch.embed_batch(REFERENCE_TEXTS)
+    actual = onnx.embed_batch(REFERENCE_TEXTS)
+
+    cosine = (actual * expected).sum(axis=1) / (
+        np.linalg.norm(actual, axis=1) * np.linalg.norm(expected, axis=1)
+    )
+    assert cosine.min() > 0.99
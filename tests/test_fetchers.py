@@ -1,12 +1,24 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+import feedparser
 import httpx
 import pytest
 from unittest.mock import AsyncMock, patch
 
+from newsfeed.config import get_settings
 from newsfeed.fetchers import RSSFetcher, RedditFetcher
+from newsfeed.http_client import FeedHttpClient, HostRateLimiter
 from newsfeed.models import RawArticle
+from newsfeed.text_extraction import (
+    BeautifulSoupTextExtractor,
+    StreamingTextExtractor,
+    get_text_extractor,
+)
+from newsfeed.watermarks import WatermarkStore
 
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -157,3 +169,274 @@ async def test_reddit_fetcher_http_error():
 
         with pytest.raises(httpx.HTTPStatusError):
             await fetcher.fetch()
+
+
+@pytest.mark.asyncio
+async def test_rss_fetcher_conditional_get(sample_rss_content):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            text=sample_rss_content,
+            headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        )
+
+    http = FeedHttpClient(min_host_interval=0, transport=httpx.MockTransport(handler))
+    fetcher = RSSFetcher(
+        feed_url="https://example.com/feed", source_name="test-source", http=http
+    )
+
+    first = await fetcher.fetch()
+    # Validators are only used once the caller has processed the articles
+    unsaved = await fetcher.fetch()
+    fetcher.save_validators()
+    second = await fetcher.fetch()
+    await http.aclose()
+
+    assert len(first) == len(unsaved) == 3
+    # Unchanged feed: 304 and parsing is skipped
+    assert second == []
+    assert "If-None-Match" not in requests[0].headers
+    assert "If-None-Match" not in requests[1].headers
+    assert requests[2].headers["If-None-Match"] == '"v1"'
+    assert requests[2].headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_fetcher_skips_conditional_get_while_retry_pending(sample_rss_content):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=sample_rss_content, headers={"ETag": '"v1"'})
+
+    http = FeedHttpClient(min_host_interval=0, transport=httpx.MockTransport(handler))
+    store = WatermarkStore()
+    fetcher = RSSFetcher(
+        "https://example.com/feed", "test-source", http=http, watermarks=store
+    )
+
+    articles = await fetcher.fetch()
+    store.advance(fetcher.feed_url, articles[1:], retry=articles[:1])
+    fetcher.save_validators()
+    # The failed article is offered again despite the unchanged feed
+    retried = await fetcher.fetch()
+    store.advance(fetcher.feed_url, retried)
+    fetcher.save_validators()
+    unchanged = await fetcher.fetch()
+    await http.aclose()
+
+    assert [a.url for a in retried] == ["https://example.com/article1"]
+    assert "If-None-Match" not in requests[1].headers
+    assert requests[2].headers["If-None-Match"] == '"v1"'
+    assert unchanged == []
+
+
+@pytest.mark.asyncio
+async def test_feed_http_client_reuses_client_and_passes_headers(reddit_rss_content):
+    seen_agents = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_agents.append(request.headers.get("User-Agent"))
+        return httpx.Response(200, text=reddit_rss_content)
+
+    http = FeedHttpClient(min_host_interval=0, transport=httpx.MockTransport(handler))
+    articles = await RedditFetcher(subreddit="programming", http=http).fetch()
+    articles += await RedditFetcher(subreddit="technology", http=http).fetch()
+    await http.aclose()
+
+    assert len(articles) == 4
+    assert seen_agents == ["newsfeed-bot/1.0"] * 2
+    # No validators were returned, so none are kept
+    assert http.validators == {}
+
+
+@pytest.mark.asyncio
+async def test_host_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter(min_interval=0.05)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    await asyncio.gather(
+        limiter.wait("reddit.com"),
+        limiter.wait("reddit.com"),
+        limiter.wait("example.com"),
+    )
+
+    assert loop.time() - start >= 0.045
+    assert loop.time() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_fetchers_parse_in_process_pool(sample_rss_content, reddit_rss_content):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "reddit" in request.url.host:
+            return httpx.Response(200, text=reddit_rss_content)
+        return httpx.Response(200, text=sample_rss_content)
+
+    http = FeedHttpClient(min_host_interval=0, transport=httpx.MockTransport(handler))
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        rss = await RSSFetcher(
+            "https://example.com/feed", "test-source", http=http, executor=executor
+        ).fetch()
+        reddit = await RedditFetcher(
+            "programming", http=http, executor=executor
+        ).fetch()
+    await http.aclose()
+
+    assert [a.title for a in rss] == [
+        "Test Article 1",
+        "Test Article 2",
+        "Test Article 3",
+    ]
+    assert rss[0].content == "This is the content of article 1"
+    assert [a.source for a in reddit] == ["reddit/r/programming"] * 2
+
+
+HTML_SAMPLES = [
+    "",
+    "plain text only",
+    "<p>First paragraph</p>\n<p>Second <b>bold</b> paragraph</p>",
+    "<div>one<br>two<br/>three</br>four</div>",
+    "<p>a<script>var x = '<b>no</b>';</script>b<style>p {}</style>c</p>",
+    "<template><p>hidden</p></template>visible",
+    "<!DOCTYPE html><!-- comment -->x &amp; y &lt;z&gt; &nbsp; &#39;q&#x27; &#150; &bogus;",
+    "<![CDATA[raw <text>]]><?php echo 1 ?>after",
+    "<div><span>unclosed <i>tags</div> trailing",
+    '<table> <tr><td>submitted by <a href="/u/x"> /u/x </a></td>'
+    '<td><a href="https://example.com">[link]</a></td></tr></table>',
+]
+
+
+@pytest.mark.parametrize("html", HTML_SAMPLES)
+def test_streaming_extractor_matches_beautifulsoup(html):
+    expected = BeautifulSoupTextExtractor().extract(html)
+    assert StreamingTextExtractor().extract(html) == expected
+
+
+@pytest.mark.parametrize("extractor", ["streaming", "bs4"])
+def test_parse_feed_with_each_extractor(
+    monkeypatch, extractor, sample_rss_content, reddit_rss_content
+):
+    monkeypatch.setattr(get_settings(), "HTML_EXTRACTOR", extractor)
+
+    rss = RSSFetcher._parse_feed(sample_rss_content, "test-source")
+    reddit = RedditFetcher._parse_feed(reddit_rss_content, "programming")
+    link_post = feedparser.FeedParserDict(
+        title="Link post title", summary=HTML_SAMPLES[-1]
+    )
+
+    assert rss[0].content == "This is the content of article 1"
+    assert [a.title for a in reddit] == [
+        "Great article about Python async",
+        "New JavaScript framework released",
+    ]
+    # Reddit link wrappers fall back to the title
+    assert RedditFetcher._extract_content(link_post) == "Link post title"
+
+
+def test_get_text_extractor_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        get_text_extractor("regex")
+
+
+def _mock_http(body: str) -> FeedHttpClient:
+    return FeedHttpClient(
+        min_host_interval=0,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text=body)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_rss_fetcher_skips_entries_below_watermark(sample_rss_content):
+    store = WatermarkStore()
+    store.advance(
+        "https://example.com/feed",
+        [
+            RawArticle(
+                url="https://example.com/article2",
+                title="Test Article 2",
+                content="",
+                source="test-source",
+                published_at=datetime(2024, 1, 2, 14, 30),
+            )
+        ],
+    )
+    http = _mock_http(sample_rss_content)
+    fetcher = RSSFetcher(
+        "https://example.com/feed", "test-source", http=http, watermarks=store
+    )
+
+    with patch.object(
+        RSSFetcher, "_extract_content", wraps=RSSFetcher._extract_content
+    ) as extract:
+        articles = await fetcher.fetch()
+    await http.aclose()
+
+    # Article 1 is older than the mark and article 2 is a known link
+    assert [a.url for a in articles] == ["https://example.com/article3"]
+    assert extract.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_reddit_fetcher_skips_only_known_links(reddit_rss_content):
+    seen_url = (
+        "https://www.reddit.com/r/programming/comments/def456/"
+        "new_javascript_framework_released/"
+    )
+    store = WatermarkStore()
+    store.advance(
+        "https://www.reddit.com/r/programming/.rss",
+        [
+            RawArticle(
+                url=seen_url,
+                title="New JavaScript framework released",
+                content="",
+                source="reddit/r/programming",
+                published_at=datetime(2024, 1, 2, 14, 30),
+            )
+        ],
+    )
+    http = _mock_http(reddit_rss_content)
+
+    articles = await RedditFetcher("programming", http=http, watermarks=store).fetch()
+    await http.aclose()
+
+    # Listings are not chronological, the older unseen post is still returned
+    assert [a.title for a in articles] == ["Great article about Python async"]
+
+
+def test_watermark_store_holds_mark_before_failed_articles():
+    def article(url: str, day: int) -> RawArticle:
+        return RawArticle(
+            url=url,
+            title=url,
+            content="",
+            source="s",
+            published_at=datetime(2024, 1, day),
+        )
+
+    store = WatermarkStore(max_links=2)
+    store.advance(
+        "feed",
+        [article("a", 1), article("b", 2), article("c", 5)],
+        retry=[article("d", 3)],
+        fetched_at=datetime(2024, 1, 4),
+    )
+    watermark = store.get("feed")
+
+    # "c" looks undated (stamped after the fetch started) and "d" must retry
+    assert watermark.newest_published == datetime(2024, 1, 2)
+    assert watermark.recent_links == frozenset({"b", "c"})
+    assert watermark.is_seen("c")
+    assert watermark.is_seen("x", published=datetime(2024, 1, 1))
+    assert not watermark.is_seen("d", published=datetime(2024, 1, 3))
+    assert store.get("other") is None
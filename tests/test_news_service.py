@@ -1,16 +1,32 @@
+import uuid
+
+import numpy as np
 import pytest
 from unittest.mock import MagicMock, AsyncMock
-from newsfeed.services.news_service import NewsService
-from newsfeed.models import RawArticle, ProcessedArticle, NewsCategory
-from datetime import datetime
+from newsfeed.cache import TTLCache
+from newsfeed.chunking import PassageSplitter
+from newsfeed.services.news_service import NewsService, reciprocal_rank_fusion
+from newsfeed.storage import Passage, SearchFilters, SearchHit
+from newsfeed.stories import StoryClustering, batch_story_leaders
+from newsfeed.models import (
+    RawArticle,
+    ProcessedArticle,
+    NewsCategory,
+    ProcessingStatus,
+    SearchMode,
+)
+from datetime import datetime, timedelta
 
 
 @pytest.fixture
 def mock_repo():
     repo = MagicMock()
     repo.exists = AsyncMock(return_value=False)
+    repo.existing_urls = AsyncMock(return_value=set())
     repo.save = AsyncMock(side_effect=lambda x: x)
+    repo.save_many = AsyncMock(side_effect=lambda xs: xs)
     repo.get_by_urls = AsyncMock(return_value=[])
+    repo.keyword_search = AsyncMock(return_value=[])
     return repo
 
 
@@ -18,14 +34,31 @@ def mock_repo():
 def mock_index():
     index = MagicMock()
     index.index = MagicMock()
-    index.search = MagicMock(return_value=[])
+    index.index_many = MagicMock()
+    index.search_many = MagicMock(return_value=[[]])
     return index
 
 
 @pytest.fixture
 def mock_classifier():
     classifier = MagicMock()
+    classifier.uses_embeddings = False
     classifier.classify = AsyncMock(return_value=NewsCategory.AI_EMERGING_TECH)
+    classifier.classify_batch = AsyncMock(
+        side_effect=lambda texts, embeddings=None: (
+            [NewsCategory.AI_EMERGING_TECH] * len(texts)
+        )
+    )
+
+    # Delegates to classify_batch, so tests can replace that alone
+    async def classify_batch_with_sources(texts, embeddings=None):
+        kwargs = {} if embeddings is None else {"embeddings": embeddings}
+        categories = await classifier.classify_batch(texts, **kwargs)
+        return [(category, "gemini") for category in categories]
+
+    classifier.classify_batch_with_sources = AsyncMock(
+        side_effect=classify_batch_with_sources
+    )
     return classifier
 
 
@@ -33,6 +66,9 @@ def mock_classifier():
 def mock_embedder():
     embedder = MagicMock()
     embedder.embed = MagicMock(return_value=[0.1, 0.2, 0.3])
+    embedder.embed_batch = MagicMock(
+        side_effect=lambda texts: np.array([[0.1, 0.2, 0.3]] * len(texts))
+    )
     return embedder
 
 
@@ -58,10 +94,11 @@ async def test_process_article_success(
     assert result is not None
     assert result.category == NewsCategory.AI_EMERGING_TECH
     assert result.embedding == [0.1, 0.2, 0.3]
+    assert result.category_source == "gemini"
 
     # Verify interactions
     mock_repo.exists.assert_called_once_with(raw_article.url)
-    mock_classifier.classify.assert_called_once()
+    mock_classifier.classify_batch.assert_called_once()
     mock_index.index.assert_called_once()
     mock_repo.save.assert_called_once()
 
@@ -92,8 +129,14 @@ async def test_search_articles(news_service, mock_index, mock_repo, mock_embedde
     query = "AI technology"
 
     # Setup mocks for search flow
-    mock_embedder.embed.return_value = [0.1, 0.2]  # Query embedding
-    mock_index.search.return_value = ["http://example.com/1", "http://example.com/2"]
+    mock_embedder.embed_batch.side_effect = None
+    mock_embedder.embed_batch.return_value = np.array([[0.1, 0.2]])  # Query embedding
+    mock_index.search_many.return_value = [
+        [
+            SearchHit("http://example.com/1", 0.2),
+            SearchHit("http://example.com/2", 0.4),
+        ]
+    ]
 
     # Repo returns objects for the URLs found
     articles = [
@@ -121,13 +164,144 @@ async def test_search_articles(news_service, mock_index, mock_repo, mock_embedde
     assert len(results) == 2
     assert results[0].url == "http://example.com/1"
 
-    mock_embedder.embed.assert_called_with(query)
-    mock_index.search.assert_called_once()
+    mock_embedder.embed_batch.assert_called_with([query])
+    mock_index.search_many.assert_called_once()
     mock_repo.get_by_urls.assert_called_once_with(
         ["http://example.com/1", "http://example.com/2"]
     )
 
 
+@pytest.mark.asyncio
+async def test_search_articles_max_distance(
+    news_service, mock_index, mock_repo, mock_embedder
+):
+    mock_embedder.embed_batch.side_effect = None
+    mock_embedder.embed_batch.return_value = np.array([[0.1, 0.2]])
+    mock_index.search_many.return_value = [
+        [
+            SearchHit("http://example.com/close", 0.3),
+            SearchHit("http://example.com/far", 1.2),
+        ]
+    ]
+
+    await news_service.search_articles("AI", max_distance=0.5)
+
+    mock_repo.get_by_urls.assert_called_once_with(["http://example.com/close"])
+
+
+@pytest.mark.asyncio
+async def test_search_articles_passes_filters_to_index(
+    news_service, mock_index, mock_embedder
+):
+    mock_embedder.embed_batch.side_effect = None
+    mock_embedder.embed_batch.return_value = np.array([[0.1, 0.2]])
+    filters = SearchFilters(category=NewsCategory.CYBERSECURITY.value, source="ars")
+
+    await news_service.search_articles("AI", limit=5, filters=filters)
+
+    args = mock_index.search_many.call_args[0]
+    assert args[1:] == (5, filters)
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]])
+
+    # "a" and "c" appear in both rankings, "a" higher on average
+    assert fused == ["a", "c", "b", "d"]
+
+
+@pytest.mark.asyncio
+async def test_search_articles_hybrid(news_service, mock_index, mock_repo):
+    mock_index.search_many.return_value = [
+        [SearchHit("http://example.com/semantic", 0.2)]
+    ]
+    mock_repo.keyword_search.return_value = [
+        "http://example.com/exact",
+        "http://example.com/semantic",
+    ]
+    filters = SearchFilters(source="s")
+
+    await news_service.search_articles(
+        "CVE-2024-3094", limit=1, filters=filters, mode=SearchMode.HYBRID
+    )
+
+    # Both rankings are asked for more candidates than the results returned
+    assert mock_index.search_many.call_args[0][1:] == (2, filters)
+    mock_repo.keyword_search.assert_called_once_with("CVE-2024-3094", 2, filters)
+    mock_repo.get_by_urls.assert_called_once_with(["http://example.com/semantic"])
+
+
+@pytest.mark.asyncio
+async def test_search_articles_keyword_only(news_service, mock_index, mock_repo):
+    mock_repo.keyword_search.return_value = ["http://example.com/exact"]
+
+    await news_service.search_articles("xz", limit=5, mode=SearchMode.KEYWORD)
+
+    mock_index.search_many.assert_not_called()
+    mock_repo.get_by_urls.assert_called_once_with(["http://example.com/exact"])
+
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.stats == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_search_articles_caches_query_embeddings(
+    mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    service = NewsService(
+        mock_repo,
+        mock_index,
+        mock_classifier,
+        mock_embedder,
+        query_cache=TTLCache(max_size=10),
+    )
+
+    await service.search_articles("  AI   News")
+    await service.search_articles("ai news")
+
+    mock_embedder.embed_batch.assert_called_once_with(["ai news"])
+    assert mock_index.search_many.call_count == 2
+    assert service.query_cache.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_result_cache_cleared_when_articles_are_indexed(
+    mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    service = NewsService(
+        mock_repo,
+        mock_index,
+        mock_classifier,
+        mock_embedder,
+        result_cache=TTLCache(max_size=10),
+    )
+    mock_index.search_many.return_value = [[SearchHit("http://example.com/1", 0.1)]]
+
+    first = await service.search_articles("AI", filters=SearchFilters(source="s"))
+    second = await service.search_articles("ai", filters=SearchFilters(source="s"))
+    assert second is first
+    mock_index.search_many.assert_called_once()
+
+    # A differently filtered search is a different entry
+    await service.search_articles("AI", filters=SearchFilters(source="t"))
+    assert mock_index.search_many.call_count == 2
+
+    await service.process_batch([_raw("http://example.com/new")])
+    await service.search_articles("AI", filters=SearchFilters(source="s"))
+    assert mock_index.search_many.call_count == 3
+
+
 @pytest.mark.asyncio
 async def test_add_article_no_embedding(news_service, mock_index, mock_repo):
     # Create article without embedding
@@ -146,3 +320,296 @@ async def test_add_article_no_embedding(news_service, mock_index, mock_repo):
     assert result is None
     mock_index.index.assert_not_called()
     mock_repo.save.assert_not_called()
+
+
+def _raw(url: str, title: str = "Title") -> RawArticle:
+    return RawArticle(
+        url=url,
+        title=title,
+        content="Content",
+        source="test",
+        published_at=datetime.now(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_batch(
+    news_service, mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    mock_repo.existing_urls.return_value = {"http://example.com/stored"}
+    raws = [
+        _raw("http://example.com/new-1"),
+        _raw("http://example.com/stored"),
+        _raw("http://example.com/new-2"),
+        _raw("http://example.com/new-1"),  # duplicate within the batch
+    ]
+
+    results = await news_service.process_batch(raws)
+
+    assert [r.status for r in results] == [
+        ProcessingStatus.SAVED,
+        ProcessingStatus.DUPLICATE,
+        ProcessingStatus.SAVED,
+        ProcessingStatus.DUPLICATE,
+    ]
+    assert [r.url for r in results] == [r.url for r in raws]
+    assert results[0].article.category == NewsCategory.AI_EMERGING_TECH
+    assert results[0].article.embedding == [0.1, 0.2, 0.3]
+
+    # One round trip per stage for the whole batch
+    mock_repo.existing_urls.assert_called_once()
+    mock_repo.get_by_urls.assert_not_called()
+    mock_classifier.classify_batch.assert_called_once()
+    mock_classifier.classify.assert_not_called()
+    mock_embedder.embed_batch.assert_called_once()
+    mock_index.index_many.assert_called_once()
+    mock_repo.save_many.assert_called_once()
+    assert len(mock_repo.save_many.call_args[0][0]) == 2
+    mock_index.index.assert_not_called()
+    mock_repo.save.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_classification_failure(
+    news_service, mock_repo, mock_index, mock_classifier
+):
+    mock_classifier.classify_batch = AsyncMock(
+        side_effect=RuntimeError("LLM unavailable")
+    )
+
+    results = await news_service.process_batch(
+        [_raw("http://example.com/a"), _raw("http://example.com/b")]
+    )
+
+    assert [r.status for r in results] == [ProcessingStatus.FAILED] * 2
+    assert "LLM unavailable" in results[1].error
+    mock_index.index_many.assert_not_called()
+    mock_repo.save_many.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_reports_concurrent_inserts_as_duplicates(
+    news_service, mock_repo
+):
+    # Another worker stored "b" between the existence check and the insert
+    mock_repo.save_many.side_effect = lambda xs: [x for x in xs if x.url.endswith("a")]
+
+    results = await news_service.process_batch(
+        [_raw("http://example.com/a"), _raw("http://example.com/b")]
+    )
+
+    assert [r.status for r in results] == [
+        ProcessingStatus.SAVED,
+        ProcessingStatus.DUPLICATE,
+    ]
+    assert results[1].article is None
+
+
+@pytest.mark.asyncio
+async def test_process_batch_storage_failure(news_service, mock_repo):
+    mock_repo.save_many.side_effect = RuntimeError("database is locked")
+
+    results = await news_service.process_batch([_raw("http://example.com/a")])
+
+    assert results[0].status == ProcessingStatus.FAILED
+    assert results[0].error == "database is locked"
+
+
+@pytest.mark.asyncio
+async def test_process_batch_reuses_embeddings_for_embedding_classifier(
+    news_service, mock_classifier, mock_embedder
+):
+    mock_classifier.uses_embeddings = True
+
+    results = await news_service.process_batch([_raw("http://example.com/a")])
+
+    assert results[0].status == ProcessingStatus.SAVED
+    mock_embedder.embed_batch.assert_called_once()
+    texts = mock_classifier.classify_batch.call_args[0][0]
+    embeddings = mock_classifier.classify_batch.call_args[1]["embeddings"]
+    assert len(texts) == len(embeddings) == 1
+    assert list(embeddings[0]) == [0.1, 0.2, 0.3]
+
+
+@pytest.mark.asyncio
+async def test_refresh_classifier(news_service, mock_repo, mock_classifier):
+    samples = [(NewsCategory.CYBERSECURITY, [0.1, 0.2, 0.3])]
+    mock_repo.get_labeled_embeddings = AsyncMock(return_value=samples)
+
+    await news_service.refresh_classifier(limit=10)
+    mock_repo.get_labeled_embeddings.assert_not_called()
+
+    mock_classifier.uses_embeddings = True
+    await news_service.refresh_classifier(limit=10)
+    mock_repo.get_labeled_embeddings.assert_called_once_with(10)
+    mock_classifier.fit.assert_called_once_with(samples)
+
+
+@pytest.mark.asyncio
+async def test_process_batch_indexes_passages(
+    mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    service = NewsService(
+        mock_repo,
+        mock_index,
+        mock_classifier,
+        mock_embedder,
+        splitter=PassageSplitter(max_words=3, overlap_words=0),
+    )
+    raw = _raw("http://example.com/long", title="A long")
+    raw.content = "article with many words"
+
+    results = await service.process_batch([raw])
+
+    assert results[0].status == ProcessingStatus.SAVED
+    # Every passage goes through the same embedding batch
+    assert mock_embedder.embed_batch.call_args[0][0] == [
+        "A long article",
+        "with many words",
+    ]
+    articles, passages = mock_index.index_many.call_args[0]
+    assert [a.url for a in articles] == ["http://example.com/long"]
+    assert passages == {
+        "http://example.com/long": [
+            Passage("A long article", [0.1, 0.2, 0.3]),
+            Passage("with many words", [0.1, 0.2, 0.3]),
+        ]
+    }
+    assert articles[0].embedding == [0.1, 0.2, 0.3]
+
+
+@pytest.mark.asyncio
+async def test_search_articles_returns_best_passage_per_article(
+    mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    service = NewsService(
+        mock_repo,
+        mock_index,
+        mock_classifier,
+        mock_embedder,
+        splitter=PassageSplitter(),
+    )
+    mock_index.search_many.return_value = [
+        [
+            SearchHit("http://example.com/1", 0.1, "best passage"),
+            SearchHit("http://example.com/2", 0.2, "other article"),
+            SearchHit("http://example.com/1", 0.3, "worse passage"),
+        ]
+    ]
+    mock_repo.get_by_urls.return_value = [
+        ProcessedArticle(
+            url=f"http://example.com/{i}",
+            title=f"A{i}",
+            content="C",
+            category=NewsCategory.OTHER,
+            source="s",
+            published_at=datetime.now(),
+        )
+        for i in (1, 2)
+    ]
+
+    results = await service.search_articles("query", limit=2)
+
+    # Passages are over-fetched so duplicates still leave `limit` articles
+    assert mock_index.search_many.call_args[0][1] == 8
+    assert [(r.url, r.matched_passage) for r in results] == [
+        ("http://example.com/1", "best passage"),
+        ("http://example.com/2", "other article"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_batch_joins_stored_story_and_reuses_category(
+    mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    service = NewsService(
+        mock_repo,
+        mock_index,
+        mock_classifier,
+        mock_embedder,
+        stories=StoryClustering(max_distance=0.3),
+    )
+    mock_embedder.embed_batch.side_effect = lambda texts: np.array(
+        [[1.0, 0.0] if "Copy" in text else [0.0, 1.0] for text in texts]
+    )
+    story_id = uuid.uuid4()
+    stored = ProcessedArticle(
+        url="http://example.com/original",
+        title="Original",
+        content="C",
+        category=NewsCategory.CYBERSECURITY,
+        source="ars",
+        published_at=datetime.now(),
+        story_id=story_id,
+    )
+    mock_index.search_many.return_value = [
+        [SearchHit(stored.url, 0.1)],
+        [SearchHit(stored.url, 1.2)],
+    ]
+    mock_repo.get_by_urls.return_value = [stored]
+
+    results = await service.process_batch(
+        [_raw("http://example.com/copy", "Copy"), _raw("http://example.com/other")]
+    )
+
+    copy, other = (r.article for r in results)
+    assert copy.story_id == story_id
+    assert copy.category == NewsCategory.CYBERSECURITY
+    assert other.story_id == other.id
+    # Only the article starting a new story is classified
+    assert mock_classifier.classify_batch.call_args[0][0] == ["Title\n\nContent"]
+    filters = mock_index.search_many.call_args[0][2]
+    assert filters.published_after < stored.published_at < filters.published_before
+
+
+@pytest.mark.asyncio
+async def test_process_batch_groups_copies_within_batch(
+    mock_repo, mock_index, mock_classifier, mock_embedder
+):
+    service = NewsService(
+        mock_repo,
+        mock_index,
+        mock_classifier,
+        mock_embedder,
+        stories=StoryClustering(window_hours=24),
+    )
+    mock_index.search_many.return_value = [[], [], []]
+    old = _raw("http://example.com/old")
+    old.published_at = datetime.now() - timedelta(days=3)
+
+    results = await service.process_batch(
+        [_raw("http://example.com/a"), _raw("http://example.com/b"), old]
+    )
+
+    first, copy, outside_window = (r.article for r in results)
+    assert first.story_id == first.id
+    assert copy.story_id == first.id
+    assert outside_window.story_id == outside_window.id
+    assert batch_story_leaders(
+        [[1.0, 0.0], [0.0, 1.0], [0.9, 0.1]], [None] * 3, StoryClustering()
+    ) == [None, None, 0]
+
+
+@pytest.mark.asyncio
+async def test_search_articles_collapses_stories(news_service, mock_index, mock_repo):
+    story_id = uuid.uuid4()
+    mock_index.search_many.return_value = [
+        [SearchHit(f"http://example.com/{i}", 0.1 * i) for i in (1, 2, 3)]
+    ]
+    mock_repo.get_by_urls.return_value = [
+        ProcessedArticle(
+            url=f"http://example.com/{i}",
+            title=f"A{i}",
+            content="C",
+            category=NewsCategory.OTHER,
+            source="s",
+            published_at=datetime.now(),
+            story_id=story_id if i < 3 else None,
+        )
+        for i in (1, 2, 3)
+    ]
+
+    results = await news_service.search_articles("query", 2, collapse_stories=True)
+
+    assert mock_index.search_many.call_args[0][1] == 6
+    assert [r.url for r in results] == ["http://example.com/1", "http://example.com/3"]
@@ -1,7 +1,9 @@
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, patch
+from datetime import datetime
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 from newsfeed.scheduler import run_ingestion, start_scheduler
-from newsfeed.models import RawArticle
+from newsfeed.models import ProcessingResult, ProcessingStatus, RawArticle
 
 
 @pytest.mark.asyncio
@@ -17,10 +19,13 @@ async def test_run_ingestion():
 
     # Mock Service
     mock_service = AsyncMock()
-    mock_service.process_article.return_value = True  # Simulate saved article
+    mock_service.process_batch.return_value = [
+        ProcessingResult(url=mock_article.url, status=ProcessingStatus.SAVED)
+    ]  # Simulate saved article
 
     # Mock Fetcher
     mock_fetcher_instance = AsyncMock()
+    mock_fetcher_instance.save_validators = MagicMock()
     mock_fetcher_instance.fetch.return_value = [mock_article]
 
     # Patch dependencies
@@ -41,15 +46,21 @@ async def test_run_ingestion():
 
             # Verify Fetchers were initialized and called
             mock_rss_cls.assert_called_with(
-                feed_url="http://rss.test", source_name="RSS Test"
+                feed_url="http://rss.test",
+                source_name="RSS Test",
+                http=ANY,
+                executor=ANY,
+                watermarks=ANY,
+            )
+            mock_reddit_cls.assert_called_with(
+                subreddit="reddit_test", http=ANY, executor=ANY, watermarks=ANY
             )
-            mock_reddit_cls.assert_called_with(subreddit="reddit_test")
             assert mock_fetcher_instance.fetch.call_count == 2
 
             # Verify Service processed the article
-            # 2 sources * 1 article each = 2 calls
-            assert mock_service.process_article.call_count == 2
-            mock_service.process_article.assert_called_with(mock_article)
+            # 2 sources * 1 batch each = 2 calls
+            assert mock_service.process_batch.call_count == 2
+            mock_service.process_batch.assert_called_with([mock_article])
 
 
 def test_start_scheduler():
@@ -63,3 +74,131 @@ def test_start_scheduler():
 
         assert mock_scheduler.add_job.call_count == 2
         mock_scheduler.start.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_run_ingestion_isolates_failures_and_timeouts():
+    mock_article = RawArticle(
+        url="http://test.com/ok",
+        title="Ok Article",
+        content="Content",
+        source="ok",
+        published_at=None,
+    )
+
+    async def slow_fetch():
+        await asyncio.sleep(10)
+        return [mock_article]
+
+    failing_fetcher = AsyncMock()
+    failing_fetcher.save_validators = MagicMock()
+    failing_fetcher.fetch.side_effect = RuntimeError("feed is down")
+    slow_fetcher = AsyncMock()
+    slow_fetcher.save_validators = MagicMock()
+    slow_fetcher.fetch = slow_fetch
+    ok_fetcher = AsyncMock()
+    ok_fetcher.save_validators = MagicMock()
+    ok_fetcher.fetch.return_value = [mock_article]
+
+    fetchers = {"failing": failing_fetcher, "slow": slow_fetcher, "ok": ok_fetcher}
+
+    mock_service = AsyncMock()
+    mock_service.process_batch.return_value = []
+
+    with patch("newsfeed.scheduler.get_news_service", return_value=mock_service), patch(
+        "newsfeed.scheduler.RedditFetcher",
+        side_effect=lambda subreddit, **kwargs: fetchers[subreddit],
+    ), patch(
+        "newsfeed.scheduler.SOURCES",
+        [{"type": "reddit", "name": name} for name in fetchers],
+    ), patch("newsfeed.scheduler.get_settings") as mock_settings:
+        mock_settings.return_value.INGESTION_CONCURRENCY = 3
+        mock_settings.return_value.FETCH_TIMEOUT_SECONDS = 0.1
+        mock_settings.return_value.FETCH_INTERVAL_MINUTES = 15
+
+        await asyncio.wait_for(run_ingestion(), timeout=2)
+
+    # Only the healthy source reaches the service
+    mock_service.process_batch.assert_called_once_with([mock_article])
+
+
+@pytest.mark.asyncio
+async def test_run_ingestion_fetches_concurrently_within_limit():
+    active = 0
+    peak = 0
+
+    async def tracked_fetch():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return []
+
+    fetcher = AsyncMock()
+    fetcher.fetch = tracked_fetch
+    fetcher.save_validators = MagicMock()
+
+    mock_service = AsyncMock()
+    mock_service.process_batch.return_value = []
+
+    with patch("newsfeed.scheduler.get_news_service", return_value=mock_service), patch(
+        "newsfeed.scheduler.RedditFetcher", return_value=fetcher
+    ), patch(
+        "newsfeed.scheduler.SOURCES",
+        [{"type": "reddit", "name": f"sub{i}"} for i in range(5)],
+    ), patch("newsfeed.scheduler.get_settings") as mock_settings:
+        mock_settings.return_value.INGESTION_CONCURRENCY = 2
+        mock_settings.return_value.FETCH_TIMEOUT_SECONDS = 5
+        mock_settings.return_value.FETCH_INTERVAL_MINUTES = 15
+
+        await run_ingestion()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_run_ingestion_advances_watermark_except_failed():
+    saved = RawArticle(
+        url="http://test.com/saved",
+        title="Saved",
+        content="Content",
+        source="rss",
+        published_at=datetime(2024, 1, 2),
+    )
+    failed = RawArticle(
+        url="http://test.com/failed",
+        title="Failed",
+        content="Content",
+        source="rss",
+        published_at=datetime(2024, 1, 1),
+    )
+
+    fetcher = AsyncMock()
+    fetcher.feed_url = "http://rss.test"
+    fetcher.fetch.return_value = [saved, failed]
+    fetcher.save_validators = MagicMock()
+
+    mock_service = AsyncMock()
+    mock_service.process_batch.return_value = [
+        ProcessingResult(url=saved.url, status=ProcessingStatus.SAVED),
+        ProcessingResult(url=failed.url, status=ProcessingStatus.FAILED),
+    ]
+    store = MagicMock()
+    # Validators are only saved once the batch is processed and recorded
+    store.advance.side_effect = lambda *args, **kwargs: (
+        fetcher.save_validators.assert_not_called()
+    )
+
+    with patch("newsfeed.scheduler.get_news_service", return_value=mock_service), patch(
+        "newsfeed.scheduler.RSSFetcher", return_value=fetcher
+    ), patch("newsfeed.scheduler.get_watermark_store", return_value=store), patch(
+        "newsfeed.scheduler.SOURCES",
+        [{"type": "rss", "url": "http://rss.test", "name": "RSS Test"}],
+    ):
+        await run_ingestion()
+
+    store.advance.assert_called_once_with(
+        "http://rss.test", [saved], retry=[failed], fetched_at=ANY
+    )
+    fetcher.save_validators.assert_called_once_with()
@@ -1,9 +1,20 @@
+import asyncio
 import pytest
 import os
 import shutil
+import uuid
 from datetime import datetime
-from newsfeed.models import ProcessedArticle, NewsCategory
-from newsfeed.storage import SQLArticleRepository, ChromaVectorIndex
+from sqlalchemy import text
+from newsfeed.models import LOCAL_CATEGORY_SOURCE, ProcessedArticle, NewsCategory
+from newsfeed.storage import (
+    SQLArticleRepository,
+    ChromaVectorIndex,
+    NumpyVectorIndex,
+    Passage,
+    SearchFilters,
+    SQLiteProfile,
+)
+from newsfeed.storage.article.url_cache import KnownURLCache
 from newsfeed.classification import NewsClassifier
 from newsfeed.services.news_service import NewsService
 from newsfeed.embedding import SentenceTransformerEmbedder
@@ -48,6 +59,30 @@ async def test_repository_crud():
     assert exists is True
 
 
+@pytest.mark.asyncio
+async def test_repository_save_many():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    articles = [
+        ProcessedArticle(
+            url=f"https://example.com/batch-{i}",
+            title=f"Batch Article {i}",
+            content="Content",
+            category=NewsCategory.OTHER,
+            source="test_source",
+            published_at=datetime.now(),
+        )
+        for i in range(3)
+    ]
+
+    saved = await repo.save_many(articles)
+    assert len(saved) == 3
+
+    stored = await repo.get_by_urls([a.url for a in articles])
+    assert {a.url for a in stored} == {a.url for a in articles}
+
+
 @pytest.fixture
 async def news_service():
     db_url = "sqlite+aiosqlite:///:memory:"
@@ -98,3 +133,615 @@ async def test_service_search_flow(news_service):
     # 5. Verify
     assert len(results) == 1
     assert results[0].url == "https://example.com/security-alert"
+
+
+@pytest.mark.asyncio
+async def test_repository_existing_urls_uses_known_url_cache():
+    repo = SQLArticleRepository(
+        database_url="sqlite+aiosqlite:///:memory:", known_url_cache_size=100
+    )
+    await repo.init_db()
+
+    urls = [f"https://example.com/known-{i}" for i in range(3)]
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=url,
+                title="Known",
+                content="Content",
+                category=NewsCategory.OTHER,
+                source="test_source",
+                published_at=datetime.now(),
+            )
+            for url in urls
+        ]
+    )
+
+    # Cache is rebuilt from the database on warm-up
+    repo.known_urls = KnownURLCache(100)
+    assert await repo.warm_url_cache() == 3
+    assert len(repo.known_urls) == 3
+
+    found = await repo.existing_urls(urls + ["https://example.com/unknown"])
+    assert found == set(urls)
+
+    # With the cache disabled the chunked database lookup gives the same answer
+    repo.known_urls = None
+    found = await repo.existing_urls(urls + ["https://example.com/unknown"])
+    assert found == set(urls)
+
+
+def test_known_url_cache_evicts_least_recently_used():
+    cache = KnownURLCache(max_size=2)
+    cache.update(["a", "b"])
+    assert "a" in cache  # refreshes "a"
+
+    cache.add("c")
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_repository_get_labeled_embeddings():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=f"https://example.com/labeled-{i}",
+                title="Labeled",
+                content="Content",
+                category=NewsCategory.CYBERSECURITY,
+                source="test_source",
+                published_at=datetime.now(),
+                embedding=[0.5, 0.5] if i else None,
+                # Legacy rows without a source are still used
+                category_source="gemini" if i == 1 else None,
+            )
+            for i in range(3)
+        ]
+        + [
+            # Labels guessed by the local classifier are not trained on
+            ProcessedArticle(
+                url="https://example.com/local",
+                title="Local",
+                content="Content",
+                category=NewsCategory.OTHER,
+                category_source=LOCAL_CATEGORY_SOURCE,
+                source="test_source",
+                published_at=datetime.now(),
+                embedding=[0.5, 0.5],
+            )
+        ]
+    )
+
+    samples = await repo.get_labeled_embeddings(limit=10)
+
+    assert samples == [(NewsCategory.CYBERSECURITY, [0.5, 0.5])] * 2
+
+
+@pytest.mark.asyncio
+async def test_repository_stores_embeddings_as_float32_blobs():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    article = ProcessedArticle(
+        url="https://example.com/vector",
+        title="Vector",
+        content="Content",
+        category=NewsCategory.OTHER,
+        source="test_source",
+        published_at=datetime.now(),
+        embedding=[0.5, 0.25, -1.0],
+    )
+    await repo.save_many([article])
+
+    async with repo.engine.connect() as conn:
+        row = (
+            await conn.execute(
+                text(
+                    "SELECT typeof(embedding), length(embedding) FROM processedarticle"
+                )
+            )
+        ).one()
+    assert tuple(row) == ("blob", 12)
+
+    # Article queries leave the embedding unloaded
+    loaded = [
+        await repo.get(article.id),
+        *(await repo.list_articles()),
+        *(await repo.get_by_urls([article.url])),
+    ]
+    assert all("embedding" not in a.__dict__ for a in loaded)
+
+    assert await repo.get_embeddings([article.url, "https://example.com/none"]) == {
+        article.url: [0.5, 0.25, -1.0]
+    }
+
+
+@pytest.mark.asyncio
+async def test_init_db_compacts_legacy_json_embeddings():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=f"https://example.com/legacy-{i}",
+                title="Legacy",
+                content="Content",
+                category=NewsCategory.OTHER,
+                source="test_source",
+                published_at=datetime.now(),
+            )
+            for i in range(2)
+        ]
+    )
+    # Rows written by the previous JSON column, including a JSON null
+    async with repo.engine.begin() as conn:
+        await conn.execute(
+            text(
+                "UPDATE processedarticle SET embedding = CASE url "
+                "WHEN 'https://example.com/legacy-0' THEN '[0.5, 0.25]' "
+                "ELSE 'null' END"
+            )
+        )
+
+    # Legacy text is still readable before the migration runs
+    assert await repo.get_embeddings(["https://example.com/legacy-0"]) == {
+        "https://example.com/legacy-0": [0.5, 0.25]
+    }
+
+    await repo.init_db()
+
+    async with repo.engine.connect() as conn:
+        types = (
+            await conn.execute(
+                text("SELECT typeof(embedding) FROM processedarticle ORDER BY url")
+            )
+        ).scalars()
+        assert list(types) == ["blob", "null"]
+    assert await repo.get_embeddings(
+        ["https://example.com/legacy-0", "https://example.com/legacy-1"]
+    ) == {"https://example.com/legacy-0": [0.5, 0.25]}
+
+
+@pytest.mark.asyncio
+async def test_repository_list_article_fields():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=f"https://example.com/fields-{i}",
+                title=f"Fields {i}",
+                content="Content",
+                category=NewsCategory.OTHER if i else NewsCategory.CYBERSECURITY,
+                source="test_source",
+                published_at=datetime(2024, 1, i + 1),
+            )
+            for i in range(3)
+        ]
+    )
+
+    rows = await repo.list_article_fields(["title", "url"], limit=2)
+    assert rows == [
+        {"title": "Fields 2", "url": "https://example.com/fields-2"},
+        {"title": "Fields 1", "url": "https://example.com/fields-1"},
+    ]
+
+    rows = await repo.list_article_fields(["title"], category="Cybersecurity")
+    assert rows == [{"title": "Fields 0"}]
+
+    with pytest.raises(ValueError):
+        await repo.list_article_fields(["title", "missing"])
+
+
+@pytest.mark.asyncio
+async def test_repository_keyset_pagination():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    # Several articles share a timestamp, the id keeps their order stable
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=f"https://example.com/page-{i}",
+                title=f"Page {i}",
+                content="Content",
+                category=NewsCategory.OTHER,
+                source="test_source",
+                published_at=datetime(2024, 1, 1 + i // 3),
+            )
+            for i in range(7)
+        ]
+    )
+    everything = await repo.list_articles(limit=10)
+
+    pages, after = [], None
+    while True:
+        page = await repo.list_articles(limit=3, after=after)
+        if not page:
+            break
+        pages.extend(page)
+        after = (page[-1].published_at, page[-1].id)
+
+    assert [a.url for a in pages] == [a.url for a in everything]
+    assert len(pages) == 7
+
+    async with repo.engine.connect() as conn:
+        plan = (
+            await conn.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT id FROM processedarticle "
+                    "WHERE category = 'OTHER' ORDER BY published_at DESC, id DESC"
+                )
+            )
+        ).all()
+    assert "ix_processedarticle_category_published_at_id" in str(plan)
+    assert "TEMP B-TREE" not in str(plan)
+
+
+@pytest.mark.asyncio
+async def test_init_db_adds_story_id_to_existing_articles():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+    article = ProcessedArticle(
+        url="https://example.com/before-stories",
+        title="Old",
+        content="Content",
+        category=NewsCategory.OTHER,
+        source="test_source",
+        published_at=datetime(2024, 1, 1),
+    )
+    await repo.save(article)
+    # Table created by a version without story clustering
+    async with repo.engine.begin() as conn:
+        await conn.execute(
+            text("DROP INDEX ix_processedarticle_story_id_published_at_id")
+        )
+        await conn.execute(text("ALTER TABLE processedarticle DROP COLUMN story_id"))
+
+    await repo.init_db()
+
+    stored = await repo.get(article.id)
+    assert stored.story_id == article.id
+    async with repo.engine.connect() as conn:
+        indexes = (
+            await conn.execute(text("PRAGMA index_list(processedarticle)"))
+        ).all()
+    assert "ix_processedarticle_story_id_published_at_id" in str(indexes)
+
+
+@pytest.mark.asyncio
+async def test_repository_lists_newest_article_per_story():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+    story = uuid.uuid4()
+    lone = uuid.uuid4()
+    await repo.save_many(
+        [
+            ProcessedArticle(
+                url=f"https://example.com/story-{i}",
+                title=f"Story {i}",
+                content="Content",
+                category=NewsCategory.CYBERSECURITY if i else NewsCategory.OTHER,
+                source="test_source",
+                published_at=datetime(2024, 1, i + 1),
+                story_id=story if i < 3 else lone,
+            )
+            for i in range(4)
+        ]
+    )
+
+    articles = await repo.list_articles(collapse_stories=True)
+    assert [a.title for a in articles] == ["Story 3", "Story 2"]
+
+    rows = await repo.list_article_fields(
+        ["title"], category="Other", collapse_stories=True
+    )
+    assert rows == [{"title": "Story 0"}]
+
+    # Pages continue below the newest copy without showing older ones
+    after = (articles[0].published_at, articles[0].id)
+    page = await repo.list_articles(limit=1, after=after, collapse_stories=True)
+    assert [a.title for a in page] == ["Story 2"]
+    assert len(await repo.list_articles()) == 4
+
+
+@pytest.mark.asyncio
+async def test_repository_sqlite_profile_and_read_pool(tmp_path):
+    repo = SQLArticleRepository(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}",
+        sqlite_profile=SQLiteProfile(busy_timeout_ms=1234),
+        read_pool_size=2,
+    )
+    await repo.init_db()
+    assert repo.read_engine is not repo.engine
+
+    article = ProcessedArticle(
+        url="https://example.com/tuned",
+        title="Tuned",
+        content="Content",
+        category=NewsCategory.OTHER,
+        source="test_source",
+        published_at=datetime.now(),
+    )
+    await repo.save_many([article])
+
+    async with repo.engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 1234
+
+    # Reads go through the read-only pool and see committed writes
+    assert [a.url for a in await repo.list_articles()] == [article.url]
+    async with repo.read_engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+        with pytest.raises(Exception, match="readonly"):
+            await conn.execute(text("DELETE FROM processedarticle"))
+
+    await repo.close()
+
+
+def test_sqlite_profile_rejects_unknown_modes():
+    with pytest.raises(ValueError):
+        SQLiteProfile(journal_mode="WAL; DROP TABLE processedarticle")
+    with pytest.raises(ValueError):
+        SQLiteProfile(synchronous="SOMETIMES")
+
+
+@pytest.mark.asyncio
+async def test_repository_save_many_skips_conflicts_concurrently(tmp_path):
+    repo = SQLArticleRepository(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}",
+        sqlite_profile=SQLiteProfile(),
+        read_pool_size=1,
+    )
+    await repo.init_db()
+
+    def batch(indices):
+        return [
+            ProcessedArticle(
+                url=f"https://example.com/bulk-{i}",
+                title=f"Bulk {i}",
+                content="Content",
+                category=NewsCategory.OTHER,
+                source="test_source",
+                published_at=datetime.now(),
+            )
+            for i in indices
+        ]
+
+    # Overlapping batches from several workers never raise on the unique URL
+    saved = await asyncio.gather(
+        repo.save_many(batch(range(0, 30))),
+        repo.save_many(batch(range(20, 50))),
+        repo.save_many(batch(range(10, 40)) + batch([10])),
+    )
+
+    inserted = [a.url for articles in saved for a in articles]
+    assert len(inserted) == len(set(inserted)) == 50
+    assert len(await repo.list_articles(limit=100)) == 50
+    assert await repo.save_many(batch([0, 1])) == []
+
+    await repo.close()
+
+
+def test_chroma_index_many_and_search_many_chunk_requests(tmp_path):
+    index = ChromaVectorIndex(str(tmp_path / "chroma"), max_batch_size=2)
+    articles = [
+        ProcessedArticle(
+            url=f"https://example.com/{i}",
+            title=f"Article {i}",
+            content="Content",
+            category=NewsCategory.OTHER,
+            source="test",
+            published_at=datetime.now(),
+            embedding=[1.0 if j == i else 0.0 for j in range(5)],
+        )
+        for i in range(5)
+    ]
+
+    index.index_many(articles)
+    assert index.collection.count() == 5
+
+    queries = [article.embedding for article in articles[:3]]
+    results = index.search_many(queries, limit=2)
+
+    # One hit list per query, closest first, chunked over two query calls
+    assert len(results) == 3
+    for i, hits in enumerate(results):
+        assert hits[0].url == f"https://example.com/{i}"
+        assert hits[0].distance == pytest.approx(0.0, abs=1e-6)
+        assert hits[0].distance <= hits[1].distance
+    assert index.search(queries[1], limit=1) == ["https://example.com/1"]
+
+
+def _embedded_article(i: int, embedding) -> ProcessedArticle:
+    return ProcessedArticle(
+        url=f"https://example.com/{i}",
+        title=f"Article {i}",
+        content="Content",
+        category=NewsCategory.OTHER,
+        source="test",
+        published_at=datetime.now(),
+        embedding=embedding,
+    )
+
+
+def test_numpy_index_search_upsert_delete_and_reload(tmp_path):
+    path = str(tmp_path / "numpy_index")
+    index = NumpyVectorIndex(path)
+    # Unnormalized on purpose, vectors are normalized on insert
+    index.index_many(
+        [
+            _embedded_article(i, [3.0 if j == i else 0.0 for j in range(4)])
+            for i in range(4)
+        ]
+    )
+
+    hits = index.search_many([[1.0, 0.1, 0.0, 0.0]], limit=2)[0]
+    assert [hit.url for hit in hits] == [
+        "https://example.com/0",
+        "https://example.com/1",
+    ]
+    assert hits[0].distance < hits[1].distance
+
+    # Upsert moves article 1 onto axis 0 and tombstones its old row
+    index.index(_embedded_article(1, [1.0, 0.0, 0.0, 0.0]))
+    index.delete(["https://example.com/0"])
+    hits = index.search_many([[1.0, 0.0, 0.0, 0.0]], limit=10)[0]
+    assert len(hits) == 3
+    assert hits[0].url == "https://example.com/1"
+    assert hits[0].distance == pytest.approx(0.0, abs=1e-6)
+
+    reopened = NumpyVectorIndex(path)
+    assert len(reopened) == 3
+    assert reopened.search([1.0, 0.0, 0.0, 0.0], limit=1) == ["https://example.com/1"]
+
+    assert reopened.compact() == 2
+    assert len(list(tmp_path.joinpath("numpy_index").glob("vectors.*"))) == 1
+    assert NumpyVectorIndex(path).search([0.0, 0.0, 1.0, 0.0], limit=1) == [
+        "https://example.com/2"
+    ]
+
+
+def test_numpy_index_recovers_from_torn_append(tmp_path):
+    path = str(tmp_path / "numpy_index")
+    index = NumpyVectorIndex(path)
+    index.index_many([_embedded_article(i, [1.0, float(i)]) for i in range(3)])
+    # Crash after the vector append, before the sidecar row was complete
+    with index.vectors_path.open("ab") as f:
+        f.write(b"\x00" * 8)
+    with index.rows_path.open("a") as f:
+        f.write('{"url": "https://example.com/3"')
+
+    reopened = NumpyVectorIndex(path)
+    assert len(reopened) == 3
+    reopened.index(_embedded_article(3, [0.0, 1.0]))
+    assert NumpyVectorIndex(path).search([0.0, 1.0], limit=1) == [
+        "https://example.com/3"
+    ]
+
+
+@pytest.mark.parametrize("backend", [ChromaVectorIndex, NumpyVectorIndex])
+def test_vector_index_filtered_search(tmp_path, backend):
+    index = backend(str(tmp_path / "index"))
+    articles = []
+    for i in range(6):
+        article = _embedded_article(i, [1.0, i / 10])
+        article.category = (
+            NewsCategory.CYBERSECURITY if i % 2 else NewsCategory.AI_EMERGING_TECH
+        )
+        article.source = "reddit" if i < 3 else "ars"
+        article.published_at = datetime(2024, 1, i + 1)
+        articles.append(article)
+    index.index_many(articles)
+    query = [1.0, 0.0]
+
+    def urls(**filters):
+        hits = index.search_many([query], limit=10, filters=SearchFilters(**filters))
+        return sorted(hit.url.rsplit("/", 1)[1] for hit in hits[0])
+
+    assert urls() == ["0", "1", "2", "3", "4", "5"]
+    assert urls(category=NewsCategory.CYBERSECURITY.value) == ["1", "3", "5"]
+    assert urls(source="ars") == ["3", "4", "5"]
+    assert urls(published_after=datetime(2024, 1, 3)) == ["2", "3", "4", "5"]
+    assert urls(
+        source="reddit",
+        category=NewsCategory.AI_EMERGING_TECH.value,
+        published_before=datetime(2024, 1, 2),
+    ) == ["0"]
+    # The limit applies to matching articles, not to the global top results
+    hits = index.search_many([query], limit=2, filters=SearchFilters(source="ars"))[0]
+    assert [hit.url for hit in hits] == [
+        "https://example.com/3",
+        "https://example.com/4",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_repository_keyword_search():
+    repo = SQLArticleRepository(database_url="sqlite+aiosqlite:///:memory:")
+    await repo.init_db()
+
+    def article(i, title, content, category=NewsCategory.CYBERSECURITY):
+        return ProcessedArticle(
+            url=f"https://example.com/{i}",
+            title=title,
+            content=content,
+            category=category,
+            source="test",
+            published_at=datetime(2024, 1, i + 1),
+        )
+
+    await repo.save(article(0, "Backdoor in xz utils", "Tracked as CVE-2024-3094."))
+    await repo.save_many(
+        [
+            article(1, "Patch Tuesday roundup", "Fixes CVE-2024-1234 and more."),
+            article(
+                2,
+                "Rust 1.78 released",
+                "The xz crate is unrelated to CVE work.",
+                NewsCategory.SOFTWARE_DEVELOPMENT,
+            ),
+        ]
+    )
+
+    # Hyphenated IDs match as a phrase, not as any of their parts
+    assert await repo.keyword_search("CVE-2024-3094") == ["https://example.com/0"]
+    # Title matches rank above content matches
+    assert (await repo.keyword_search("xz"))[0] == "https://example.com/0"
+    assert await repo.keyword_search(
+        "xz", filters=SearchFilters(category=NewsCategory.SOFTWARE_DEVELOPMENT.value)
+    ) == ["https://example.com/2"]
+    # FTS5 syntax in user input is treated as plain terms
+    assert await repo.keyword_search('"NEAR(xz') == [
+        "https://example.com/0",
+        "https://example.com/2",
+    ]
+    assert await repo.keyword_search("!!") == []
+
+    # Articles stored before the full-text table existed are indexed by init_db
+    async with repo.engine.begin() as conn:
+        await conn.execute(text("DROP TABLE article_fts"))
+    await repo.init_db()
+    assert await repo.keyword_search("roundup") == ["https://example.com/1"]
+
+
+@pytest.mark.parametrize("backend", [ChromaVectorIndex, NumpyVectorIndex])
+def test_vector_index_passages(tmp_path, backend):
+    index = backend(str(tmp_path / "index"))
+    long_article = _embedded_article(0, [1.0, 0.0, 0.0])
+    short_article = _embedded_article(1, [0.0, 0.0, 1.0])
+    index.index_many(
+        [long_article, short_article],
+        {
+            long_article.url: [
+                Passage("intro", [1.0, 0.0, 0.0]),
+                Passage("deep dive", [0.0, 1.0, 0.0]),
+            ]
+        },
+    )
+
+    hits = index.search_many([[0.1, 1.0, 0.0]], limit=3)[0]
+    # Passage hits carry the article URL and the passage text
+    assert hits[0] == (
+        "https://example.com/0",
+        pytest.approx(hits[0].distance),
+        "deep dive",
+    )
+    assert [hit.url for hit in hits] == [
+        "https://example.com/0",
+        "https://example.com/0",
+        "https://example.com/1",
+    ]
+    assert hits[2].passage is None
+
+    index.delete([long_article.url])
+    hits = index.search_many([[0.1, 1.0, 0.0]], limit=3)[0]
+    assert [hit.url for hit in hits] == ["https://example.com/1"]
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+
+from newsfeed.warmup import Warmup
+
+
+@pytest.mark.asyncio
+async def test_warmup_loads_components_in_order_off_the_event_loop():
+    loaded = []
+    loop_thread = threading.get_ident()
+
+    def load(name):
+        def _load():
+            assert threading.get_ident() != loop_thread
+            loaded.append(name)
+
+        return _load
+
+    warmup = Warmup({"embedder": load("embedder"), "index": load("index")})
+    assert warmup.report() == {
+        "ready": False,
+        "components": {"embedder": "pending", "index": "pending"},
+    }
+
+    warmup.start()
+    await asyncio.wait_for(warmup.wait(), timeout=2)
+
+    assert loaded == ["embedder", "index"]
+    assert warmup.ready
+    assert warmup.report()["components"] == {"embedder": "ready", "index": "ready"}
+
+
+@pytest.mark.asyncio
+async def test_warmup_records_failures_and_continues():
+    def broken():
+        raise RuntimeError("no model")
+
+    warmup = Warmup({"embedder": broken, "index": lambda: None})
+    warmup.start()
+    await warmup.wait()
+
+    assert not warmup.ready
+    assert warmup.report() == {
+        "ready": False,
+        "components": {"embedder": "failed", "index": "ready"},
+        "errors": {"embedder": "no model"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_warmup_wait_returns_when_never_started():
+    warmup = Warmup({"embedder": lambda: None})
+
+    await asyncio.wait_for(warmup.wait(), timeout=1)